@@ -1,36 +1,283 @@
-from flask import Flask, request, render_template
-from src.pipeline.predict_pipeline import CustomData, PredictPipeline
+import os
+import hmac
+import time
+from flask import Flask, request, render_template, jsonify
+from markupsafe import Markup
+from src.pipeline.predict_pipeline import (
+    CustomData, PredictPipeline, UnknownModelError, get_model_manager, MODEL_KEY_PATTERN,
+)
+from src.pipeline.request_schema import InvalidRequestError
+from src.pipeline.shadow import ShadowConfig, ShadowEvaluator
+from src.pipeline.drift_monitor import DriftMonitor, DriftMonitorConfig
+from src.pipeline.job_runner import JobRunner
 
 application = Flask(__name__)
 app = application
 
+# model key -> (bundle version, rendered form)
+_form_html = {}
+_shadow_evaluator = None
+# (default bundle version, DriftMonitor), one entry
+_drift_monitor = None
+_job_runner = None
+
+# Form labels for the request fields and predicted scores; options come from the fitted
+# categories
+FIELD_LABELS = {
+    'math_score': 'Math Score',
+    'gender': 'Gender',
+    'race_ethnicity': 'Race or Ethnicity',
+    'parental_level_of_education': 'Parental Level of Education',
+    'lunch': 'Lunch Type',
+    'test_preparation_course': 'Test Preparation Course',
+    'reading_score': 'Reading Score',
+    'writing_score': 'Writing Score',
+}
+
+def get_model_key():
+    # Requests pick a model bundle with ?model=<name>; without it the default model serves
+    return request.args.get('model') or None
+
+def get_predict_pipeline(model_key):
+    # The bundle is resolved once here and every later step of the request uses it: the
+    # request schema (built from the bundle's preprocessor, so requests are validated
+    # against the categories the routed model was trained on), the form, the prediction
+    # and the drift monitor. None for an unknown model key.
+    predict_pipeline = PredictPipeline(model_key)
+    try:
+        predict_pipeline.get_bundle()
+    except UnknownModelError:
+        return None
+    return predict_pipeline
+
+def unknown_model_response(model_key):
+    return jsonify(error=f'unknown model {model_key!r}'), 404
+
+def get_submit_label(target_names):
+    # Single-target bundles do not record which score they predict, so their button stays neutral
+    if not target_names:
+        return 'Predict'
+    labels = [FIELD_LABELS.get(name, name) for name in target_names]
+    return 'Predict ' + ' and '.join(filter(None, [', '.join(labels[:-1]), labels[-1]]))
+
+def get_form_html(predict_pipeline):
+    # The form depends only on the fitted categories, so it is rendered once per bundle
+    # version and pasted into home.html as markup instead of re-running the option loops on
+    # every request. A newly published version gets a new form.
+    model_key, bundle = predict_pipeline.model_key, predict_pipeline.get_bundle()
+    version, form_html = _form_html.get(model_key, (None, None))
+    if form_html is None or version != bundle.version:
+        schema = bundle.request_schema
+        form_html = Markup(render_template(
+            'form.html',
+            model_key=model_key,
+            categorical_fields=[
+                (name, FIELD_LABELS.get(name, name), sorted(allowed)) for name, allowed in schema.categorical_fields
+            ],
+            numerical_fields=[(name, FIELD_LABELS.get(name, name)) for name in schema.numerical_fields],
+            score_range=schema.score_range,
+            submit_label=get_submit_label(bundle.target_names),
+        ))
+        _form_html[model_key] = (bundle.version, form_html)
+    return form_html
+
+def get_shadow_evaluator():
+    # Started on first use when ShadowConfig names a candidate bundle, None otherwise
+    global _shadow_evaluator
+    if _shadow_evaluator is None and ShadowConfig.candidate_model_key:
+        _shadow_evaluator = ShadowEvaluator(ShadowConfig.candidate_model_key).start()
+    return _shadow_evaluator
+
+def shadow_request(model_key, features, predictions, latency_s):
+    # Only traffic served by the default model is compared with the candidate
+    shadow = get_shadow_evaluator()
+    if shadow is not None and model_key is None:
+        shadow.submit(features, predictions, latency_s)
+
+def get_drift_monitor(version):
+    # Kept for the default bundle version the request already resolved, so the check costs
+    # no I/O. A new version gets a new monitor, since the training run that publishes it
+    # also writes its reference statistics. None without statistics, which are then looked
+    # for again on the next request.
+    global _drift_monitor
+    if _drift_monitor is None or _drift_monitor[0] != version:
+        monitor = DriftMonitor.from_artifacts()
+        if monitor is None:
+            return None
+        _drift_monitor = (version, monitor)
+    return _drift_monitor[1]
+
+def monitor_inputs(predict_pipeline, record=None, columns=None):
+    # The reference statistics belong to the default model's training data
+    if predict_pipeline.model_key is not None:
+        return
+    monitor = get_drift_monitor(predict_pipeline.get_bundle().version)
+    if monitor is not None:
+        if record is not None:
+            monitor.observe(record)
+        else:
+            monitor.observe_columns(columns)
+
+def get_job_runner():
+    # Only writes job records; the training itself runs in `python -m src.pipeline.job_runner worker`
+    global _job_runner
+    if _job_runner is None:
+        _job_runner = JobRunner()
+    return _job_runner
+
+def is_admin_request():
+    # Admin endpoints are disabled unless ADMIN_TOKEN is set, and then need it in X-Admin-Token
+    token = os.environ.get('ADMIN_TOKEN')
+    return bool(token) and hmac.compare_digest(request.headers.get('X-Admin-Token', ''), token)
+
+def split_scores(target_names, results):
+    # Multi-target models predict one column per score. The first target's column stays the
+    # `prediction(s)` field, so single-target clients keep working against either kind.
+    if not target_names:
+        return results, None
+    return results[:, 0], {name: results[:, index] for index, name in enumerate(target_names)}
+
+def wants_json():
+    # Programmatic clients (JSON body or Accept: application/json) skip HTML rendering
+    return request.is_json or (
+        request.accept_mimetypes.best_match(['text/html', 'application/json']) == 'application/json'
+    )
+
 @app.route('/')
 def index():
     return render_template('index.html')
 
 @app.route('/predictdata', methods=['GET', 'POST'])
 def predict_datapoint():
+    model_key = get_model_key()
+    predict_pipeline = get_predict_pipeline(model_key)
+    if predict_pipeline is None:
+        return unknown_model_response(model_key)
     if request.method == 'GET':
-        return render_template('home.html')
+        return render_template('home.html', form_html=get_form_html(predict_pipeline))
     else:
-        print(request.form)
-        data = CustomData(
-            gender=request.form.get('gender'),
-            race_ethnicity=request.form.get('race_ethnicity'),
-            parental_level_of_education=request.form.get('parental_level_of_education'),
-            lunch=request.form.get('lunch'),
-            test_preparation_course=request.form.get('test_preparation_course'),
-            reading_score=request.form.get('reading_score'),
-            writing_score=request.form.get('writing_score'),
-        )
+        payload = request.get_json(silent=True) if request.is_json else request.form
+        try:
+            record = predict_pipeline.get_request_schema().validate(payload if isinstance(payload, dict) else {})
+        except InvalidRequestError as e:
+            if wants_json():
+                return jsonify(error=str(e), errors=[
+                    {'field': field, 'message': message} for _, field, message in e.errors
+                ]), 400
+            return render_template('home.html', form_html=get_form_html(predict_pipeline), error=str(e)), 400
+        monitor_inputs(predict_pipeline, record=record)
+        data = CustomData(**record)
         pred_df = data.get_data_as_dataframe()
-        print(pred_df)
-        print("Predicting Pipeline")
-        predict_pipeline = PredictPipeline()
-        print("Running Predict Pipeline")
+        start = time.perf_counter()
         results = predict_pipeline.predict(pred_df)
-        print("Prediction results:", results)
-        return render_template('home.html', results=results[0])
+        shadow_request(model_key, pred_df, results, time.perf_counter() - start)
+        predictions, scores = split_scores(predict_pipeline.get_target_names(), results)
+        result = float(predictions[0])
+        if wants_json():
+            if scores is not None:
+                return jsonify(prediction=result, scores={name: float(values[0]) for name, values in scores.items()})
+            return jsonify(prediction=result)
+        if scores is not None:
+            results = ', '.join(f'{name} {round(float(values[0]), 2)}' for name, values in scores.items())
+            return render_template('home.html', form_html=get_form_html(predict_pipeline), results=results)
+        return render_template('home.html', form_html=get_form_html(predict_pipeline), results=round(result, 2))
+
+@app.route('/predictbatch', methods=['POST'])
+def predict_batch():
+    import pandas as pd
+
+    model_key = get_model_key()
+    predict_pipeline = get_predict_pipeline(model_key)
+    if predict_pipeline is None:
+        return unknown_model_response(model_key)
+    records = request.get_json(silent=True)
+    if not isinstance(records, list):
+        return jsonify(error='expected a JSON list of records'), 400
+    try:
+        columns = predict_pipeline.get_request_schema().validate_many(records)
+    except InvalidRequestError as e:
+        return jsonify(error=str(e), errors=[
+            {'row': row, 'field': field, 'message': message} for row, field, message in e.errors
+        ]), 400
+    if not records:
+        # Nothing to score, monitor or compare; answered in the usual shape
+        target_names = predict_pipeline.get_target_names()
+        if target_names:
+            return jsonify(predictions=[], scores={name: [] for name in target_names})
+        return jsonify(predictions=[])
+    monitor_inputs(predict_pipeline, columns=columns)
+    features = pd.DataFrame(columns)
+    start = time.perf_counter()
+    results = predict_pipeline.predict(features)
+    shadow_request(model_key, features, results, time.perf_counter() - start)
+    predictions, scores = split_scores(predict_pipeline.get_target_names(), results)
+    if scores is not None:
+        return jsonify(predictions=predictions.tolist(),
+                       scores={name: values.tolist() for name, values in scores.items()})
+    return jsonify(predictions=predictions.tolist())
+
+@app.route('/models', methods=['GET'])
+def loaded_models():
+    # Resident bundles, memory use against the budget and cache hit/load/eviction counts
+    return jsonify(get_model_manager().describe())
+
+@app.route('/shadow', methods=['GET'])
+def shadow_summary():
+    # Aggregated candidate-vs-live deltas and latencies when shadow evaluation is enabled
+    shadow = get_shadow_evaluator()
+    return jsonify(shadow.summary() if shadow is not None else {'enabled': False})
+
+@app.route('/drift', methods=['GET'])
+def input_drift():
+    # Drift of recent inputs against the training data, per column and overall
+    predict_pipeline = get_predict_pipeline(None)
+    monitor = get_drift_monitor(predict_pipeline.get_bundle().version) if predict_pipeline is not None else None
+    return jsonify(monitor.get_report() if monitor is not None else {'enabled': False})
+
+@app.route('/admin/train', methods=['POST'])
+def submit_training_job():
+    # Queues a retrain and returns at once; serving keeps using the current model until the
+    # worker publishes the new one
+    if not is_admin_request():
+        return jsonify(error='forbidden'), 403
+    options = request.get_json(silent=True) or {}
+    publish_as = options.get('publish_as')
+    if publish_as is not None and (not isinstance(publish_as, str) or not MODEL_KEY_PATTERN.match(publish_as)
+                                   or publish_as.startswith('.')):
+        return jsonify(error=f'invalid model key {publish_as!r}'), 400
+    targets = options.get('targets')
+    if targets is not None and (not isinstance(targets, list) or not targets
+                                or not all(isinstance(target, str) for target in targets)):
+        return jsonify(error='targets must be a non-empty list of column names'), 400
+    job_id = get_job_runner().submit(force=bool(options.get('force')), distill=bool(options.get('distill')),
+                                     publish_as=publish_as, targets=targets)
+    return jsonify(get_job_runner().status(job_id)), 202
+
+@app.route('/admin/jobs', methods=['GET'])
+def training_jobs():
+    if not is_admin_request():
+        return jsonify(error='forbidden'), 403
+    return jsonify(jobs=get_job_runner().list_jobs())
+
+@app.route('/admin/jobs/<job_id>', methods=['GET'])
+def training_job_status(job_id):
+    if not is_admin_request():
+        return jsonify(error='forbidden'), 403
+    job = get_job_runner().status(job_id)
+    if job is None:
+        return jsonify(error=f'unknown job {job_id!r}'), 404
+    return jsonify(job)
+
+@app.route('/admin/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_training_job(job_id):
+    if not is_admin_request():
+        return jsonify(error='forbidden'), 403
+    runner = get_job_runner()
+    if runner.status(job_id) is None:
+        return jsonify(error=f'unknown job {job_id!r}'), 404
+    if not runner.cancel(job_id):
+        return jsonify(error=f'job {job_id!r} has already finished'), 409
+    return jsonify(runner.status(job_id))
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=8000, debug=True)
\ No newline at end of file
+    app.run(host="0.0.0.0", port=8000, debug=True)
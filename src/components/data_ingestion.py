@@ -1,37 +1,127 @@
 import os
 import sys
+import json
+import hashlib
 from src.exception import CustomException
 from src.logger import logging
 import pandas as pd
 from sklearn.model_selection import train_test_split
 from dataclasses import dataclass
-
-from src.components.data_transformation import DataTransformation
-from src.components.model_trainer import ModelTrainer
+from typing import List
 
 @dataclass
 class DataIngestionConfig:
     train_data_path: str = os.path.join('artifacts', 'train.csv')
     test_data_path: str = os.path.join('artifacts', 'test.csv')
     raw_data_path: str = os.path.join('artifacts', 'data.csv')
+    new_train_data_path: str = os.path.join('artifacts', 'new_train.csv')
+    # Every row added by incremental ingestion; full ingestion reads it after the source
+    # data, so a full rebuild keeps the appended rows
+    appended_data_path: str = os.path.join('artifacts', 'appended_data.csv')
+    manifest_path: str = os.path.join('artifacts', 'data_manifest.json')
+    source_data_path: str = os.path.join('notebook', 'data', 'stud.csv')
+    # 'random' is the original seeded train_test_split; 'hash' assigns each row by a stable
+    # hash of its identity columns, so appending rows never moves existing rows between splits
+    split_mode: str = 'random'
+    test_size: float = 0.2
+    # Columns that identify a row for the hash split, None for all columns
+    identity_columns: List[str] = None
+
+def get_file_checksum(file_path: str) -> str:
+    sha256 = hashlib.sha256()
+    with open(file_path, 'rb') as file_obj:
+        for block in iter(lambda: file_obj.read(1 << 20), b''):
+            sha256.update(block)
+    return sha256.hexdigest()
 
 class DataIngestion:
-    def __init__(self):
-        self.ingestion_config = DataIngestionConfig()
+    def __init__(self, config: DataIngestionConfig = None):
+        self.ingestion_config = config or DataIngestionConfig()
+
+    def get_hash_split_mask(self, df):
+        '''
+        True for rows that belong to the test split. A row's side depends only on its own
+        identity columns, never on the other rows or their order.
+        '''
+        identity_columns = self.ingestion_config.identity_columns or list(df.columns)
+        row_hashes = pd.util.hash_pandas_object(df[identity_columns], index=False).values
+        return (row_hashes % 10000) < self.ingestion_config.test_size * 10000
+
+    def split_data(self, df):
+        if self.ingestion_config.split_mode == 'hash':
+            test_mask = self.get_hash_split_mask(df)
+            return df[~test_mask], df[test_mask]
+        return train_test_split(df, test_size=self.ingestion_config.test_size, random_state=42)
+
+    def write_manifest(self, raw_df, train_rows: int, test_rows: int, source_path: str,
+                       source_sha256: str = None, appended_batches: list = None) -> dict:
+        '''
+        Writes a manifest of the ingested data: row counts, a hash per column, the source
+        checksum, the batches appended by incremental ingestion and the split settings. Its
+        fingerprint covers only what describes the data, not where it was read from, so the
+        same data gives the same fingerprint in any checkout or job workspace and downstream
+        stages can compare one string to know whether the data changed.
+        '''
+        if source_sha256 is None and source_path is not None:
+            source_sha256 = get_file_checksum(source_path)
+        manifest = {
+            'source_path': source_path,
+            'source_sha256': source_sha256,
+            'appended_batches': appended_batches or [],
+            'split_mode': self.ingestion_config.split_mode,
+            'test_size': self.ingestion_config.test_size,
+            'row_counts': {'raw': len(raw_df), 'train': train_rows, 'test': test_rows},
+            'column_hashes': {
+                column: hashlib.sha256(
+                    pd.util.hash_pandas_object(raw_df[column], index=False).values.tobytes()
+                ).hexdigest()
+                for column in raw_df.columns
+            },
+        }
+        manifest['fingerprint'] = hashlib.sha256(json.dumps(
+            {key: value for key, value in manifest.items() if key != 'source_path'}, sort_keys=True
+        ).encode()).hexdigest()
+
+        with open(self.ingestion_config.manifest_path, 'w') as file_obj:
+            json.dump(manifest, file_obj, indent=2)
+        logging.info(f"Data manifest written with fingerprint {manifest['fingerprint']}")
+        return manifest
+
+    def load_manifest(self):
+        '''
+        The manifest written by the last ingestion, or None if there is none
+        '''
+        if not os.path.exists(self.ingestion_config.manifest_path):
+            return None
+        with open(self.ingestion_config.manifest_path) as file_obj:
+            return json.load(file_obj)
 
     def initiate_data_ingestion(self):
+        '''
+        Splits the source data, plus every row incremental ingestion has appended since,
+        into train and test
+        '''
         logging.info("Entered the data ingestion method or component")
         try:
-            df = pd.read_csv(f'{os.path.join(os.getcwd(), "notebook", "data", "stud.csv")}')
+            source_path = self.ingestion_config.source_data_path
+            df = pd.read_csv(os.path.join(os.getcwd(), source_path))
             logging.info('Read the dataset as dataframe')
+            appended_batches = []
+            if os.path.exists(self.ingestion_config.appended_data_path):
+                appended_df = pd.read_csv(self.ingestion_config.appended_data_path)[df.columns]
+                df = pd.concat([df, appended_df], ignore_index=True)
+                manifest = self.load_manifest()
+                appended_batches = manifest.get('appended_batches', []) if manifest else []
+                logging.info(f'Added {len(appended_df)} rows from earlier incremental runs')
 
             os.makedirs(os.path.dirname(self.ingestion_config.train_data_path), exist_ok=True)
             df.to_csv(self.ingestion_config.raw_data_path, index=False, header=True)
-            logging.info("Train test split initiated")
+            logging.info(f"Train test split initiated ({self.ingestion_config.split_mode})")
 
-            train_set, test_set = train_test_split(df, test_size=0.2, random_state=42)
+            train_set, test_set = self.split_data(df)
             train_set.to_csv(self.ingestion_config.train_data_path, index=False, header=True)
             test_set.to_csv(self.ingestion_config.test_data_path, index=False, header=True)
+            self.write_manifest(df, len(train_set), len(test_set), source_path, appended_batches=appended_batches)
             logging.info("Ingestion of the data is completed")
 
             return (
@@ -41,14 +131,61 @@ class DataIngestion:
         except Exception as e:
             raise CustomException(e, sys)
 
-if __name__ == "__main__":
-    obj = DataIngestion()
-    train_data, test_data = obj.initiate_data_ingestion()
-    print(train_data, test_data)
+    def initiate_incremental_ingestion(self, new_data_path):
+        '''
+        Appends a batch of new rows to the existing splits. With the random split every new
+        row goes to train, leaving the test split untouched so scores stay comparable between
+        incremental runs; with the hash split each row goes wherever its hash sends it.
+        The rows are also kept in appended_data_path for the next full ingestion. Returns
+        the train and test paths plus a file holding only the new train rows.
+        '''
+        logging.info("Entered the incremental data ingestion method or component")
+        try:
+            columns = pd.read_csv(self.ingestion_config.train_data_path, nrows=0).columns
+            new_df = pd.read_csv(new_data_path)[columns]
+            logging.info(f'Read {len(new_df)} new rows as dataframe')
+
+            if self.ingestion_config.split_mode == 'hash':
+                test_mask = self.get_hash_split_mask(new_df)
+                new_train_df, new_test_df = new_df[~test_mask], new_df[test_mask]
+            else:
+                new_train_df, new_test_df = new_df, new_df.iloc[:0]
 
-    data_transformation = DataTransformation()
-    train_data, test_data, _ = data_transformation.initiate_data_transformation(train_data, test_data)
-    print(train_data, test_data)
+            new_df.to_csv(self.ingestion_config.raw_data_path, mode='a', index=False, header=False)
+            appended_path = self.ingestion_config.appended_data_path
+            new_df.to_csv(appended_path, mode='a', index=False, header=not os.path.exists(appended_path))
+            new_train_df.to_csv(self.ingestion_config.train_data_path, mode='a', index=False, header=False)
+            new_test_df.to_csv(self.ingestion_config.test_data_path, mode='a', index=False, header=False)
+            new_train_df.to_csv(self.ingestion_config.new_train_data_path, index=False, header=True)
+
+            # The source fields keep describing the full ingestion's data; each batch is
+            # recorded on its own
+            manifest = self.load_manifest() or {}
+            raw_df = pd.read_csv(self.ingestion_config.raw_data_path)
+            row_counts = manifest.get('row_counts', {'train': 0, 'test': 0})
+            self.write_manifest(
+                raw_df,
+                row_counts['train'] + len(new_train_df),
+                row_counts['test'] + len(new_test_df),
+                manifest.get('source_path'),
+                source_sha256=manifest.get('source_sha256'),
+                appended_batches=manifest.get('appended_batches', []) + [
+                    {'sha256': get_file_checksum(new_data_path), 'rows': len(new_df)}
+                ],
+            )
+            logging.info("Incremental ingestion of the data is completed")
+
+            return (
+                self.ingestion_config.train_data_path,
+                self.ingestion_config.test_data_path,
+                self.ingestion_config.new_train_data_path
+            )
+        except Exception as e:
+            raise CustomException(e, sys)
+
+if __name__ == "__main__":
+    # Runs the whole training pipeline, which also publishes the trained pair as a new
+    # version of the default bundle; serving reads only published versions
+    from src.pipeline.train_pipeline import TrainPipeline
 
-    model_trainer = ModelTrainer()
-    print(model_trainer.initiate_model_trainer(train_data, test_data))
+    print(TrainPipeline().run(force=True))
@@ -1,5 +1,6 @@
 import sys
 import os
+from collections import Counter
 from dataclasses import dataclass
 
 import numpy as np
@@ -11,32 +12,57 @@ from sklearn.preprocessing import OneHotEncoder, StandardScaler
 
 from src.exception import CustomException
 from src.logger import logging
-from src.utils import save_object
+from src.sketches import QuantileSketch, RunningMoments, median_from_counts, most_frequent_from_counts
+from src.utils import save_object, load_object, transform_in_blocks, iter_row_blocks
 
 @dataclass
 class DataTransformationConfig:
     preprocessor_obj_file_path = os.path.join('artifacts', 'preprocessor.pkl')
+    preprocessor_stats_file_path = os.path.join('artifacts', 'preprocessor_stats.pkl')
+    numerical_columns = [
+        "writing_score",
+        "reading_score",
+        "math_score"
+    ]
+    categorical_columns = [
+        "gender",
+        "race_ethnicity",
+        "parental_level_of_education",
+        "lunch",
+        "test_preparation_course"
+    ]
+    # Scores the model predicts. Targets are dropped from the features, so a model trained on
+    # several targets predicts all of them from one request through one shared preprocessor.
+    target_columns = ['math_score']
+    # Workers for fitting/applying the column groups in parallel and for block-wise transforms
+    n_jobs = None
+    # Rows per block when transforming the test set and batch-scoring inputs
+    transform_block_size = 10000
+    # Fit the preprocessor in one pass over CSV/Parquet chunks instead of from an in-memory frame
+    streaming_fit = False
+    # Distinct values a numeric column's median sketch keeps before it starts approximating
+    quantile_sketch_capacity = 1000
 
 class DataTransformation:
     def __init__(self):
         self.data_transformation_config = DataTransformationConfig()
-    
+
+    def get_feature_columns(self):
+        '''
+        Numerical and categorical input columns: the configured columns minus the targets
+        '''
+        target_columns = self.data_transformation_config.target_columns
+        return (
+            [column for column in self.data_transformation_config.numerical_columns if column not in target_columns],
+            [column for column in self.data_transformation_config.categorical_columns if column not in target_columns],
+        )
+
     def get_data_transformer_object(self):
         '''
         This function is responsible for data transformation
         '''
         try:
-            numerical_columns = [
-                "writing_score",
-                "reading_score"
-            ]
-            categorical_columns = [
-                "gender",
-                "race_ethnicity",
-                "parental_level_of_education",
-                "lunch",
-                "test_preparation_course"
-            ]
+            numerical_columns, categorical_columns = self.get_feature_columns()
             num_pipeline = Pipeline(
                 steps=[
                     ("imputer", SimpleImputer(strategy="median")),
@@ -53,11 +79,18 @@ class DataTransformation:
             )
             logging.info('Numerical and Categorical pipelines are created')
 
+            # A group with no columns (e.g. no score left as input once every score is a
+            # target) is left out rather than fitted on nothing. Output is always dense: with
+            # only one-hot columns left it would otherwise fall under the sparse threshold.
             preprocessor = ColumnTransformer(
                 [
-                    ("num_pipeline", num_pipeline, numerical_columns),
-                    ("cat_pipeline", cat_pipeline, categorical_columns)
-                ]
+                    (name, pipeline, columns) for name, pipeline, columns in (
+                        ("num_pipeline", num_pipeline, numerical_columns),
+                        ("cat_pipeline", cat_pipeline, categorical_columns)
+                    ) if columns
+                ],
+                sparse_threshold=0,
+                n_jobs=self.data_transformation_config.n_jobs
             )
             logging.info('Column Transformer is created')
 
@@ -65,32 +98,206 @@ class DataTransformation:
         except Exception as e:
             raise CustomException(e, sys)
 
+    def get_preprocessor_statistics(self, input_feature_df):
+        '''
+        Per-column value counts of the rows the preprocessor was fitted on, kept so that
+        medians and most-frequent values can be recomputed when new rows arrive
+        '''
+        try:
+            numerical_columns, categorical_columns = self.get_feature_columns()
+            columns = numerical_columns + categorical_columns
+            return {
+                column: Counter(input_feature_df[column].dropna().value_counts().to_dict())
+                for column in columns
+            }
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def fit_streaming_data_transformer_object(self, source_path):
+        '''
+        Fits the preprocessor in a single pass over a CSV/Parquet file read in blocks, never
+        holding the whole frame in memory. Medians come from quantile sketches (exact while
+        a column has at most quantile_sketch_capacity distinct values), most-frequent values
+        and one-hot vocabularies from running counts, and scaler moments from running
+        means/variances corrected for the imputed values. Returns the fitted preprocessor
+        and the value-count statistics used by incremental updates.
+        '''
+        try:
+            numerical_columns, categorical_columns = self.get_feature_columns()
+            target_columns = self.data_transformation_config.target_columns
+            capacity = self.data_transformation_config.quantile_sketch_capacity
+
+            sketches = {column: QuantileSketch(capacity) for column in numerical_columns}
+            moments = {column: RunningMoments() for column in numerical_columns}
+            category_counts = {column: Counter() for column in categorical_columns}
+            missing = {column: 0 for column in numerical_columns + categorical_columns}
+            feature_columns, n_rows = None, 0
+
+            for block in iter_row_blocks(source_path, self.data_transformation_config.transform_block_size):
+                if feature_columns is None:
+                    feature_columns = [column for column in block.columns if column not in target_columns]
+                n_rows += len(block)
+                for column in numerical_columns:
+                    values = block[column].to_numpy(dtype=float)
+                    sketches[column].update(values)
+                    moments[column].update(values)
+                    missing[column] += int(np.isnan(values).sum())
+                for column in categorical_columns:
+                    category_counts[column].update(block[column].dropna().value_counts().to_dict())
+                    missing[column] += int(block[column].isna().sum())
+            logging.info(f'Streamed preprocessing statistics over {n_rows} rows')
+
+            medians = {column: sketches[column].median() for column in numerical_columns}
+            modes = {column: most_frequent_from_counts(category_counts[column]) for column in categorical_columns}
+            for column in numerical_columns:
+                moments[column].update_constant(medians[column], missing[column])
+
+            # Fitting on a small frame that holds every category gives the pipeline the same
+            # structure as a full fit (encoder vocabularies, feature names); the statistics
+            # are then replaced by the streamed ones.
+            n_support = max(len(counts) for counts in category_counts.values())
+            support = {}
+            for column in feature_columns:
+                if column in medians:
+                    support[column] = [medians[column]] * n_support
+                elif column in category_counts:
+                    categories = sorted(category_counts[column])
+                    support[column] = [categories[i % len(categories)] for i in range(n_support)]
+                else:
+                    support[column] = [None] * n_support
+            support_df = pd.DataFrame(support)
+            preprocessor = self.get_data_transformer_object().fit(support_df)
+
+            if numerical_columns:
+                num_pipeline = preprocessor.named_transformers_['num_pipeline']
+                num_pipeline.named_steps['imputer'].statistics_ = np.array(
+                    [medians[column] for column in numerical_columns]
+                )
+                self._set_scaler_moments(
+                    num_pipeline.named_steps['scaler'],
+                    np.array([moments[column].mean for column in numerical_columns]),
+                    np.array([moments[column].variance for column in numerical_columns]),
+                    n_rows
+                )
+
+            cat_pipeline = preprocessor.named_transformers_['cat_pipeline']
+            cat_pipeline.named_steps['imputer'].statistics_ = np.array(
+                [modes[column] for column in categorical_columns], dtype=object
+            )
+            # One-hot columns are indicators, so after imputation each has mean p and variance p(1 - p)
+            proportions = np.array([
+                (category_counts[column][category] + (missing[column] if category == modes[column] else 0)) / n_rows
+                for column, categories in zip(categorical_columns, cat_pipeline.named_steps['onehotencoder'].categories_)
+                for category in categories
+            ])
+            self._set_scaler_moments(
+                cat_pipeline.named_steps['scaler'], proportions, proportions * (1 - proportions), n_rows
+            )
+
+            statistics = {column: Counter(sketches[column].centroids) for column in numerical_columns}
+            statistics.update(category_counts)
+
+            return preprocessor, statistics
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    @staticmethod
+    def _set_scaler_moments(scaler, mean, var, n_samples_seen):
+        scaler.mean_ = mean
+        scaler.var_ = var
+        scaler.scale_ = np.where(var > 0, np.sqrt(var), 1.0)
+        scaler.n_samples_seen_ = n_samples_seen
+
+    def update_data_transformer_object(self, preprocessor, statistics, new_feature_df):
+        '''
+        Updates a fitted preprocessor in place from the new rows only: imputer medians and
+        most-frequent values are recomputed from the stored value counts and the scalers are
+        moved on with partial_fit. Returns False without touching the preprocessor when the
+        new rows contain categories the encoder has not seen, since that changes the width
+        of the transformed matrix and needs a full rebuild.
+        '''
+        try:
+            numerical_columns, categorical_columns = self.get_feature_columns()
+
+            if len(new_feature_df) == 0:
+                return True
+
+            cat_pipeline = preprocessor.named_transformers_['cat_pipeline']
+
+            encoder = cat_pipeline.named_steps['onehotencoder']
+            for column, categories in zip(categorical_columns, encoder.categories_):
+                unseen = set(new_feature_df[column].dropna()) - set(categories)
+                if unseen:
+                    logging.info(f'Unseen categories {sorted(unseen)} in column {column}, full rebuild required')
+                    return False
+
+            for column, counts in self.get_preprocessor_statistics(new_feature_df).items():
+                statistics[column].update(counts)
+
+            if numerical_columns:
+                num_pipeline = preprocessor.named_transformers_['num_pipeline']
+                num_imputer = num_pipeline.named_steps['imputer']
+                num_imputer.statistics_ = np.array(
+                    [median_from_counts(statistics[column]) for column in numerical_columns]
+                )
+                num_pipeline.named_steps['scaler'].partial_fit(
+                    num_imputer.transform(new_feature_df[numerical_columns])
+                )
+
+            cat_imputer = cat_pipeline.named_steps['imputer']
+            cat_imputer.statistics_ = np.array(
+                [most_frequent_from_counts(statistics[column]) for column in categorical_columns],
+                dtype=object
+            )
+            cat_pipeline.named_steps['scaler'].partial_fit(
+                encoder.transform(cat_imputer.transform(new_feature_df[categorical_columns]))
+            )
+            logging.info(f'Preprocessor statistics updated from {len(new_feature_df)} new rows')
+
+            return True
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def transform(self, preprocessor, features):
+        '''
+        Streaming transform: applies a fitted preprocessor to a DataFrame or CSV path in
+        blocks of transform_block_size rows, in parallel when n_jobs is set
+        '''
+        return transform_in_blocks(
+            preprocessor,
+            features,
+            block_size=self.data_transformation_config.transform_block_size,
+            n_jobs=self.data_transformation_config.n_jobs
+        )
+
     def initiate_data_transformation(self, train_path, test_path):
         '''
         This function is responsible for data transformation
         '''
+        if self.data_transformation_config.streaming_fit:
+            return self.initiate_streaming_data_transformation(train_path, test_path)
         try:
             train_df = pd.read_csv(train_path)
             test_df = pd.read_csv(test_path)
-            
+
             logging.info('Read train and test data completed')
 
             logging.info('Obtaining preprocessing object')
             preprocessing_obj = self.get_data_transformer_object()
 
-            target_column_name = 'math_score'
-            drop_columns = [target_column_name]
-            
+            target_columns = self.data_transformation_config.target_columns
+            drop_columns = target_columns
+
             input_feature_train_df = train_df.drop(columns=drop_columns, axis=1)
-            target_feature_train_df = train_df[target_column_name]
+            target_feature_train_df = train_df[target_columns]
 
             input_feature_test_df = test_df.drop(columns=drop_columns, axis=1)
-            target_feature_test_df = test_df[target_column_name]
+            target_feature_test_df = test_df[target_columns]
 
             logging.info('Applying preprocessing object on training dataframe and testing dataframe')
 
             input_feature_train_arr = preprocessing_obj.fit_transform(input_feature_train_df)
-            input_feature_test_arr = preprocessing_obj.transform(input_feature_test_df)
+            input_feature_test_arr = self.transform(preprocessing_obj, input_feature_test_df)
 
             train_arr = np.c_[input_feature_train_arr, np.array(target_feature_train_df)]
             test_arr = np.c_[input_feature_test_arr, np.array(target_feature_test_df)]
@@ -101,6 +308,95 @@ class DataTransformation:
                 file_path=self.data_transformation_config.preprocessor_obj_file_path,
                 obj=preprocessing_obj
             )
+            save_object(
+                file_path=self.data_transformation_config.preprocessor_stats_file_path,
+                obj=self.get_preprocessor_statistics(input_feature_train_df)
+            )
+
+            return (
+                train_arr,
+                test_arr,
+                self.data_transformation_config.preprocessor_obj_file_path
+            )
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def initiate_streaming_data_transformation(self, train_path, test_path):
+        '''
+        Out-of-core variant of initiate_data_transformation: the preprocessor is fitted in one
+        pass over train_path and both splits are transformed block by block, so the raw
+        frames are never loaded whole. Only the transformed arrays the trainer needs are
+        materialised.
+        '''
+        try:
+            logging.info('Fitting preprocessing object from streamed training data')
+            preprocessing_obj, statistics = self.fit_streaming_data_transformer_object(train_path)
+            target_columns = self.data_transformation_config.target_columns
+            block_size = self.data_transformation_config.transform_block_size
+
+            train_arr, test_arr = (
+                np.vstack([
+                    np.c_[preprocessing_obj.transform(block), block[target_columns].to_numpy()]
+                    for block in iter_row_blocks(path, block_size)
+                ])
+                for path in (train_path, test_path)
+            )
+
+            save_object(
+                file_path=self.data_transformation_config.preprocessor_obj_file_path,
+                obj=preprocessing_obj
+            )
+            save_object(
+                file_path=self.data_transformation_config.preprocessor_stats_file_path,
+                obj=statistics
+            )
+            logging.info('Saved streamed preprocessing object')
+
+            return (
+                train_arr,
+                test_arr,
+                self.data_transformation_config.preprocessor_obj_file_path
+            )
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def initiate_incremental_transformation(self, train_path, test_path, new_data_path):
+        '''
+        Updates the saved preprocessor from the rows in new_data_path instead of refitting it
+        on the whole of train_path. Returns None when a full rebuild is required.
+        '''
+        try:
+            train_df = pd.read_csv(train_path)
+            test_df = pd.read_csv(test_path)
+            new_df = pd.read_csv(new_data_path)
+            logging.info('Read train, test and new data completed')
+
+            preprocessing_obj = load_object(file_path=self.data_transformation_config.preprocessor_obj_file_path)
+            statistics = load_object(file_path=self.data_transformation_config.preprocessor_stats_file_path)
+
+            target_columns = self.data_transformation_config.target_columns
+            drop_columns = target_columns
+
+            if not self.update_data_transformer_object(
+                preprocessing_obj, statistics, new_df.drop(columns=drop_columns, axis=1)
+            ):
+                return None
+
+            input_feature_train_arr = self.transform(preprocessing_obj, train_df.drop(columns=drop_columns, axis=1))
+            input_feature_test_arr = self.transform(preprocessing_obj, test_df.drop(columns=drop_columns, axis=1))
+
+            train_arr = np.c_[input_feature_train_arr, np.array(train_df[target_columns])]
+            test_arr = np.c_[input_feature_test_arr, np.array(test_df[target_columns])]
+
+            save_object(
+                file_path=self.data_transformation_config.preprocessor_obj_file_path,
+                obj=preprocessing_obj
+            )
+            save_object(
+                file_path=self.data_transformation_config.preprocessor_stats_file_path,
+                obj=statistics
+            )
+            logging.info('Saved updated preprocessing object')
 
             return (
                 train_arr,
@@ -111,6 +407,8 @@ class DataTransformation:
             raise CustomException(e, sys)
 
 if __name__ == "__main__":
+    # Refits preprocessor.pkl only. It is not published on its own, since it has to be
+    # served with a model trained on its output; use src.pipeline.train_pipeline for that
     train_path = os.path.join('artifacts', 'train.csv')
     test_path = os.path.join('artifacts', 'test.csv')
     obj = DataTransformation()
@@ -0,0 +1,129 @@
+import os
+import sys
+import json
+from dataclasses import dataclass
+
+import numpy as np
+
+from src.exception import CustomException
+from src.logger import logging
+from src.components.data_transformation import DataTransformationConfig
+from src.components.model_trainer import ModelTrainerConfig
+from src.pipeline.request_schema import RequestSchema
+from src.utils import save_object, load_object, get_model_costs
+
+@dataclass
+class ModelDistillationConfig:
+    teacher_model_file_path = os.path.join('artifacts', 'teacher_model.pkl')
+    distillation_report_file_path = os.path.join('artifacts', 'distillation_report.json')
+    # Synthetic payloads labelled by the teacher; a fifth of them measure fidelity
+    n_synthetic_samples = 100000
+    # A student is promoted when its test R2 is within this of the teacher's and it is faster
+    r2_tolerance = 0.005
+    random_state = 42
+
+class ModelDistillation:
+    def __init__(self):
+        self.model_distillation_config = ModelDistillationConfig()
+        self.data_transformation_config = DataTransformationConfig()
+        self.model_trainer_config = ModelTrainerConfig()
+
+    @staticmethod
+    def get_student_models():
+        from sklearn.linear_model import LinearRegression
+        from sklearn.pipeline import make_pipeline
+        from sklearn.preprocessing import PolynomialFeatures
+        from sklearn.tree import DecisionTreeRegressor
+
+        return {
+            "Decision Tree (depth 8)": DecisionTreeRegressor(max_depth=8, random_state=42),
+            "Decision Tree (depth 12)": DecisionTreeRegressor(max_depth=12, random_state=42),
+            "Linear Regression": LinearRegression(),
+            # Pairwise interactions of the encoded features, e.g. a score per lunch type
+            "Polynomial Regression": make_pipeline(PolynomialFeatures(degree=2), LinearRegression()),
+        }
+
+    def sample_input_domain(self, schema: RequestSchema, n_samples: int):
+        '''
+        Uniform random payloads over the finite CustomData domain: every fitted category
+        and every integer score the request schema accepts
+        '''
+        import pandas as pd
+
+        rng = np.random.RandomState(self.model_distillation_config.random_state)
+        low, high = schema.score_range
+        columns = {
+            column: rng.choice(sorted(allowed), n_samples) for column, allowed in schema.categorical_fields
+        }
+        for column in schema.numerical_fields:
+            columns[column] = rng.randint(low, high + 1, n_samples)
+        return pd.DataFrame(columns)
+
+    def initiate_model_distillation(self, test_array):
+        '''
+        Labels synthetic payloads with the trained model (the teacher), fits each student
+        on those labels and reports fidelity to the teacher, test R2 and latency. The
+        fastest student within r2_tolerance of the teacher's test R2 replaces model.pkl;
+        the teacher is kept as teacher_model.pkl.
+        '''
+        from sklearn.metrics import r2_score
+
+        try:
+            X_test, y_test = test_array[:, :-1], test_array[:, -1]
+            preprocessor = load_object(file_path=self.data_transformation_config.preprocessor_obj_file_path)
+            teacher = load_object(file_path=self.model_trainer_config.trained_model_file_path)
+
+            schema = RequestSchema.from_preprocessor(preprocessor)
+            synthetic_df = self.sample_input_domain(schema, self.model_distillation_config.n_synthetic_samples)
+            X_synthetic = preprocessor.transform(synthetic_df)
+            if hasattr(X_synthetic, 'toarray'):
+                X_synthetic = X_synthetic.toarray()
+            y_synthetic = teacher.predict(X_synthetic)
+            logging.info(f'Labelled {len(y_synthetic)} synthetic payloads with {type(teacher).__name__}')
+
+            n_fit = int(len(y_synthetic) * 0.8)
+            students = self.get_student_models()
+            for name, student in students.items():
+                student.fit(X_synthetic[:n_fit], y_synthetic[:n_fit])
+
+            costs = get_model_costs({'Teacher': teacher, **students}, X_test)
+            teacher_test_r2 = r2_score(y_test, teacher.predict(X_test))
+            student_reports = {}
+            for name, student in students.items():
+                holdout_predictions = student.predict(X_synthetic[n_fit:])
+                student_reports[name] = {
+                    'fidelity_r2': r2_score(y_synthetic[n_fit:], holdout_predictions),
+                    'max_abs_error': float(np.abs(y_synthetic[n_fit:] - holdout_predictions).max()),
+                    'test_r2': r2_score(y_test, student.predict(X_test)),
+                    **costs[name],
+                }
+
+            candidates = [
+                name for name, report in student_reports.items()
+                if teacher_test_r2 - report['test_r2'] <= self.model_distillation_config.r2_tolerance
+                and report['single_row_latency_ms'] < costs['Teacher']['single_row_latency_ms']
+            ]
+            promoted = min(
+                candidates, key=lambda name: student_reports[name]['single_row_latency_ms'], default=None
+            )
+            distillation_report = {
+                'teacher': {'model': type(teacher).__name__, 'test_r2': teacher_test_r2, **costs['Teacher']},
+                'students': student_reports,
+                'n_synthetic_samples': len(y_synthetic),
+                'r2_tolerance': self.model_distillation_config.r2_tolerance,
+                'promoted': promoted,
+            }
+
+            if promoted is not None:
+                save_object(file_path=self.model_distillation_config.teacher_model_file_path, obj=teacher)
+                save_object(file_path=self.model_trainer_config.trained_model_file_path, obj=students[promoted])
+                logging.info(f'Promoted distilled student {promoted} to serving')
+            else:
+                logging.info('No distilled student within tolerance, keeping the teacher')
+
+            with open(self.model_distillation_config.distillation_report_file_path, 'w') as file_obj:
+                json.dump(distillation_report, file_obj, indent=2)
+
+            return distillation_report
+        except Exception as e:
+            raise CustomException(e, sys)
@@ -0,0 +1,145 @@
+import os
+import sys
+import json
+from dataclasses import dataclass
+
+import numpy as np
+
+from src.exception import CustomException
+from src.logger import logging
+from src.utils import get_cv_folds, get_model_costs
+
+@dataclass
+class ModelStackingConfig:
+    stacking_report_file_path = os.path.join('artifacts', 'stacking_report.json')
+    # A member stays in the blend only while it adds at least this much out-of-fold R2
+    # per millisecond of single-row latency it costs
+    min_gain_per_ms = 0.001
+
+class StackedRegressor:
+    '''
+    Blend of fitted member models: a non-negative linear regression (the meta-learner)
+    over the members' predictions. Pickled as a whole into model.pkl like any estimator.
+    '''
+    def __init__(self, members: dict, meta_model):
+        self.members = members
+        self.meta_model = meta_model
+
+    def member_predictions(self, X):
+        return np.column_stack([model.predict(X) for model in self.members.values()])
+
+    def predict(self, X):
+        return self.meta_model.predict(self.member_predictions(X))
+
+    def fit(self, X, y):
+        '''
+        Refits every member and trains the meta-learner on the members' out-of-fold
+        predictions, so the weights are learned on predictions the members did not fit
+        '''
+        from sklearn.base import clone
+        from sklearn.model_selection import cross_val_predict
+
+        cv_folds = get_cv_folds(len(y))
+        oof_matrix = np.column_stack([
+            cross_val_predict(clone(model), X, y, cv=cv_folds) for model in self.members.values()
+        ])
+        for model in self.members.values():
+            model.fit(X, y)
+        self.meta_model.fit(oof_matrix, y)
+        return self
+
+class ModelStacking:
+    def __init__(self):
+        self.model_stacking_config = ModelStackingConfig()
+
+    @staticmethod
+    def get_meta_model():
+        from sklearn.linear_model import LinearRegression
+        return LinearRegression(positive=True)
+
+    def get_oof_score(self, oof_matrix, y_train):
+        '''
+        Honest R2 of the meta-learner: its own out-of-fold predictions over the members'
+        out-of-fold predictions, using the folds of the hyperparameter search
+        '''
+        from sklearn.metrics import r2_score
+        from sklearn.model_selection import cross_val_predict
+
+        meta_oof = cross_val_predict(self.get_meta_model(), oof_matrix, y_train,
+                                     cv=get_cv_folds(len(y_train)))
+        return r2_score(y_train, meta_oof)
+
+    def prune_members(self, oof_predictions: dict, y_train, member_latency_ms: dict):
+        '''
+        Greedy backward elimination: repeatedly drops the member whose removal costs the
+        least out-of-fold R2 per millisecond of latency saved, while that cost is below
+        min_gain_per_ms. Returns the kept member names and the dropped ones in order.
+        '''
+        members = list(oof_predictions)
+        dropped = []
+        while len(members) > 1:
+            score = self.get_oof_score(np.column_stack([oof_predictions[name] for name in members]), y_train)
+            gains_per_ms = {}
+            for name in members:
+                others = [other for other in members if other != name]
+                score_without = self.get_oof_score(
+                    np.column_stack([oof_predictions[other] for other in others]), y_train
+                )
+                gains_per_ms[name] = (score - score_without) / max(member_latency_ms[name], 1e-6)
+            weakest = min(gains_per_ms, key=gains_per_ms.get)
+            if gains_per_ms[weakest] >= self.model_stacking_config.min_gain_per_ms:
+                break
+            logging.info(f'Dropping {weakest} from the blend ({gains_per_ms[weakest]:.6f} R2 per ms)')
+            members.remove(weakest)
+            dropped.append(weakest)
+        return members, dropped
+
+    def initiate_model_stacking(self, oof_predictions: dict, y_train, X_test, y_test,
+                                models: dict, model_metrics: dict):
+        '''
+        Blends the search winners using the out-of-fold predictions evaluate_models kept,
+        so no base model is refitted. Returns the stacked model and a report saying whether
+        it beats the best single model on the test split.
+        '''
+        from sklearn.metrics import r2_score
+
+        try:
+            member_latency_ms = {
+                name: model_metrics[name]['single_row_latency_ms'] for name in oof_predictions
+            }
+            members, dropped = self.prune_members(oof_predictions, y_train, member_latency_ms)
+
+            oof_matrix = np.column_stack([oof_predictions[name] for name in members])
+            meta_model = self.get_meta_model().fit(oof_matrix, y_train)
+            stacked_model = StackedRegressor({name: models[name] for name in members}, meta_model)
+
+            best_single_name = max(model_metrics, key=lambda name: model_metrics[name]['r2'])
+            test_r2 = r2_score(y_test, stacked_model.predict(X_test))
+            stacked_costs = get_model_costs({'Stacked Ensemble': stacked_model}, X_test)['Stacked Ensemble']
+
+            stacking_report = {
+                'members': members,
+                'dropped': dropped,
+                'weights': dict(zip(members, meta_model.coef_.tolist())),
+                'intercept': float(meta_model.intercept_),
+                'oof_r2': self.get_oof_score(oof_matrix, y_train),
+                'best_single_oof_r2': max(
+                    r2_score(y_train, predictions) for predictions in oof_predictions.values()
+                ),
+                'test_r2': test_r2,
+                'best_single_model': best_single_name,
+                'best_single_test_r2': model_metrics[best_single_name]['r2'],
+                # A single surviving member is just a recalibrated model, not a blend
+                'beats_best_single': bool(len(members) > 1 and test_r2 > model_metrics[best_single_name]['r2']),
+                **stacked_costs,
+            }
+
+            os.makedirs(os.path.dirname(self.model_stacking_config.stacking_report_file_path), exist_ok=True)
+            with open(self.model_stacking_config.stacking_report_file_path, 'w') as file_obj:
+                json.dump(stacking_report, file_obj, indent=2)
+            logging.info(f"Stacked {members}: test R2 {test_r2:.4f} vs best single "
+                         f"{stacking_report['best_single_test_r2']:.4f}")
+
+            return stacked_model, stacking_report
+        except Exception as e:
+            raise CustomException(e, sys)
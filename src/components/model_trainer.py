@@ -1,95 +1,390 @@
 import os
 import sys
+import json
+import time
+from datetime import datetime
 from dataclasses import dataclass
 
-from catboost import CatBoostRegressor
-from sklearn.ensemble import AdaBoostRegressor, GradientBoostingRegressor, RandomForestRegressor
-from sklearn.linear_model import LinearRegression
-from sklearn.neighbors import KNeighborsRegressor
-from sklearn.tree import DecisionTreeRegressor
-from xgboost import XGBRegressor
+import numpy as np
 
 from src.exception import CustomException
 from src.logger import logging
-from src.utils import save_object, evaluate_models
+from src.resources import plan_threads, apply_thread_plan, ProcessTreeMonitor
+from src.utils import save_object, load_object, evaluate_models, get_model_costs, select_best_model
 
 @dataclass
 class ModelTrainerConfig:
     trained_model_file_path = os.path.join('artifacts', 'model.pkl')
+    # Trees / boosting rounds added per incremental run to models that can continue training
+    warm_start_estimators = 32
+    # Parallel workers for the hyperparameter search; they share one memory-mapped copy of X_train.
+    # None lets plan_threads split cpu_budget per model between search workers and library threads.
+    search_n_jobs = None
+    # CPUs the search may use, None for every CPU in the process affinity mask
+    cpu_budget = None
+    xgboost_tree_method = 'hist'
+    model_metrics_file_path = os.path.join('artifacts', 'model_metrics.json')
+    # Per-run timings, resource usage and search results; compare two with src.pipeline.run_report
+    run_report_file_path = os.path.join('artifacts', 'run_report.json')
+    # 'r2' picks the highest test R2; 'budget' the highest R2 within the latency/size budget;
+    # 'pareto' the cheapest Pareto-optimal model within r2_tolerance of the best R2
+    selection_mode = 'r2'
+    max_latency_ms = None
+    max_size_bytes = None
+    r2_tolerance = 0.005
+    # Blend the search winners from their out-of-fold predictions and offer the blend to
+    # select_best_model as one more candidate, 'Stacked Ensemble', under selection_mode
+    stacking = False
+
+class MultiTargetRegressor:
+    '''
+    One fitted regressor per target, all over the same preprocessed features, so a request
+    is transformed once and every target predicted from the result. predict returns one
+    column per target, in target_names order.
+    '''
+    def __init__(self, target_names, models):
+        self.target_names = list(target_names)
+        self.models = list(models)
+
+    def predict(self, X):
+        return np.column_stack([model.predict(X) for model in self.models])
 
 class ModelTrainer:
     def __init__(self):
         self.model_trainer_config = ModelTrainerConfig()
 
-    def initiate_model_trainer(self, train_array, test_array):
+    def write_run_report(self, run_started_at, wall_s, usage, search_details, model_metrics,
+                         best_model_name, n_train_rows, run_type='full'):
+        '''
+        Machine-readable record of a training run: the data it was trained on, where the
+        time and memory went per model and per search candidate, and the final choice.
+        usage is a ProcessTreeMonitor's usage over the run. Incremental runs have no search,
+        so their models list no candidates.
+        '''
+        from src.components.data_ingestion import DataIngestionConfig
+
+        manifest_path = DataIngestionConfig().manifest_path
+        data_fingerprint = None
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as file_obj:
+                data_fingerprint = json.load(file_obj).get('fingerprint')
+
+        run_report = {
+            'run_type': run_type,
+            'started_at': run_started_at,
+            'data_fingerprint': data_fingerprint,
+            'n_train_rows': n_train_rows,
+            'cpu_budget': self.model_trainer_config.cpu_budget,
+            'search_n_jobs': self.model_trainer_config.search_n_jobs,
+            'wall_s': wall_s,
+            'cpu_s': usage['cpu_s'],
+            'peak_rss_mb': usage['peak_rss_mb'],
+            'selection_mode': self.model_trainer_config.selection_mode,
+            'selected_model': best_model_name,
+            'models': {
+                name: {**details, **model_metrics.get(name, {})} for name, details in search_details.items()
+            },
+        }
+        os.makedirs(os.path.dirname(self.model_trainer_config.run_report_file_path), exist_ok=True)
+        with open(self.model_trainer_config.run_report_file_path, 'w') as file_obj:
+            json.dump(run_report, file_obj, indent=2)
+        logging.info(f'Run report written to {self.model_trainer_config.run_report_file_path}')
+        return run_report
+
+    def get_models_and_params(self):
+        '''
+        Fresh candidate models and their search grids; the search fits the models in place,
+        so each target gets its own set
+        '''
+        # Estimator libraries are imported here rather than at module load so that importing
+        # the package (CLI, job runner, serving) does not pay for catboost/xgboost start-up
+        from catboost import CatBoostRegressor
+        from sklearn.ensemble import AdaBoostRegressor, GradientBoostingRegressor, RandomForestRegressor
+        from sklearn.linear_model import LinearRegression
+        from sklearn.tree import DecisionTreeRegressor
+        from xgboost import XGBRegressor
+
+        models = {
+            "Random Forest": RandomForestRegressor(),
+            "Decision Tree": DecisionTreeRegressor(),
+            "Gradient Boosting": GradientBoostingRegressor(),
+            "Linear Regression": LinearRegression(),
+            "XGBRegressor": XGBRegressor(tree_method=self.model_trainer_config.xgboost_tree_method),
+            "CatBoosting Regressor": CatBoostRegressor(verbose=False),
+            "AdaBoost Regressor": AdaBoostRegressor()
+        }
+        params = {
+            "Random Forest": {
+                'n_estimators': [8, 16, 32, 64, 128, 256],
+                # 'max_features': ['log2', 'sqrt'],
+                # 'max_depth': [4, 8, 16, 32, 64, 128, 256],
+                # 'min_samples_split': [2, 5, 10],
+                # 'min_samples_leaf': [1, 2, 4, 8, 16, 32, 64, 128, 256],
+            },
+            "Decision Tree": {
+                'criterion': ['squared_error', 'friedman_mse', 'absolute_error', 'poisson'],
+                # 'splitter': ['best', 'random'],
+                # 'max_depth': [4, 8, 16, 32, 64, 128, 256],
+                # 'min_samples_split': [2, 5, 10],
+                # 'min_samples_leaf': [1, 2, 4, 8, 16, 32, 64, 128, 256],
+            },
+            "Gradient Boosting": {
+                'n_estimators': [8, 16, 32, 64, 128, 256],
+                'learning_rate': [0.0001, 0.001, 0.01, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0],
+                'subsample':[0.6, 0.7, 0.75, 0.8, 0.85, 0.9],
+            },
+            "Linear Regression":{},
+            "XGBRegressor":{
+                'learning_rate':[.1,.01,.05,.001],
+                'n_estimators': [8,16,32,64,128,256]
+            },
+            "CatBoosting Regressor":{
+                'depth': [6,8,10],
+                'learning_rate': [0.01, 0.05, 0.1],
+                'iterations': [30, 50, 100]
+            },
+            "AdaBoost Regressor":{
+                'learning_rate':[.1,.01,0.5,.001],
+                # 'loss':['linear','square','exponential'],
+                'n_estimators': [8,16,32,64,128,256]
+            }
+        }
+        return models, params
+
+    def search_target(self, X_train, y_train, X_test, y_test, stacking_report_file_path=None):
+        '''
+        Runs the model search for one target and picks the model to ship. Returns the chosen
+        name, model and test R2 with the per-model metrics and search details.
+        '''
+        models, params = self.get_models_and_params()
+        thread_plans = None
+        if self.model_trainer_config.search_n_jobs is None:
+            thread_plans = {
+                name: plan_threads(model, params[name], n_splits=3,
+                                   cpu_budget=self.model_trainer_config.cpu_budget)
+                for name, model in models.items()
+            }
+            for name, plan in thread_plans.items():
+                apply_thread_plan(models[name], plan)
+
+        search_details = {}
+        evaluation = evaluate_models(X_train, y_train, X_test, y_test, models, params,
+                                     n_jobs=self.model_trainer_config.search_n_jobs,
+                                     thread_plans=thread_plans,
+                                     return_oof=self.model_trainer_config.stacking,
+                                     search_details=search_details)
+        model_report, oof_predictions = (
+            evaluation if self.model_trainer_config.stacking else (evaluation, None)
+        )
+        # model_report: dict = evaluate_models(X_train, y_train, X_test, y_test, models)
+        model_costs = get_model_costs(models, X_test)
+        model_metrics = {
+            name: {'r2': score, **model_costs[name]} for name, score in model_report.items()
+        }
+
+        if oof_predictions is not None:
+            from src.components.model_stacking import ModelStacking
+
+            model_stacking = ModelStacking()
+            if stacking_report_file_path is not None:
+                model_stacking.model_stacking_config.stacking_report_file_path = stacking_report_file_path
+            stacked_model, stacking_report = model_stacking.initiate_model_stacking(
+                oof_predictions, y_train, X_test, y_test, models, model_metrics
+            )
+            logging.info(f"Stacking: {len(stacking_report['members'])} members, test R2 {stacking_report['test_r2']}")
+            # A single surviving member is just a recalibrated model, not a blend
+            if len(stacking_report['members']) > 1:
+                models['Stacked Ensemble'] = stacked_model
+                model_report['Stacked Ensemble'] = stacking_report['test_r2']
+                model_metrics['Stacked Ensemble'] = {
+                    'r2': stacking_report['test_r2'],
+                    'single_row_latency_ms': stacking_report['single_row_latency_ms'],
+                    'batch_latency_ms_per_row': stacking_report['batch_latency_ms_per_row'],
+                    'size_bytes': stacking_report['size_bytes'],
+                }
+
+        best_model_name = select_best_model(
+            model_metrics,
+            selection_mode=self.model_trainer_config.selection_mode,
+            max_latency_ms=self.model_trainer_config.max_latency_ms,
+            max_size_bytes=self.model_trainer_config.max_size_bytes,
+            r2_tolerance=self.model_trainer_config.r2_tolerance
+        )
+        best_model_score = model_report[best_model_name]
+        best_model = models[best_model_name]
+        print(model_report)
+        return best_model_name, best_model, best_model_score, model_metrics, search_details
+
+    def initiate_model_trainer(self, train_array, test_array, target_columns=None):
+        '''
+        Searches models for each target column (the last len(target_columns) columns of the
+        arrays, DataTransformationConfig.target_columns by default) and saves the result.
+        With several targets each gets its own search over the same features and the saved
+        model is a MultiTargetRegressor; metrics and run report entries are keyed
+        '<target>/<model name>'.
+        '''
         try:
+            if target_columns is None:
+                from src.components.data_transformation import DataTransformationConfig
+
+                target_columns = DataTransformationConfig.target_columns
+            n_targets = len(target_columns)
+            run_started_at = datetime.now().isoformat(timespec='seconds')
+            run_start_time = time.time()
             logging.info('Splitting training and test input data')
-            X_train, y_train, X_test, y_test = (
-                train_array[:, :-1],    # All rows, all columns EXCEPT the last one
-                train_array[:, -1],     # All rows, ONLY the last column
-                test_array[:, :-1],     # All rows, all columns EXCEPT the last one  
-                test_array[:, -1]       # All rows, ONLY the last column
+            X_train, Y_train, X_test, Y_test = (
+                train_array[:, :-n_targets],    # All rows, all columns EXCEPT the target columns
+                train_array[:, -n_targets:],    # All rows, ONLY the target columns
+                test_array[:, :-n_targets],
+                test_array[:, -n_targets:]
             )
-            models = {
-                "Random Forest": RandomForestRegressor(),
-                "Decision Tree": DecisionTreeRegressor(),
-                "Gradient Boosting": GradientBoostingRegressor(),
-                "Linear Regression": LinearRegression(),
-                "XGBRegressor": XGBRegressor(),
-                "CatBoosting Regressor": CatBoostRegressor(verbose=False),
-                "AdaBoost Regressor": AdaBoostRegressor()
-            }
-            params = {
-                "Random Forest": {
-                    'n_estimators': [8, 16, 32, 64, 128, 256],
-                    # 'max_features': ['log2', 'sqrt'],
-                    # 'max_depth': [4, 8, 16, 32, 64, 128, 256],
-                    # 'min_samples_split': [2, 5, 10],
-                    # 'min_samples_leaf': [1, 2, 4, 8, 16, 32, 64, 128, 256],
-                },
-                "Decision Tree": {
-                    'criterion': ['squared_error', 'friedman_mse', 'absolute_error', 'poisson'],
-                    # 'splitter': ['best', 'random'],
-                    # 'max_depth': [4, 8, 16, 32, 64, 128, 256],
-                    # 'min_samples_split': [2, 5, 10],
-                    # 'min_samples_leaf': [1, 2, 4, 8, 16, 32, 64, 128, 256],
-                },
-                "Gradient Boosting": {
-                    'n_estimators': [8, 16, 32, 64, 128, 256],
-                    'learning_rate': [0.0001, 0.001, 0.01, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0],
-                    'subsample':[0.6, 0.7, 0.75, 0.8, 0.85, 0.9],
-                },
-                "Linear Regression":{},
-                "XGBRegressor":{
-                    'learning_rate':[.1,.01,.05,.001],
-                    'n_estimators': [8,16,32,64,128,256]
-                },
-                "CatBoosting Regressor":{
-                    'depth': [6,8,10],
-                    'learning_rate': [0.01, 0.05, 0.1],
-                    'iterations': [30, 50, 100]
-                },
-                "AdaBoost Regressor":{
-                    'learning_rate':[.1,.01,0.5,.001],
-                    # 'loss':['linear','square','exponential'],
-                    'n_estimators': [8,16,32,64,128,256]
-                }
-            }
-            model_report: dict = evaluate_models(X_train, y_train, X_test, y_test, models, params)
-            # model_report: dict = evaluate_models(X_train, y_train, X_test, y_test, models)
-            best_model_score = max(sorted(model_report.values()))
-            best_model_name = list(model_report.keys())[
-                list(model_report.values()).index(best_model_score)
-            ]
-            best_model = models[best_model_name]
-            print(model_report)
-            print(f'Best Model Found, Model Name: {best_model_name}, R2 Score: {best_model_score}')
+
+            with ProcessTreeMonitor() as run_monitor:
+                if n_targets == 1:
+                    best_model_name, best_model, best_model_score, model_metrics, search_details = self.search_target(
+                        X_train, Y_train[:, 0], X_test, Y_test[:, 0]
+                    )
+                else:
+                    model_metrics, search_details, best_models, best_names, best_model_score = {}, {}, [], [], {}
+                    stacking_report_dir = os.path.dirname(self.model_trainer_config.run_report_file_path)
+                    for index, target in enumerate(target_columns):
+                        logging.info(f'Model search for target {target}')
+                        target_name, target_model, target_score, target_metrics, target_details = self.search_target(
+                            X_train, Y_train[:, index], X_test, Y_test[:, index],
+                            stacking_report_file_path=os.path.join(stacking_report_dir, f'stacking_report_{target}.json')
+                        )
+                        model_metrics.update({f'{target}/{name}': metrics for name, metrics in target_metrics.items()})
+                        search_details.update({f'{target}/{name}': details for name, details in target_details.items()})
+                        best_models.append(target_model)
+                        best_names.append(f'{target}: {target_name}')
+                        best_model_score[target] = target_score
+                    best_model_name = ', '.join(best_names)
+                    best_model = MultiTargetRegressor(target_columns, best_models)
+
+            os.makedirs(os.path.dirname(self.model_trainer_config.model_metrics_file_path), exist_ok=True)
+            with open(self.model_trainer_config.model_metrics_file_path, 'w') as file_obj:
+                json.dump(model_metrics, file_obj, indent=2)
+
+            print(f'Best Model Found, Model Name: {best_model_name}, R2 Score: {best_model_score}, '
+                  f'Selection Mode: {self.model_trainer_config.selection_mode}')
             save_object(
                 file_path=self.model_trainer_config.trained_model_file_path,
                 obj=best_model
             )
             logging.info(f'Best Model saved as {best_model_name}')
 
+            self.write_run_report(run_started_at, time.time() - run_start_time, run_monitor.usage, search_details,
+                                  model_metrics, best_model_name, len(X_train))
+
             return best_model_name
         except Exception as e:
-            raise CustomException(e, sys)
\ No newline at end of file
+            raise CustomException(e, sys)
+
+    def continue_training(self, model, X_train, y_train):
+        '''
+        Continues training one fitted model on the current training rows and returns it
+        '''
+        model_name = type(model).__name__
+        extra_estimators = self.model_trainer_config.warm_start_estimators
+
+        # Dispatch on the class name so the estimator libraries are only imported by unpickling
+        if model_name in ('GradientBoostingRegressor', 'RandomForestRegressor'):
+            model.set_params(warm_start=True, n_estimators=model.n_estimators + extra_estimators)
+            model.fit(X_train, y_train)
+        elif model_name == 'XGBRegressor':
+            model.set_params(n_estimators=extra_estimators)
+            model.fit(X_train, y_train, xgb_model=model.get_booster())
+        elif model_name == 'CatBoostRegressor':
+            init_model = model
+            model = type(init_model)(**{**init_model.get_params(), 'iterations': extra_estimators})
+            model.fit(X_train, y_train, init_model=init_model)
+        else:
+            model.fit(X_train, y_train)
+        return model
+
+    def continue_training_with_details(self, model, X_train, y_train, X_test, y_test):
+        '''
+        continue_training plus the run report entry for the model: test R2, wall time and
+        the CPU time and peak RSS of the fit
+        '''
+        try:
+            from sklearn.metrics import r2_score
+
+            start_time = time.time()
+            with ProcessTreeMonitor() as monitor:
+                model = self.continue_training(model, X_train, y_train)
+            fit_wall_s = time.time() - start_time
+            test_r2 = r2_score(y_test, model.predict(X_test))
+            return model, {
+                'test_r2': test_r2,
+                'wall_s': time.time() - start_time,
+                'fit_wall_s': fit_wall_s,
+                'cpu_s': monitor.usage['cpu_s'],
+                'peak_rss_mb': monitor.usage['peak_rss_mb'],
+                'processes': monitor.usage['processes'],
+                'candidates': [],
+            }
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def initiate_incremental_model_trainer(self, train_array, test_array):
+        '''
+        Continues training the saved model instead of rerunning the search: ensembles grow
+        extra trees via warm_start, XGBoost and CatBoost continue boosting from the saved
+        booster, and the remaining models are cheap enough to simply refit. Each model of a
+        MultiTargetRegressor is continued on its own target column. Writes a run report
+        with run_type 'incremental'.
+        '''
+        try:
+            from sklearn.metrics import r2_score
+
+            run_started_at = datetime.now().isoformat(timespec='seconds')
+            run_start_time = time.time()
+            model = load_object(file_path=self.model_trainer_config.trained_model_file_path)
+            n_targets = len(model.target_names) if isinstance(model, MultiTargetRegressor) else 1
+            logging.info('Splitting training and test input data')
+            X_train, Y_train, X_test, Y_test = (
+                train_array[:, :-n_targets],
+                train_array[:, -n_targets:],
+                test_array[:, :-n_targets],
+                test_array[:, -n_targets:]
+            )
+
+            search_details = {}
+            with ProcessTreeMonitor() as run_monitor:
+                if isinstance(model, MultiTargetRegressor):
+                    members = []
+                    for index, (target, member) in enumerate(zip(model.target_names, model.models)):
+                        member, details = self.continue_training_with_details(
+                            member, X_train, Y_train[:, index], X_test, Y_test[:, index]
+                        )
+                        members.append(member)
+                        search_details[f'{target}/{type(member).__name__}'] = details
+                    model.models = members
+                    model_name = ', '.join(
+                        f'{target}: {type(member).__name__}' for target, member in zip(model.target_names, model.models)
+                    )
+                    model_score = r2_score(Y_test, model.predict(X_test))
+                else:
+                    model, details = self.continue_training_with_details(
+                        model, X_train, Y_train[:, 0], X_test, Y_test[:, 0]
+                    )
+                    model_name = type(model).__name__
+                    model_score = details['test_r2']
+                    search_details[model_name] = details
+            logging.info(f'Incremental training of {model_name} completed')
+
+            print(f'Incrementally Trained Model, Model Name: {model_name}, R2 Score: {model_score}')
+            save_object(
+                file_path=self.model_trainer_config.trained_model_file_path,
+                obj=model
+            )
+            logging.info(f'Incrementally trained model saved as {model_name}')
+
+            self.write_run_report(run_started_at, time.time() - run_start_time, run_monitor.usage, search_details,
+                                  {name: {'r2': details['test_r2']} for name, details in search_details.items()},
+                                  model_name, len(X_train), run_type='incremental')
+
+            return model_name
+        except Exception as e:
+            raise CustomException(e, sys)
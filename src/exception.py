@@ -1,17 +1,70 @@
 import sys
 
+def format_error_message(file_name, line_number, error):
+    return "Error occurred in Python script name [{0}] line number [{1}] error message [{2}]".format(
+        file_name, line_number, str(error)
+    )
+
 def error_message_detail(error, error_detail:sys):
     _,_,exc_tb = error_detail.exc_info()
     file_name = exc_tb.tb_frame.f_code.co_filename
-    error_message = "Error occurred in Python script name [{0}] line number [{1}] error message [{2}]".format(
-        file_name, exc_tb.tb_lineno, str(error)
-    )
-    return error_message
+    return format_error_message(file_name, exc_tb.tb_lineno, error)
 
 class CustomException(Exception):
-    def __init__(self, error_message, error_detail:sys):
+    '''
+    Records where an error was caught (stage, file, line) and formats the message only
+    when it is read. Wrapping a CustomException again returns the same instance, so an
+    error re-raised through load_object -> predict -> app keeps its first location and
+    its original cause instead of nesting one message per layer.
+    '''
+    def __new__(cls, error_message=None, error_detail:sys = sys, stage: str = None):
+        if isinstance(error_message, CustomException):
+            return error_message
+        return super().__new__(cls, error_message)
+
+    def __init__(self, error_message=None, error_detail:sys = sys, stage: str = None):
+        if error_message is self:
+            return  # already initialised by the layer that first caught the error
         super().__init__(error_message)
-        self.error_message = error_message_detail(error_message, error_detail=error_detail)
-    
+        self.error = error_message
+        _,_,exc_tb = error_detail.exc_info()
+        if exc_tb is not None:
+            code = exc_tb.tb_frame.f_code
+            self.file_name, self.line_number = code.co_filename, exc_tb.tb_lineno
+            self.stage = stage or code.co_name
+        else:
+            self.file_name = self.line_number = None
+            self.stage = stage
+        if isinstance(error_message, BaseException):
+            self.__cause__ = error_message
+        self._error_message = None
+
+    @property
+    def error_message(self):
+        if self._error_message is None:
+            self._error_message = format_error_message(self.file_name, self.line_number, self.error)
+        return self._error_message
+
+    def to_dict(self):
+        '''
+        Structured fields for logging, e.g. logging.error(str(e), extra=e.to_dict())
+        '''
+        return {
+            'stage': self.stage,
+            'file_name': self.file_name,
+            'line_number': self.line_number,
+            'error_type': type(self.error).__name__,
+            'error': str(self.error),
+        }
+
+    def __reduce__(self):
+        # Rebuilt field by field: unpickling (e.g. from a joblib worker) has no traceback
+        return _rebuild_custom_exception, (self.error, self.stage, self.file_name, self.line_number)
+
     def __str__(self):
         return self.error_message
+
+def _rebuild_custom_exception(error, stage, file_name, line_number):
+    exception = CustomException(error, stage=stage)
+    exception.file_name, exception.line_number = file_name, line_number
+    return exception
@@ -0,0 +1,201 @@
+import os
+import sys
+import math
+import threading
+from dataclasses import dataclass
+
+from src.exception import CustomException
+from src.logger import logging
+from src.sketches import QuantileSketch
+from src.utils import load_object
+
+@dataclass
+class DriftMonitorConfig:
+    # Per-column value counts saved by DataTransformation when the preprocessor was fitted
+    reference_stats_file_path = os.path.join('artifacts', 'preprocessor_stats.pkl')
+    # Drift is computed over tumbling windows of this many observed rows
+    window_size = 1000
+    # Equal-width score histogram bins over SCORE_RANGE
+    n_score_bins = 10
+    score_range = (0, 100)
+    # Scores are buffered and folded into the quantile sketch this many at a time
+    quantile_buffer_size = 256
+    # Population stability index above which a column counts as drifted (0.1 slight, 0.25 major)
+    psi_threshold = 0.2
+
+def population_stability_index(reference: list, current: list, epsilon: float = 1e-4) -> float:
+    '''
+    PSI between two histograms over the same bins: sum of (p - q) * ln(p / q) over bins,
+    with empty bins floored at epsilon
+    '''
+    reference_total, current_total = sum(reference) or 1, sum(current) or 1
+    psi = 0.0
+    for reference_count, current_count in zip(reference, current):
+        p = max(current_count / current_total, epsilon)
+        q = max(reference_count / reference_total, epsilon)
+        psi += (p - q) * math.log(p / q)
+    return psi
+
+class DriftMonitor:
+    '''
+    Streaming comparison of prediction inputs with the training data. Each observed row
+    costs a few dict increments and a list append: per column, counts over the reference
+    categories (plus one bucket for anything else) and a fixed score histogram, with
+    scores buffered for a quantile sketch. Every window_size rows the window is compared
+    with the reference by population stability index, the result kept as last_report and
+    the window reset, so memory stays fixed however long the process runs.
+    '''
+    def __init__(self, reference_statistics: dict, categorical_columns: list, numerical_columns: list,
+                 config: DriftMonitorConfig = None):
+        self.config = config or DriftMonitorConfig()
+        self.categorical_columns = tuple(categorical_columns)
+        self.numerical_columns = tuple(numerical_columns)
+        low, high = self.config.score_range
+        self.bin_width = (high - low) / self.config.n_score_bins
+        self.lock = threading.Lock()
+
+        # Reference distributions in the same bucket layout as the live window
+        self.reference_categories = {
+            column: sorted(reference_statistics[column]) for column in self.categorical_columns
+        }
+        self.reference_histograms = {
+            column: self._reference_categorical(reference_statistics[column], column)
+            for column in self.categorical_columns
+        }
+        self.reference_quantiles = {}
+        for column in self.numerical_columns:
+            histogram = [0] * (self.config.n_score_bins + 1)  # last bin counts missing scores
+            for value, count in reference_statistics[column].items():
+                histogram[self._score_bin(value)] += count
+            self.reference_histograms[column] = histogram
+            sketch = QuantileSketch()
+            sketch.centroids.update(reference_statistics[column])
+            sketch.count = sum(reference_statistics[column].values())
+            self.reference_quantiles[column] = self._quantiles(sketch)
+
+        self.windows_checked = 0
+        self.last_report = None
+        self._reset_window()
+
+    @classmethod
+    def from_artifacts(cls, config: DriftMonitorConfig = None):
+        '''
+        Monitor against the statistics saved with the preprocessor, or None if there are none
+        '''
+        from src.pipeline.predict_pipeline import PredictPipeline
+
+        config = config or DriftMonitorConfig()
+        if not os.path.exists(config.reference_stats_file_path):
+            return None
+        try:
+            statistics = load_object(file_path=config.reference_stats_file_path)
+            schema = PredictPipeline().get_request_schema()
+            categorical_columns = [column for column, _ in schema.categorical_fields]
+            return cls(statistics, categorical_columns, list(schema.numerical_fields), config)
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def _reference_categorical(self, counts, column):
+        return [counts[value] for value in self.reference_categories[column]] + [0]
+
+    def _score_bin(self, value) -> int:
+        if value is None or value != value:  # missing, or NaN from the schema
+            return self.config.n_score_bins
+        low, _ = self.config.score_range
+        return min(max(int((value - low) / self.bin_width), 0), self.config.n_score_bins - 1)
+
+    def _reset_window(self):
+        self.category_counts = {
+            column: dict.fromkeys(self.reference_categories[column], 0) for column in self.categorical_columns
+        }
+        self.other_counts = dict.fromkeys(self.categorical_columns, 0)
+        self.score_histograms = {column: [0] * (self.config.n_score_bins + 1) for column in self.numerical_columns}
+        self.score_sketches = {column: QuantileSketch() for column in self.numerical_columns}
+        self.score_buffers = {column: [] for column in self.numerical_columns}
+        self.window_rows = 0
+
+    def observe(self, record: dict):
+        '''
+        Adds one validated request record; called on the prediction path
+        '''
+        with self.lock:
+            for column in self.categorical_columns:
+                counts = self.category_counts[column]
+                value = record.get(column)
+                if value in counts:
+                    counts[value] += 1
+                else:
+                    self.other_counts[column] += 1
+            for column in self.numerical_columns:
+                value = record.get(column)
+                self.score_histograms[column][self._score_bin(value)] += 1
+                if value is not None and value == value:
+                    buffer = self.score_buffers[column]
+                    buffer.append(value)
+                    if len(buffer) >= self.config.quantile_buffer_size:
+                        self.score_sketches[column].update(buffer)
+                        buffer.clear()
+            self.window_rows += 1
+            if self.window_rows >= self.config.window_size:
+                self._check_window()
+
+    def observe_columns(self, columns: dict):
+        '''
+        Adds a validated batch in the column-oriented form returned by validate_many
+        '''
+        n_rows = len(next(iter(columns.values()))) if columns else 0
+        for index in range(n_rows):
+            self.observe({column: values[index] for column, values in columns.items()})
+
+    def _quantiles(self, sketch: QuantileSketch) -> dict:
+        if not sketch.count:
+            return None
+        return {'p10': sketch.quantile(0.1), 'p50': sketch.quantile(0.5), 'p90': sketch.quantile(0.9)}
+
+    def _window_report(self) -> dict:
+        columns = {}
+        for column in self.categorical_columns:
+            current = [self.category_counts[column][value] for value in self.reference_categories[column]]
+            current.append(self.other_counts[column])
+            columns[column] = {
+                'psi': population_stability_index(self.reference_histograms[column], current),
+                'unseen': self.other_counts[column],
+            }
+        for column in self.numerical_columns:
+            sketch = self.score_sketches[column]
+            if self.score_buffers[column]:
+                sketch.update(self.score_buffers[column])
+                self.score_buffers[column].clear()
+            columns[column] = {
+                'psi': population_stability_index(self.reference_histograms[column], self.score_histograms[column]),
+                'quantiles': self._quantiles(sketch),
+                'reference_quantiles': self.reference_quantiles[column],
+            }
+        drift_score = max((column['psi'] for column in columns.values()), default=0.0)
+        return {
+            'rows': self.window_rows,
+            'drift_score': drift_score,
+            'drifted': drift_score > self.config.psi_threshold,
+            'drifted_columns': [name for name, column in columns.items() if column['psi'] > self.config.psi_threshold],
+            'columns': columns,
+        }
+
+    def _check_window(self):
+        report = self._window_report()
+        self.windows_checked += 1
+        report['window'] = self.windows_checked
+        self.last_report = report
+        if report['drifted']:
+            logging.info(f"Input drift detected (score {report['drift_score']:.3f}) in {report['drifted_columns']}")
+        self._reset_window()
+
+    def get_report(self) -> dict:
+        '''
+        The last completed window's report, plus the partial current window
+        '''
+        try:
+            with self.lock:
+                current = self._window_report() if self.window_rows else None
+                return {'last_window': self.last_report, 'current_window': current}
+        except Exception as e:
+            raise CustomException(e, sys)
@@ -0,0 +1,298 @@
+import os
+import sys
+import json
+import time
+import uuid
+import shutil
+import argparse
+import multiprocessing
+from datetime import datetime
+from dataclasses import dataclass, field
+from typing import List
+
+from src.exception import CustomException
+from src.logger import logging
+
+@dataclass
+class JobRunnerConfig:
+    # One JSON record and log per job, plus a workspace directory the job trains in, removed
+    # when the job finishes
+    jobs_dir: str = os.path.join('artifacts', 'jobs')
+    # Live artifacts directory a successful job copies its training state into
+    artifacts_dir: str = 'artifacts'
+    # Bundle directory the model manager serves from, see PredictPipelineConfig.bundle_dir
+    bundle_dir: str = os.path.join('artifacts', 'models')
+    # Directory DataIngestion reads the source data from, linked into each job's workspace
+    source_data_dir: str = 'notebook'
+    # CPUs the training process is pinned to, None to leave the affinity mask alone
+    cpu_affinity: List[int] = None
+    # Niceness added to the training process so serving keeps priority on shared CPUs
+    nice: int = 10
+    poll_interval_s: float = 1.0
+    # Files a job copies from the live artifacts into its workspace before training, so that
+    # incremental runs and the unchanged-data skip see the current state
+    workspace_seed_files: List[str] = field(default_factory=lambda: [
+        'train.csv', 'test.csv', 'data.csv', 'appended_data.csv', 'data_manifest.json', 'preprocessor.pkl',
+        'preprocessor_stats.pkl', 'model.pkl', 'incremental_state.pkl',
+    ])
+
+def _write_json(file_path: str, obj: dict):
+    # Written next to the target and renamed over it so readers never see a partial record
+    temp_path = f'{file_path}.{os.getpid()}.tmp'
+    with open(temp_path, 'w') as file_obj:
+        json.dump(obj, file_obj, indent=2)
+    os.replace(temp_path, file_path)
+
+def _run_job_process(job: dict, workspace: str, config: JobRunnerConfig):
+    '''
+    Entry point of the training process: lowers its priority, pins it to the configured
+    CPUs, then runs the training pipeline inside the job's workspace
+    '''
+    if config.nice:
+        os.nice(config.nice)
+    if config.cpu_affinity and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, config.cpu_affinity)
+
+    log_path = os.path.join(workspace, '..', 'job.log')
+    with open(log_path, 'a') as log_file:
+        os.dup2(log_file.fileno(), sys.stdout.fileno())
+        os.dup2(log_file.fileno(), sys.stderr.fileno())
+    os.chdir(workspace)
+
+    from src.pipeline.train_pipeline import TrainPipeline, TrainPipelineConfig
+
+    options = job['options']
+    # Published by the runner once the job has succeeded, not from inside the workspace
+    pipeline = TrainPipeline(TrainPipelineConfig(distill=options.get('distill', False),
+                                                 target_columns=options.get('targets'), publish=False))
+    if options.get('incremental'):
+        model_name = pipeline.run_incremental(options['incremental'])
+    else:
+        model_name = pipeline.run(force=options.get('force', False))
+    _write_json(os.path.join(workspace, '..', 'result.json'), {'model_name': model_name})
+
+class JobRunner:
+    '''
+    Local training job queue kept as files under jobs_dir, so the web process can submit,
+    inspect and cancel jobs while a separate worker process (run_worker) executes them.
+    Each job trains in its own workspace in a child process with a lower priority and its
+    own CPU affinity, and only a successful job publishes its model, as a new bundle
+    version that the model manager switches to in one step.
+    '''
+    def __init__(self, config: JobRunnerConfig = None):
+        self.job_runner_config = config or JobRunnerConfig()
+        os.makedirs(self.job_runner_config.jobs_dir, exist_ok=True)
+
+    def _job_path(self, job_id: str, name: str = 'job.json') -> str:
+        if not job_id or os.sep in job_id or job_id.startswith('.'):
+            raise KeyError(job_id)
+        return os.path.join(self.job_runner_config.jobs_dir, job_id, name)
+
+    def submit(self, force: bool = False, incremental: str = None, distill: bool = False,
+               publish_as: str = None, targets: List[str] = None) -> str:
+        '''
+        Queues a training run and returns its job id. incremental is the path of a CSV of new
+        rows; publish_as publishes the result as a named model bundle instead of replacing
+        the default model (e.g. a candidate for shadow evaluation); targets overrides the
+        scores to predict.
+        '''
+        try:
+            job_id = datetime.now().strftime('%Y%m%d%H%M%S') + '-' + uuid.uuid4().hex[:8]
+            job = {
+                'job_id': job_id,
+                'status': 'queued',
+                'submitted_at': datetime.now().isoformat(timespec='seconds'),
+                'options': {
+                    'force': force,
+                    'incremental': os.path.abspath(incremental) if incremental else None,
+                    'distill': distill,
+                    'publish_as': publish_as,
+                    'targets': list(targets) if targets else None,
+                },
+            }
+            os.makedirs(os.path.dirname(self._job_path(job_id)))
+            _write_json(self._job_path(job_id), job)
+            logging.info(f'Training job {job_id} queued')
+            return job_id
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def status(self, job_id: str) -> dict:
+        '''
+        The job's record, or None for an unknown job id
+        '''
+        try:
+            with open(self._job_path(job_id)) as file_obj:
+                job = json.load(file_obj)
+        except (KeyError, FileNotFoundError):
+            return None
+        job['cancel_requested'] = os.path.exists(self._job_path(job_id, 'cancel'))
+        return job
+
+    def list_jobs(self) -> list:
+        return [
+            job for job in (self.status(job_id) for job_id in sorted(os.listdir(self.job_runner_config.jobs_dir)))
+            if job is not None
+        ]
+
+    def cancel(self, job_id: str) -> bool:
+        '''
+        Asks for a queued or running job to be cancelled; the worker skips it or terminates
+        its training process. Returns False if the job is unknown or already finished.
+        '''
+        job = self.status(job_id)
+        if job is None or job['status'] not in ('queued', 'running'):
+            return False
+        open(self._job_path(job_id, 'cancel'), 'a').close()
+        logging.info(f'Cancellation requested for training job {job_id}')
+        return True
+
+    def _update(self, job: dict, **changes) -> dict:
+        job.update(changes)
+        _write_json(self._job_path(job['job_id']), {k: v for k, v in job.items() if k != 'cancel_requested'})
+        return job
+
+    def _claim_next(self):
+        for job in self.list_jobs():
+            if job['status'] != 'queued':
+                continue
+            try:
+                # The claim file makes the hand-off safe with several workers on one jobs_dir
+                os.close(os.open(self._job_path(job['job_id'], 'claim'), os.O_CREAT | os.O_EXCL))
+            except FileExistsError:
+                continue
+            if job['cancel_requested']:
+                self._update(job, status='cancelled', finished_at=datetime.now().isoformat(timespec='seconds'))
+                continue
+            return job
+        return None
+
+    def _prepare_workspace(self, job: dict) -> str:
+        config = self.job_runner_config
+        workspace = os.path.abspath(self._job_path(job['job_id'], 'workspace'))
+        os.makedirs(os.path.join(workspace, 'artifacts'), exist_ok=True)
+        for name in config.workspace_seed_files:
+            source = os.path.join(config.artifacts_dir, name)
+            if os.path.exists(source):
+                shutil.copy2(source, os.path.join(workspace, 'artifacts', name))
+        # Ingestion reads the source data relative to the working directory
+        source_link = os.path.join(workspace, 'notebook')
+        if not os.path.exists(source_link):
+            os.symlink(os.path.abspath(config.source_data_dir), source_link)
+        return workspace
+
+    def _remove_workspace(self, job: dict, workspace: str):
+        # Only job.json, job.log and result.json outlive the job; the notebook symlink is
+        # removed without touching the source data it points to
+        shutil.rmtree(workspace, ignore_errors=True)
+        logging.info(f"Removed workspace of training job {job['job_id']}")
+
+    def _publish(self, job: dict, workspace: str) -> dict:
+        from src.pipeline.predict_pipeline import PredictPipelineConfig, publish_model_bundle
+
+        config = self.job_runner_config
+        workspace_artifacts = os.path.join(workspace, 'artifacts')
+        publish_as = job['options'].get('publish_as')
+        files = []
+        if not publish_as:
+            # Training state the next job starts from; serving only reads the bundle below
+            for name in sorted(os.listdir(workspace_artifacts)):
+                source = os.path.join(workspace_artifacts, name)
+                if not os.path.isfile(source):
+                    continue
+                destination = os.path.join(config.artifacts_dir, name)
+                shutil.copy2(source, destination + '.tmp')
+                os.replace(destination + '.tmp', destination)
+                files.append(name)
+
+        model_key = publish_as or PredictPipelineConfig.default_model_key
+        version = publish_model_bundle(model_key, os.path.join(workspace_artifacts, 'preprocessor.pkl'),
+                                       os.path.join(workspace_artifacts, 'model.pkl'), bundle_dir=config.bundle_dir)
+        return {'model_key': model_key, 'version': version, 'files': files}
+
+    def run_job(self, job: dict) -> dict:
+        '''
+        Runs one claimed job in a child process, terminating it if cancellation is requested,
+        and publishes its artifacts if it succeeds. The workspace is removed once the job is
+        published, failed or cancelled, and kept if publishing raises.
+        '''
+        config = self.job_runner_config
+        workspace = self._prepare_workspace(job)
+        process = multiprocessing.Process(target=_run_job_process, args=(job, workspace, config),
+                                          name=f"training-job-{job['job_id']}")
+        process.start()
+        job = self._update(job, status='running', pid=process.pid,
+                           started_at=datetime.now().isoformat(timespec='seconds'))
+        logging.info(f"Training job {job['job_id']} started in process {process.pid}")
+
+        cancelled = False
+        while process.is_alive():
+            process.join(config.poll_interval_s)
+            if process.is_alive() and os.path.exists(self._job_path(job['job_id'], 'cancel')):
+                process.terminate()
+                process.join()
+                cancelled = True
+
+        finished_at = datetime.now().isoformat(timespec='seconds')
+        if cancelled:
+            self._remove_workspace(job, workspace)
+            return self._update(job, status='cancelled', finished_at=finished_at)
+        if process.exitcode != 0:
+            logging.info(f"Training job {job['job_id']} failed with exit code {process.exitcode}")
+            self._remove_workspace(job, workspace)
+            return self._update(job, status='failed', exit_code=process.exitcode, finished_at=finished_at)
+
+        with open(self._job_path(job['job_id'], 'result.json')) as file_obj:
+            result = json.load(file_obj)
+        published = self._publish(job, workspace)
+        self._remove_workspace(job, workspace)
+        logging.info(f"Training job {job['job_id']} succeeded, published {published}")
+        return self._update(job, status='succeeded', model_name=result['model_name'],
+                            published=published, finished_at=finished_at)
+
+    def run_worker(self, once: bool = False):
+        '''
+        Runs queued jobs one at a time, polling for new ones; with once, returns when the
+        queue is empty
+        '''
+        try:
+            while True:
+                job = self._claim_next()
+                if job is not None:
+                    self.run_job(job)
+                elif once:
+                    return
+                else:
+                    time.sleep(self.job_runner_config.poll_interval_s)
+        except Exception as e:
+            raise CustomException(e, sys)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Queue and run training jobs')
+    commands = parser.add_subparsers(dest='command', required=True)
+    worker = commands.add_parser('worker', help='Run queued jobs in this process')
+    worker.add_argument('--once', action='store_true', help='Exit when the queue is empty')
+    worker.add_argument('--cpus', type=int, nargs='+', help='CPUs the training process is pinned to')
+    worker.add_argument('--nice', type=int, default=10, help='Niceness added to the training process')
+    submit = commands.add_parser('submit', help='Queue a training run')
+    submit.add_argument('--force', action='store_true')
+    submit.add_argument('--incremental', metavar='NEW_DATA_CSV')
+    submit.add_argument('--distill', action='store_true')
+    submit.add_argument('--publish-as', metavar='MODEL_KEY', help='Publish as a named model bundle')
+    submit.add_argument('--targets', nargs='+', metavar='COLUMN', help='Scores to predict together')
+    status = commands.add_parser('status', help='Show one job, or all jobs')
+    status.add_argument('job_id', nargs='?')
+    cancel = commands.add_parser('cancel', help='Cancel a queued or running job')
+    cancel.add_argument('job_id')
+    args = parser.parse_args()
+
+    if args.command == 'worker':
+        JobRunner(JobRunnerConfig(cpu_affinity=args.cpus, nice=args.nice)).run_worker(once=args.once)
+    elif args.command == 'submit':
+        print(JobRunner().submit(force=args.force, incremental=args.incremental, distill=args.distill,
+                                 publish_as=args.publish_as, targets=args.targets))
+    elif args.command == 'status':
+        runner = JobRunner()
+        print(json.dumps(runner.status(args.job_id) if args.job_id else runner.list_jobs(), indent=2))
+    else:
+        print(JobRunner().cancel(args.job_id))
@@ -0,0 +1,236 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import List
+
+import numpy as np
+
+from src.exception import CustomException
+from src.logger import logging
+from src.pipeline.request_schema import RequestSchema
+
+@dataclass
+class LoadTestConfig:
+    # '/predictdata' posts one form per request, '/predictbatch' a JSON list of batch_size records
+    endpoint: str = '/predictdata'
+    # Each level is run in turn, so the report shows how latency degrades with concurrency
+    concurrency_levels: List[int] = field(default_factory=lambda: [1, 2, 4, 8])
+    duration_s: float = 10.0
+    batch_size: int = 32
+    # None drives the app through Flask's test client in this process
+    base_url: str = None
+    random_state: int = 42
+    report_file_path: str = os.path.join('artifacts', 'load_test_report.json')
+
+class PayloadGenerator:
+    '''
+    Random CustomData payloads drawn from the request schema: every fitted category and
+    every accepted score. Each worker gets its own generator so draws need no locking.
+    '''
+    def __init__(self, schema: RequestSchema, seed: int):
+        self.rng = random.Random(seed)
+        self.categories = [(column, sorted(allowed)) for column, allowed in schema.categorical_fields]
+        self.numerical_fields = schema.numerical_fields
+        self.score_range = schema.score_range
+
+    def record(self) -> dict:
+        record = {column: self.rng.choice(values) for column, values in self.categories}
+        for column in self.numerical_fields:
+            record[column] = self.rng.randint(*self.score_range)
+        return record
+
+    def records(self, n: int) -> list:
+        return [self.record() for _ in range(n)]
+
+class FlaskClientTransport:
+    '''
+    Sends requests through Flask's test client: no sockets, so it measures the app's own
+    request handling (validation, pandas, preprocessing, predict) under the GIL
+    '''
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def post(self, path: str, form: dict = None, json_body=None) -> int:
+        if json_body is not None:
+            return self.client.post(path, json=json_body).status_code
+        return self.client.post(path, data=form).status_code
+
+class HttpTransport:
+    '''
+    Sends requests to a running server over HTTP with the standard library
+    '''
+    def __init__(self, base_url: str, timeout: float = 30.0):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def post(self, path: str, form: dict = None, json_body=None) -> int:
+        if json_body is not None:
+            body, content_type = json.dumps(json_body).encode(), 'application/json'
+        else:
+            body, content_type = urllib.parse.urlencode(form).encode(), 'application/x-www-form-urlencoded'
+        request = urllib.request.Request(self.base_url + path, data=body, headers={'Content-Type': content_type})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+def start_local_server(app, host: str = '127.0.0.1'):
+    '''
+    Serves app with werkzeug's threaded server on a free port in a daemon thread.
+    Returns the server (call shutdown() when done) and its base URL.
+    '''
+    from werkzeug.serving import make_server
+
+    server = make_server(host, 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://{host}:{server.server_port}'
+
+def summarize_latencies(latencies_s: list, statuses: list, elapsed_s: float, rows_per_request: int) -> dict:
+    latencies_ms = np.asarray(latencies_s) * 1000
+    n_requests = len(latencies_ms)
+    return {
+        'requests': n_requests,
+        'errors': sum(1 for status in statuses if status != 200),
+        'elapsed_s': elapsed_s,
+        'requests_per_s': n_requests / elapsed_s if elapsed_s else 0.0,
+        'rows_per_s': n_requests * rows_per_request / elapsed_s if elapsed_s else 0.0,
+        'p50_ms': float(np.percentile(latencies_ms, 50)) if n_requests else None,
+        'p90_ms': float(np.percentile(latencies_ms, 90)) if n_requests else None,
+        'p99_ms': float(np.percentile(latencies_ms, 99)) if n_requests else None,
+        'max_ms': float(latencies_ms.max()) if n_requests else None,
+    }
+
+class LoadTest:
+    def __init__(self, config: LoadTestConfig = None):
+        self.load_test_config = config or LoadTestConfig()
+
+    def make_transport(self, app):
+        if self.load_test_config.base_url:
+            return HttpTransport(self.load_test_config.base_url)
+        return FlaskClientTransport(app)
+
+    def run_worker(self, app, schema: RequestSchema, seed: int, deadline: float):
+        config = self.load_test_config
+        transport = self.make_transport(app)
+        payloads = PayloadGenerator(schema, seed)
+        latencies, statuses = [], []
+        while time.perf_counter() < deadline:
+            if config.endpoint == '/predictbatch':
+                form, json_body = None, payloads.records(config.batch_size)
+            else:
+                form, json_body = payloads.record(), None
+            start = time.perf_counter()
+            statuses.append(transport.post(config.endpoint, form=form, json_body=json_body))
+            latencies.append(time.perf_counter() - start)
+        return latencies, statuses
+
+    def run_level(self, app, schema: RequestSchema, concurrency: int) -> dict:
+        '''
+        Runs `concurrency` closed-loop workers (each sends its next request as soon as the
+        previous one returns) for duration_s and summarises their latencies
+        '''
+        config = self.load_test_config
+        start = time.perf_counter()
+        deadline = start + config.duration_s
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = [
+                executor.submit(self.run_worker, app, schema, config.random_state + worker, deadline)
+                for worker in range(concurrency)
+            ]
+            results = [future.result() for future in futures]
+        elapsed = time.perf_counter() - start
+
+        latencies = [latency for worker_latencies, _ in results for latency in worker_latencies]
+        statuses = [status for _, worker_statuses in results for status in worker_statuses]
+        rows_per_request = config.batch_size if config.endpoint == '/predictbatch' else 1
+        return {'concurrency': concurrency, **summarize_latencies(latencies, statuses, elapsed, rows_per_request)}
+
+    def run(self, app=None, schema: RequestSchema = None) -> dict:
+        '''
+        Warms the app up with one request, then runs every concurrency level and writes
+        the report. app defaults to the Flask app in app.py, schema to the one built
+        from the saved preprocessor.
+        '''
+        try:
+            config = self.load_test_config
+            if app is None:
+                from app import app
+            if schema is None:
+                from src.pipeline.predict_pipeline import PredictPipeline
+                schema = PredictPipeline().get_request_schema()
+
+            # The first request loads the schema and model artifacts; keep it out of the numbers
+            warm_up = PayloadGenerator(schema, config.random_state)
+            if config.endpoint == '/predictbatch':
+                self.make_transport(app).post(config.endpoint, json_body=warm_up.records(config.batch_size))
+            else:
+                self.make_transport(app).post(config.endpoint, form=warm_up.record())
+
+            levels = []
+            for concurrency in config.concurrency_levels:
+                level = self.run_level(app, schema, concurrency)
+                logging.info(f"Load test {config.endpoint} x{concurrency}: {level['requests_per_s']:.1f} req/s, "
+                             f"p50 {level['p50_ms']} ms, p99 {level['p99_ms']} ms")
+                levels.append(level)
+
+            report = {
+                'endpoint': config.endpoint,
+                'target': config.base_url or 'flask-test-client',
+                'duration_s': config.duration_s,
+                'batch_size': config.batch_size if config.endpoint == '/predictbatch' else 1,
+                'levels': levels,
+            }
+            os.makedirs(os.path.dirname(config.report_file_path), exist_ok=True)
+            with open(config.report_file_path, 'w') as file_obj:
+                json.dump(report, file_obj, indent=2)
+            return report
+        except Exception as e:
+            raise CustomException(e, sys)
+
+def format_report(report: dict) -> str:
+    lines = [f"{report['endpoint']} via {report['target']} (batch size {report['batch_size']})",
+             f"{'concurrency':>11} {'requests':>9} {'errors':>7} {'req/s':>9} {'rows/s':>10} "
+             f"{'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}"]
+    for level in report['levels']:
+        lines.append(
+            f"{level['concurrency']:>11} {level['requests']:>9} {level['errors']:>7} "
+            f"{level['requests_per_s']:>9.1f} {level['rows_per_s']:>10.1f} "
+            f"{level['p50_ms'] or 0:>8.2f} {level['p99_ms'] or 0:>8.2f} {level['max_ms'] or 0:>8.2f}"
+        )
+    return '\n'.join(lines)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Load test the prediction endpoints')
+    parser.add_argument('--endpoint', default='/predictdata', choices=['/predictdata', '/predictbatch'])
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 2, 4, 8],
+                        help='Concurrency levels to run one after another')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds per concurrency level')
+    parser.add_argument('--batch-size', type=int, default=32, help='Records per /predictbatch request')
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--url', help='Base URL of a running server, e.g. http://localhost:8000')
+    target.add_argument('--serve', action='store_true',
+                        help='Start app.py on a local threaded server instead of using the test client')
+    args = parser.parse_args()
+
+    config = LoadTestConfig(endpoint=args.endpoint, concurrency_levels=args.concurrency,
+                            duration_s=args.duration, batch_size=args.batch_size, base_url=args.url)
+    server = None
+    if args.serve:
+        from app import app
+        server, config.base_url = start_local_server(app)
+    try:
+        print(format_report(LoadTest(config).run()))
+    finally:
+        if server is not None:
+            server.shutdown()
@@ -1,28 +1,305 @@
 import sys
 import os
-import pandas as pd
+import re
+import shutil
+import time
+import threading
+import uuid
+from datetime import datetime
+from collections import OrderedDict
+from concurrent.futures import Future
+import numpy as np
 from dataclasses import dataclass
 from src.exception import CustomException
 from src.logger import logging
-from src.utils import load_object
+from src.utils import load_object, iter_row_blocks
+from src.pipeline.request_schema import RequestSchema
 
 @dataclass
 class PredictPipelineConfig:
     preprocessor_file_path = os.path.join('artifacts', 'preprocessor.pkl')
     model_file_path = os.path.join('artifacts', 'model.pkl')
+    # Batch inputs larger than this are transformed in fixed-size blocks
+    transform_block_size = 10000
+    # Bundles are published as immutable versions, bundle_dir/<name>/<version>/{preprocessor,
+    # model}.pkl, with bundle_dir/<name>/CURRENT naming the live version. Until a default
+    # bundle is published, the default key serves the preprocessor_file_path/model_file_path pair
+    bundle_dir = os.path.join('artifacts', 'models')
+    default_model_key = 'default'
+    bundle_pointer_name = 'CURRENT'
+    # A CURRENT pointer is read again at most this often, so serving does not hit the
+    # filesystem on every request; publishing from this process takes effect at once
+    bundle_pointer_ttl_s = 1.0
+    # Older versions are deleted on publish, keeping this many including the live one
+    bundle_versions_kept = 3
+    # Resident bundles are evicted least recently used first once their pickled sizes exceed this
+    memory_budget_bytes = 512 * 1024 * 1024
+
+# Bundle names double as directory names, so they are restricted to a safe alphabet
+MODEL_KEY_PATTERN = re.compile(r'^[A-Za-z0-9_.-]+$')
+
+class UnknownModelError(LookupError):
+    '''
+    Raised for a model key with no bundle on disk. Like InvalidRequestError this is a
+    client error, not a CustomException.
+    '''
+
+class ModelBundle:
+    '''
+    A fitted preprocessor and model loaded together, with the request schema built from
+    the preprocessor on first use. version is the published version the pair was loaded
+    from, None for an unversioned pair. target_names is set for multi-target models, which
+    predict one column per target.
+    '''
+    __slots__ = ('name', 'paths', 'version', 'preprocessor', 'model', 'target_names', 'size_bytes',
+                 '_request_schema')
+
+    def __init__(self, name: str, paths: tuple, version: str = None):
+        self.name = name
+        self.paths = paths
+        self.version = version
+        self.preprocessor = load_object(file_path=paths[0])
+        self.model = load_object(file_path=paths[1])
+        self.target_names = getattr(self.model, 'target_names', None)
+        # Pickled size as a proxy for resident memory
+        self.size_bytes = sum(os.path.getsize(path) for path in paths)
+        self._request_schema = None
+
+    def predict(self, features, block_size: int = None):
+        block_size = block_size or PredictPipelineConfig.transform_block_size
+        if len(features) == 0:
+            # The fitted imputers reject an empty frame
+            return np.empty((0, len(self.target_names)) if self.target_names else (0,))
+        if len(features) <= block_size:
+            return self.model.predict(self.preprocessor.transform(features))
+        # Large batches are scored block by block so transform intermediates stay bounded
+        return np.concatenate([
+            self.model.predict(self.preprocessor.transform(block))
+            for block in iter_row_blocks(features, block_size)
+        ])
+
+    @property
+    def request_schema(self) -> RequestSchema:
+        if self._request_schema is None:
+            self._request_schema = RequestSchema.from_preprocessor(self.preprocessor)
+        return self._request_schema
+
+def _bundle_version_paths(bundle_path: str, version: str) -> tuple:
+    version_path = os.path.join(bundle_path, version)
+    return os.path.join(version_path, 'preprocessor.pkl'), os.path.join(version_path, 'model.pkl')
+
+# bundle path -> (monotonic time read, version, paths), shared by every manager in the
+# process and cleared by publish_model_bundle
+_bundle_pointers = {}
+
+class ModelManager:
+    '''
+    Loads model bundles by name on demand and keeps recently used ones resident within
+    memory_budget_bytes, evicting the least recently used first. A bundle is reloaded
+    when its CURRENT pointer names a new version, so a retrained model is picked up without
+    a restart, and since a version is complete before the pointer moves to it, a reload
+    never mixes the preprocessor of one training run with the model of another. Unversioned
+    pairs are loaded once. One manager is shared by every request in the process (see
+    get_model_manager).
+    '''
+    def __init__(self, memory_budget_bytes: int = None):
+        self.memory_budget_bytes = memory_budget_bytes or PredictPipelineConfig.memory_budget_bytes
+        self.bundles = OrderedDict()
+        self.lock = threading.Lock()
+        # model_key -> (paths, Future) for bundles being loaded
+        self.loading = {}
+        self.stats = {'hits': 0, 'loads': 0, 'evictions': 0}
+
+    def resolve(self, model_key: str = None) -> tuple:
+        '''
+        (version, paths) of the live version of a bundle. version is None for a bundle that
+        has no CURRENT pointer: the legacy pair for the default key, otherwise files directly
+        in bundle_dir/<name>.
+        '''
+        config = PredictPipelineConfig
+        model_key = model_key or config.default_model_key
+        if not MODEL_KEY_PATTERN.match(model_key) or model_key.startswith('.'):
+            raise UnknownModelError(model_key)
+        bundle_path = os.path.join(config.bundle_dir, model_key)
+        now = time.monotonic()
+        pointer = _bundle_pointers.get(bundle_path)
+        if pointer is not None and now - pointer[0] < config.bundle_pointer_ttl_s:
+            return pointer[1], pointer[2]
+        try:
+            with open(os.path.join(bundle_path, config.bundle_pointer_name)) as file_obj:
+                version = file_obj.read().strip()
+            paths = _bundle_version_paths(bundle_path, version)
+        except FileNotFoundError:
+            version = None
+            if model_key == config.default_model_key:
+                paths = (config.preprocessor_file_path, config.model_file_path)
+            else:
+                paths = (os.path.join(bundle_path, 'preprocessor.pkl'), os.path.join(bundle_path, 'model.pkl'))
+        # Keys of bundles that were never published are not remembered, so requests for
+        # arbitrary names cannot grow the table
+        if version is not None or model_key == config.default_model_key:
+            _bundle_pointers[bundle_path] = (now, version, paths)
+        return version, paths
+
+    def has_bundle(self, model_key: str = None) -> bool:
+        try:
+            return all(os.path.exists(path) for path in self.resolve(model_key)[1])
+        except UnknownModelError:
+            return False
+
+    def get(self, model_key: str = None) -> ModelBundle:
+        model_key = model_key or PredictPipelineConfig.default_model_key
+        version, paths = self.resolve(model_key)
+
+        # The lock only guards the cache; bundles are unpickled outside it, so a cold load
+        # or reload of one key does not hold up requests for bundles already resident.
+        # Concurrent requests for the same version wait on the first request's load.
+        with self.lock:
+            bundle = self.bundles.get(model_key)
+            if bundle is not None and bundle.paths == paths:
+                self.bundles.move_to_end(model_key)
+                self.stats['hits'] += 1
+                return bundle
+            loading_paths, future = self.loading.get(model_key, (None, None))
+            if loading_paths != paths:
+                future = Future()
+                self.loading[model_key] = (paths, future)
+                loader = True
+            else:
+                loader = False
+
+        if not loader:
+            return future.result()
+
+        try:
+            if not all(os.path.exists(path) for path in paths):
+                raise UnknownModelError(model_key)
+            bundle = ModelBundle(model_key, paths, version)
+        except BaseException as e:
+            with self.lock:
+                if self.loading.get(model_key, (None, None))[1] is future:
+                    del self.loading[model_key]
+            future.set_exception(e)
+            raise
+
+        with self.lock:
+            if self.loading.get(model_key, (None, None))[1] is future:
+                del self.loading[model_key]
+            self.bundles[model_key] = bundle
+            self.bundles.move_to_end(model_key)
+            self.stats['loads'] += 1
+            logging.info(f'Loaded model bundle {model_key} version {version} ({bundle.size_bytes} bytes)')
+            self._evict(keep=model_key)
+        future.set_result(bundle)
+        return bundle
+
+    def _evict(self, keep: str):
+        while self.resident_bytes() > self.memory_budget_bytes and len(self.bundles) > 1:
+            name = next(iter(self.bundles))
+            if name == keep:
+                break
+            evicted = self.bundles.pop(name)
+            self.stats['evictions'] += 1
+            logging.info(f'Evicted model bundle {name} ({evicted.size_bytes} bytes)')
+
+    def resident_bytes(self) -> int:
+        return sum(bundle.size_bytes for bundle in self.bundles.values())
+
+    def describe(self) -> dict:
+        with self.lock:
+            return {
+                'resident': {name: bundle.size_bytes for name, bundle in self.bundles.items()},
+                'versions': {name: bundle.version for name, bundle in self.bundles.items()},
+                'resident_bytes': self.resident_bytes(),
+                'memory_budget_bytes': self.memory_budget_bytes,
+                **self.stats,
+            }
+
+_model_manager = None
+
+def get_model_manager() -> ModelManager:
+    global _model_manager
+    if _model_manager is None:
+        _model_manager = ModelManager()
+    return _model_manager
+
+def publish_model_bundle(model_key: str, preprocessor_path: str, model_path: str, bundle_dir: str = None) -> str:
+    '''
+    Publishes a trained preprocessor/model pair as a new version of bundle_dir/<model_key>
+    and returns the version. The pair is copied into a staging directory that is renamed
+    into place complete, and only then is the CURRENT pointer replaced, so a serving
+    process sees either the old pair or the new one, never a mix. Versions beyond
+    bundle_versions_kept are deleted.
+    '''
+    try:
+        config = PredictPipelineConfig()
+        if not MODEL_KEY_PATTERN.match(model_key) or model_key.startswith('.'):
+            raise UnknownModelError(model_key)
+        bundle_path = os.path.join(bundle_dir or config.bundle_dir, model_key)
+        os.makedirs(bundle_path, exist_ok=True)
+
+        # Versions sort by publish time
+        version = datetime.now().strftime('%Y%m%dT%H%M%S%f') + '-' + uuid.uuid4().hex[:8]
+        staging_path = os.path.join(bundle_path, f'.{version}.tmp')
+        os.makedirs(staging_path)
+        for source, name in ((preprocessor_path, 'preprocessor.pkl'), (model_path, 'model.pkl')):
+            shutil.copyfile(source, os.path.join(staging_path, name))
+        os.rename(staging_path, os.path.join(bundle_path, version))
+
+        pointer_path = os.path.join(bundle_path, config.bundle_pointer_name)
+        with open(pointer_path + '.tmp', 'w') as file_obj:
+            file_obj.write(version)
+        os.replace(pointer_path + '.tmp', pointer_path)
+        _bundle_pointers.clear()
+        logging.info(f'Published model bundle {model_key} version {version}')
+
+        versions = sorted(
+            name for name in os.listdir(bundle_path)
+            if not name.startswith('.') and os.path.isdir(os.path.join(bundle_path, name))
+        )
+        for name in versions[:-config.bundle_versions_kept]:
+            shutil.rmtree(os.path.join(bundle_path, name), ignore_errors=True)
+        return version
+    except Exception as e:
+        raise CustomException(e, sys)
 
 class PredictPipeline:
-    def __init__(self):
-        self.preprocessor_path = PredictPipelineConfig().preprocessor_file_path
-        self.model_path = PredictPipelineConfig().model_file_path
+    def __init__(self, model_key: str = None):
+        self.model_key = model_key
+        self.transform_block_size = PredictPipelineConfig().transform_block_size
+        self.bundle = None
+
+    def get_bundle(self) -> ModelBundle:
+        '''
+        The bundle this pipeline serves, looked up on first use and kept, so one request
+        resolves its bundle once however many steps use it. Raises UnknownModelError for a
+        key with no bundle.
+        '''
+        if self.bundle is None:
+            self.bundle = get_model_manager().get(self.model_key)
+        return self.bundle
 
     def predict(self, features):
         try:
-            preprocessor = load_object(file_path=self.preprocessor_path)
-            model = load_object(file_path=self.model_path)
-            data_scaled = preprocessor.transform(features)
-            preds = model.predict(data_scaled)
-            return preds
+            return self.get_bundle().predict(features, self.transform_block_size)
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def get_request_schema(self):
+        '''
+        Request schema holding the categories the bundle's preprocessor was fitted with
+        '''
+        try:
+            return self.get_bundle().request_schema
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def get_target_names(self):
+        '''
+        Names of the predicted columns for a multi-target bundle, None for a single target
+        '''
+        try:
+            return self.get_bundle().target_names
         except Exception as e:
             raise CustomException(e, sys)
 
@@ -33,8 +310,8 @@ class CustomData:
                  parental_level_of_education: str,
                  lunch: str,
                  test_preparation_course: str,
-                 reading_score: int,
-                 writing_score: int,
+                 reading_score: int = None,
+                 writing_score: int = None,
                  ):
         self.gender = gender
         self.race_ethnicity = race_ethnicity
@@ -45,6 +322,9 @@ class CustomData:
         self.writing_score = writing_score
 
     def get_data_as_dataframe(self):
+        # Imported on first use so that importing the app does not pay for pandas
+        import pandas as pd
+
         try:
             custom_data_input_dict = {
                 "gender": [self.gender],
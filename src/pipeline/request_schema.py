@@ -0,0 +1,114 @@
+from typing import Dict, Iterable, List, Mapping, Tuple
+
+# Scores are marks out of 100
+SCORE_RANGE = (0, 100)
+
+class InvalidRequestError(ValueError):
+    '''
+    Raised for request payloads that fail validation. Deliberately not a CustomException:
+    bad input is expected traffic and should be rejected without traceback introspection.
+    '''
+    def __init__(self, errors: List[Tuple[int, str, str]]):
+        self.errors = errors
+        super().__init__('; '.join(
+            f'row {row}: {field} {message}' if row is not None else f'{field} {message}'
+            for row, field, message in errors
+        ))
+
+class RequestSchema:
+    '''
+    Validates prediction payloads against the categories the preprocessor was fitted with
+    and the allowed score range, before any pandas or sklearn work happens. Field checks
+    are precomputed into tuples of (column, allowed values) so validating a row is a few
+    set lookups and int conversions.
+    '''
+    __slots__ = ('categorical_fields', 'numerical_fields', 'columns', 'score_range')
+
+    def __init__(self, categories: Dict[str, Iterable[str]], numerical_columns: Iterable[str],
+                 score_range: Tuple[int, int] = SCORE_RANGE):
+        self.categorical_fields = tuple(
+            (column, frozenset(values)) for column, values in categories.items()
+        )
+        self.numerical_fields = tuple(numerical_columns)
+        self.columns = tuple(categories) + self.numerical_fields
+        self.score_range = score_range
+
+    @classmethod
+    def from_preprocessor(cls, preprocessor, score_range: Tuple[int, int] = SCORE_RANGE):
+        '''
+        Builds the schema from a fitted ColumnTransformer as produced by DataTransformation
+        '''
+        categories, numerical_columns = {}, []
+        for name, transformer, columns in preprocessor.transformers_:
+            if name == 'cat_pipeline':
+                encoder = transformer.named_steps['onehotencoder']
+                categories = {
+                    column: [str(value) for value in values]
+                    for column, values in zip(columns, encoder.categories_)
+                }
+            elif name == 'num_pipeline':
+                numerical_columns = list(columns)
+        return cls(categories, numerical_columns, score_range)
+
+    def _coerce_score(self, value):
+        if value is None or value == '':
+            return float('nan')  # left to the preprocessor's median imputer
+        if isinstance(value, bool):
+            raise ValueError
+        if isinstance(value, str):
+            value = int(value.strip())
+        elif isinstance(value, float):
+            if not value.is_integer():
+                raise ValueError
+            value = int(value)
+        elif not isinstance(value, int):
+            raise ValueError
+        low, high = self.score_range
+        if not low <= value <= high:
+            raise ValueError
+        return value
+
+    def _validate_row(self, record: Mapping, row, errors: list) -> list:
+        values = []
+        for column, allowed in self.categorical_fields:
+            value = record.get(column)
+            if not isinstance(value, str) or value not in allowed:
+                errors.append((row, column, f'must be one of {sorted(allowed)}, got {value!r}'))
+            values.append(value)
+        for column in self.numerical_fields:
+            value = record.get(column)
+            try:
+                values.append(self._coerce_score(value))
+            except (TypeError, ValueError):
+                low, high = self.score_range
+                errors.append((row, column, f'must be an integer between {low} and {high}, got {value!r}'))
+                values.append(value)
+        return values
+
+    def validate(self, record: Mapping) -> dict:
+        '''
+        Validates a single payload (dict or request.form) and returns column -> typed value
+        '''
+        errors = []
+        values = self._validate_row(record, None, errors)
+        if errors:
+            raise InvalidRequestError(errors)
+        return dict(zip(self.columns, values))
+
+    def validate_many(self, records: Iterable[Mapping]) -> dict:
+        '''
+        Validates a batch of payloads and returns column -> list of typed values, ready for
+        pd.DataFrame. Every invalid row is reported, not just the first.
+        '''
+        errors = []
+        columns = {column: [] for column in self.columns}
+        column_lists = list(columns.values())
+        for row, record in enumerate(records):
+            if not isinstance(record, Mapping):
+                errors.append((row, 'record', f'must be an object, got {type(record).__name__}'))
+                continue
+            for column_list, value in zip(column_lists, self._validate_row(record, row, errors)):
+                column_list.append(value)
+        if errors:
+            raise InvalidRequestError(errors)
+        return columns
@@ -0,0 +1,91 @@
+import sys
+import json
+import argparse
+
+from src.exception import CustomException
+
+# Per-model numbers compared between two run reports
+MODEL_FIELDS = ['wall_s', 'search_wall_s', 'fit_wall_s', 'cpu_s', 'peak_rss_mb', 'cv_score', 'test_r2']
+RUN_FIELDS = ['wall_s', 'cpu_s', 'peak_rss_mb']
+
+def load_run_report(file_path: str) -> dict:
+    with open(file_path) as file_obj:
+        return json.load(file_obj)
+
+def _change(old, new) -> dict:
+    delta = new - old if old is not None and new is not None else None
+    return {'old': old, 'new': new, 'delta': delta}
+
+def compare_run_reports(old: dict, new: dict) -> dict:
+    '''
+    Field-by-field differences between two run reports written by ModelTrainer: run
+    totals, and per model the timings, memory, scores, candidate counts and whether the
+    best parameters changed. Models present in only one report get None on the other side.
+    '''
+    try:
+        models = {}
+        for name in list(old['models']) + [name for name in new['models'] if name not in old['models']]:
+            old_model, new_model = old['models'].get(name, {}), new['models'].get(name, {})
+            models[name] = {
+                **{field: _change(old_model.get(field), new_model.get(field)) for field in MODEL_FIELDS},
+                'candidates': _change(
+                    len(old_model['candidates']) if old_model else None,
+                    len(new_model['candidates']) if new_model else None,
+                ),
+                'candidate_fit_s': _change(
+                    sum(c['mean_fit_time'] for c in old_model['candidates']) if old_model else None,
+                    sum(c['mean_fit_time'] for c in new_model['candidates']) if new_model else None,
+                ),
+                'best_params_changed': old_model.get('best_params') != new_model.get('best_params'),
+            }
+        return {
+            'same_data': old.get('data_fingerprint') == new.get('data_fingerprint'),
+            'selected_model': {'old': old.get('selected_model'), 'new': new.get('selected_model')},
+            'run': {field: _change(old.get(field), new.get(field)) for field in RUN_FIELDS},
+            'models': models,
+        }
+    except Exception as e:
+        raise CustomException(e, sys)
+
+def format_comparison(comparison: dict) -> str:
+    '''
+    Text table of a comparison, models ordered by how much more wall time the new run spent
+    '''
+    def number(value, digits=2):
+        return '-' if value is None else f'{value:.{digits}f}'
+
+    lines = [
+        f"data: {'same' if comparison['same_data'] else 'CHANGED'}   selected: "
+        f"{comparison['selected_model']['old']} -> {comparison['selected_model']['new']}",
+        '   '.join(
+            f"{field} {number(change['old'])} -> {number(change['new'])} ({number(change['delta'])})"
+            for field, change in comparison['run'].items()
+        ),
+        '',
+        f"{'model':<24} {'wall s old->new':^17} {'delta':>8} {'cpu delta':>10} {'cands':>9} "
+        f"{'cand fit s':>10} {'cv score delta':>15} {'params':>8}",
+    ]
+    models = sorted(
+        comparison['models'].items(),
+        key=lambda item: item[1]['wall_s']['delta'] if item[1]['wall_s']['delta'] is not None else float('inf'),
+        reverse=True,
+    )
+    for name, model in models:
+        lines.append(
+            f"{name:<24} {number(model['wall_s']['old']):>7}->{number(model['wall_s']['new']):<8} "
+            f"{number(model['wall_s']['delta']):>8} {number(model['cpu_s']['delta']):>10} "
+            f"{str(model['candidates']['old']) + '->' + str(model['candidates']['new']):>9} "
+            f"{number(model['candidate_fit_s']['delta']):>10} {number(model['cv_score']['delta'], 4):>15} "
+            f"{'changed' if model['best_params_changed'] else 'same':>8}"
+        )
+    return '\n'.join(lines)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Compare two training run reports')
+    parser.add_argument('old', help='Run report of the baseline run')
+    parser.add_argument('new', help='Run report of the run to compare against it')
+    parser.add_argument('--json', action='store_true', help='Print the comparison as JSON')
+    args = parser.parse_args()
+
+    comparison = compare_run_reports(load_run_report(args.old), load_run_report(args.new))
+    print(json.dumps(comparison, indent=2) if args.json else format_comparison(comparison))
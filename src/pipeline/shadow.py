@@ -0,0 +1,156 @@
+import sys
+import time
+import queue
+import random
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+
+from src.exception import CustomException
+from src.logger import logging
+from src.sketches import QuantileSketch, RunningMoments
+
+@dataclass
+class ShadowConfig:
+    # Model bundle (see ModelManager) scored in the shadow of the live model; None disables shadowing
+    candidate_model_key = None
+    # Fraction of prediction requests copied to the candidate
+    sample_rate = 0.1
+    # Sampled requests waiting for the worker; requests arriving while it is full are dropped
+    max_queue_size = 1000
+    random_state = 42
+
+class ShadowEvaluator:
+    '''
+    Scores a sample of live requests with a candidate model bundle on a background thread
+    and aggregates how its predictions and latency differ from the live model's. submit()
+    only draws a random number and does a non-blocking put, so the live response never
+    waits on the candidate; when the worker falls behind, samples are dropped and counted.
+    The worker loads the candidate itself rather than through the shared ModelManager, so
+    loading it never holds up live requests and its size does not count against, or evict,
+    the live bundles. A candidate whose output shape differs from the live model's (one
+    predicting several targets, the other one) is counted as mismatched and not compared.
+    '''
+    def __init__(self, candidate_model_key: str, sample_rate: float = None, max_queue_size: int = None,
+                 random_state: int = None):
+        config = ShadowConfig()
+        self.candidate_model_key = candidate_model_key
+        self.sample_rate = config.sample_rate if sample_rate is None else sample_rate
+        self.rng = random.Random(config.random_state if random_state is None else random_state)
+        self.queue = queue.Queue(maxsize=max_queue_size or config.max_queue_size)
+        self.worker = None
+        self.lock = threading.Lock()
+        self.deltas = RunningMoments()
+        self.abs_deltas = RunningMoments()
+        self.max_abs_delta = 0.0
+        self.live_latency_ms = QuantileSketch()
+        self.candidate_latency_ms = QuantileSketch()
+        self.counts = {'sampled': 0, 'scored': 0, 'rows': 0, 'dropped': 0, 'errors': 0, 'mismatched': 0}
+
+    def start(self):
+        if self.worker is None:
+            self.worker = threading.Thread(target=self._run, name='shadow-evaluator', daemon=True)
+            self.worker.start()
+        return self
+
+    def submit(self, features, live_predictions, live_latency_s: float) -> bool:
+        '''
+        Called on the request path after the live prediction. Returns whether the request
+        was queued for the candidate. features must not be modified afterwards.
+        '''
+        if self.rng.random() >= self.sample_rate:
+            return False
+        try:
+            self.queue.put_nowait((features, live_predictions, live_latency_s))
+        except queue.Full:
+            with self.lock:
+                self.counts['dropped'] += 1
+            return False
+        with self.lock:
+            self.counts['sampled'] += 1
+        return True
+
+    def _run(self):
+        from src.pipeline.predict_pipeline import ModelBundle, get_model_manager
+
+        bundle = None
+        while True:
+            features, live_predictions, live_latency_s = self.queue.get()
+            try:
+                # Reloaded when the candidate's CURRENT pointer moves to a new version
+                version, paths = get_model_manager().resolve(self.candidate_model_key)
+                if bundle is None or bundle.paths != paths:
+                    bundle = ModelBundle(self.candidate_model_key, paths, version)
+                    logging.info(f'Shadow candidate {self.candidate_model_key} version {version} loaded')
+
+                start = time.perf_counter()
+                candidate_predictions = np.asarray(bundle.predict(features), dtype=float)
+                candidate_latency_s = time.perf_counter() - start
+                live_predictions = np.asarray(live_predictions, dtype=float)
+                if candidate_predictions.shape != live_predictions.shape:
+                    with self.lock:
+                        self.counts['mismatched'] += 1
+                        first_mismatch = self.counts['mismatched'] == 1
+                    if first_mismatch:
+                        logging.info(f'Shadow candidate {self.candidate_model_key} predicts shape '
+                                     f'{candidate_predictions.shape}, live model {live_predictions.shape}; not compared')
+                    continue
+                self._record(live_predictions, candidate_predictions, live_latency_s, candidate_latency_s)
+            except Exception as e:
+                with self.lock:
+                    self.counts['errors'] += 1
+                logging.info(f'Shadow scoring with {self.candidate_model_key} failed: {e}')
+            finally:
+                self.queue.task_done()
+
+    def _record(self, live_predictions, candidate_predictions, live_latency_s, candidate_latency_s):
+        deltas = candidate_predictions - live_predictions
+        with self.lock:
+            self.deltas.update(deltas)
+            self.abs_deltas.update(np.abs(deltas))
+            self.max_abs_delta = max(self.max_abs_delta, float(np.abs(deltas).max()))
+            self.live_latency_ms.update([live_latency_s * 1000])
+            self.candidate_latency_ms.update([candidate_latency_s * 1000])
+            self.counts['scored'] += 1
+            self.counts['rows'] += len(deltas)
+
+    def wait(self, timeout: float = None) -> bool:
+        '''
+        Blocks until every queued sample is scored, or timeout seconds pass. For tests and
+        reports only, never on the request path.
+        '''
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.005)
+        return True
+
+    def summary(self) -> dict:
+        '''
+        Candidate minus live prediction deltas over every scored row, and per-request
+        latency quantiles of both models
+        '''
+        try:
+            with self.lock:
+                def latency(sketch):
+                    if not sketch.count:
+                        return None
+                    return {'p50': sketch.quantile(0.5), 'p99': sketch.quantile(0.99)}
+
+                return {
+                    'candidate_model_key': self.candidate_model_key,
+                    'sample_rate': self.sample_rate,
+                    **self.counts,
+                    'queued': self.queue.qsize(),
+                    'mean_delta': self.deltas.mean if self.deltas.count else None,
+                    'mean_abs_delta': self.abs_deltas.mean if self.abs_deltas.count else None,
+                    'rmse_delta': ((self.deltas.variance + self.deltas.mean ** 2) ** 0.5
+                                   if self.deltas.count else None),
+                    'max_abs_delta': self.max_abs_delta if self.deltas.count else None,
+                    'live_latency_ms': latency(self.live_latency_ms),
+                    'candidate_latency_ms': latency(self.candidate_latency_ms),
+                }
+        except Exception as e:
+            raise CustomException(e, sys)
@@ -0,0 +1,188 @@
+import os
+import sys
+import argparse
+from dataclasses import dataclass
+from typing import List
+
+from src.exception import CustomException
+from src.logger import logging
+from src.utils import save_object, load_object
+from src.components.data_ingestion import DataIngestion
+from src.components.data_transformation import DataTransformation, DataTransformationConfig
+from src.components.model_trainer import ModelTrainer, ModelTrainerConfig
+from src.pipeline.predict_pipeline import PredictPipelineConfig, publish_model_bundle
+
+@dataclass
+class TrainPipelineConfig:
+    incremental_state_file_path: str = os.path.join('artifacts', 'incremental_state.pkl')
+    # Number of incremental runs after which the next run rebuilds everything from scratch
+    full_rebuild_every: int = 5
+    # Distil the trained model into a cheap student after each full rebuild
+    distill: bool = False
+    # Scores to predict, None for DataTransformationConfig.target_columns. With several
+    # targets one shared preprocessor is fitted and the model predicts all of them at once.
+    target_columns: List[str] = None
+    # Publish each run as a new version of the default bundle. Training jobs turn this off
+    # and publish from their workspace once the run has succeeded, see JobRunner._publish
+    publish: bool = True
+
+class TrainPipeline:
+    def __init__(self, config: TrainPipelineConfig = None):
+        self.train_pipeline_config = config or TrainPipelineConfig()
+        self.target_columns = list(self.train_pipeline_config.target_columns or DataTransformationConfig.target_columns)
+
+    def get_data_transformation(self):
+        transformation = DataTransformation()
+        transformation.data_transformation_config.target_columns = self.target_columns
+        return transformation
+
+    def same_targets(self, state) -> bool:
+        # States saved before targets were configurable were trained on the default target
+        return state.get('target_columns', ['math_score']) == self.target_columns
+
+    def run(self, force: bool = False):
+        '''
+        Full rebuild: ingestion, preprocessor fit, model search and training from scratch.
+        Skipped when the ingested data has the same manifest fingerprint as the data the
+        current artifacts were built from, unless force is set.
+        '''
+        try:
+            logging.info('Full training run started')
+            ingestion = DataIngestion()
+            train_path, test_path = ingestion.initiate_data_ingestion()
+
+            state_path = self.train_pipeline_config.incremental_state_file_path
+            fingerprint = ingestion.load_manifest()['fingerprint']
+            if not force and os.path.exists(state_path):
+                state = load_object(file_path=state_path)
+                if state.get('data_fingerprint') == fingerprint and state.get('model_name') and self.same_targets(state):
+                    logging.info(f'Data unchanged ({fingerprint}), skipping training')
+                    return state['model_name']
+
+            return self.rebuild(train_path, test_path)
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def rebuild(self, train_path, test_path, distill: bool = None):
+        '''
+        Refits the preprocessor and reruns the model search on the current train/test splits,
+        then distils the result when distill is set (TrainPipelineConfig.distill by default)
+        '''
+        try:
+            if distill is None:
+                distill = self.train_pipeline_config.distill
+            train_arr, test_arr, _ = self.get_data_transformation().initiate_data_transformation(train_path, test_path)
+            best_model_name = ModelTrainer().initiate_model_trainer(train_arr, test_arr, self.target_columns)
+            distilled = False
+            if distill and len(self.target_columns) > 1:
+                logging.info('Distillation supports a single target, skipping it for a multi-target model')
+            elif distill:
+                from src.components.model_distillation import ModelDistillation
+
+                distillation_report = ModelDistillation().initiate_model_distillation(test_arr)
+                distilled = bool(distillation_report['promoted'])
+                best_model_name = distillation_report['promoted'] or best_model_name
+
+            self.save_state(incremental_runs=0, model_name=best_model_name, distilled=distilled)
+            if self.train_pipeline_config.publish:
+                self.publish()
+            logging.info('Full training run completed')
+            return best_model_name
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def save_state(self, incremental_runs: int, model_name: str, distilled: bool = False):
+        manifest = DataIngestion().load_manifest()
+        save_object(
+            file_path=self.train_pipeline_config.incremental_state_file_path,
+            obj={
+                'incremental_runs': incremental_runs,
+                'model_name': model_name,
+                'data_fingerprint': manifest['fingerprint'] if manifest else None,
+                'target_columns': self.target_columns,
+                # Whether model.pkl is a distilled student rather than the searched model
+                'distilled': distilled,
+            }
+        )
+
+    def publish(self):
+        '''
+        Publishes the trained preprocessor and model as a new version of the default bundle.
+        The components write preprocessor.pkl and model.pkl one after the other, so serving
+        reads the pair through the bundle's CURRENT pointer, which moves only once both
+        files of a run are in place.
+        '''
+        return publish_model_bundle(
+            PredictPipelineConfig.default_model_key,
+            DataTransformationConfig().preprocessor_obj_file_path,
+            ModelTrainerConfig().trained_model_file_path,
+        )
+
+    def run_incremental(self, new_data_path):
+        '''
+        Folds the rows in new_data_path into the saved preprocessor and model. Falls back to
+        a full rebuild when no previous run exists, when full_rebuild_every incremental runs
+        have happened since the last rebuild, or when the new rows bring unseen categories.
+        A distilled student is never continued: training it further on real labels would
+        undo the distillation while it is still reported as the student, so instead the
+        model is rebuilt and distilled again from the new teacher.
+        '''
+        try:
+            state_path = self.train_pipeline_config.incremental_state_file_path
+            ingestion = DataIngestion()
+            if os.path.exists(state_path):
+                state = load_object(file_path=state_path)
+            else:
+                logging.info('No previous training run found, ingesting source data first')
+                ingestion.initiate_data_ingestion()
+                state = None
+
+            train_path, test_path, new_train_path = ingestion.initiate_incremental_ingestion(new_data_path)
+
+            if state is None:
+                return self.rebuild(train_path, test_path)
+            if not self.same_targets(state):
+                logging.info(f'Targets changed to {self.target_columns}, running full rebuild')
+                return self.rebuild(train_path, test_path)
+            if state.get('distilled'):
+                logging.info(f"Saved model {state['model_name']} is a distilled student, running full rebuild "
+                             'with distillation')
+                return self.rebuild(train_path, test_path, distill=True)
+            if state['incremental_runs'] >= self.train_pipeline_config.full_rebuild_every:
+                logging.info(f"{state['incremental_runs']} incremental runs since last rebuild, running full rebuild")
+                return self.rebuild(train_path, test_path)
+
+            transformed = self.get_data_transformation().initiate_incremental_transformation(
+                train_path, test_path, new_train_path
+            )
+            if transformed is None:
+                return self.rebuild(train_path, test_path)
+
+            train_arr, test_arr, _ = transformed
+            model_name = ModelTrainer().initiate_incremental_model_trainer(train_arr, test_arr)
+
+            self.save_state(incremental_runs=state['incremental_runs'] + 1, model_name=model_name)
+            if self.train_pipeline_config.publish:
+                self.publish()
+            logging.info(f"Incremental training run {state['incremental_runs'] + 1} completed")
+            return model_name
+        except Exception as e:
+            raise CustomException(e, sys)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Train the student performance model')
+    parser.add_argument('--incremental', metavar='NEW_DATA_CSV',
+                        help='Update the saved preprocessor and model from new rows instead of retraining')
+    parser.add_argument('--force', action='store_true',
+                        help='Retrain even when the data is unchanged since the last run')
+    parser.add_argument('--distill', action='store_true',
+                        help='Distil the trained model into a cheap student and serve it if within tolerance')
+    parser.add_argument('--targets', nargs='+', metavar='COLUMN',
+                        help='Scores to predict together, e.g. math_score reading_score writing_score')
+    args = parser.parse_args()
+
+    pipeline = TrainPipeline(TrainPipelineConfig(distill=args.distill, target_columns=args.targets))
+    if args.incremental:
+        print(pipeline.run_incremental(args.incremental))
+    else:
+        print(pipeline.run(force=args.force))
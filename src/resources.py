@@ -0,0 +1,177 @@
+import os
+import sys
+import math
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from src.exception import CustomException
+from src.logger import logging
+
+# Estimators that parallelise a single fit internally, and the parameter that controls it
+LIBRARY_THREAD_PARAMS = {
+    "RandomForestRegressor": "n_jobs",
+    "KNeighborsRegressor": "n_jobs",
+    "XGBRegressor": "n_jobs",
+    "CatBoostRegressor": "thread_count",
+}
+
+@dataclass
+class ThreadPlan:
+    search_n_jobs: int
+    library_threads: int
+    # Threads for the final fit on the best parameters, which runs after the search workers
+    # are done and so has the whole budget
+    refit_threads: int
+
+def available_cpus() -> int:
+    '''
+    CPUs this process may run on, honouring affinity masks set by taskset or a container
+    '''
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+def _read_process_table() -> dict:
+    '''
+    (pid, start time) -> (parent pid, CPU seconds, resident bytes) for every process in /proc
+    '''
+    clock_ticks = os.sysconf('SC_CLK_TCK')
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    table = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as file_obj:
+                stat = file_obj.read()
+        except OSError:  # exited since listdir
+            continue
+        # The command name is in parentheses and may contain spaces; fields follow it
+        fields = stat[stat.rindex(')') + 2:].split()
+        table[(int(entry), fields[19])] = (
+            int(fields[1]),
+            (int(fields[11]) + int(fields[12])) / clock_ticks,
+            int(fields[21]) * page_size,
+        )
+    return table
+
+class ProcessTreeMonitor:
+    '''
+    CPU time and peak resident memory of this process together with every process it
+    starts, sampled from /proc on a background thread while the block runs. getrusage
+    cannot see loky search workers: they are reused across searches and only reaped at
+    exit, so RUSAGE_CHILDREN never includes them. Workers already running when the block
+    starts count only the CPU they use inside it. A process that exits between two samples
+    loses the CPU it used since its last sample, so interval_s bounds the undercount.
+    Linux only; elsewhere usage holds None.
+
+        with ProcessTreeMonitor() as monitor:
+            ...
+        monitor.usage  # {'cpu_s': ..., 'peak_rss_mb': ..., 'processes': ...}
+    '''
+    def __init__(self, interval_s: float = 0.2):
+        self.interval_s = interval_s
+        self.available = os.path.exists('/proc/self/stat')
+        self.usage = {'cpu_s': None, 'peak_rss_mb': None, 'processes': None}
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        table = _read_process_table()
+        children = {}
+        for key, (parent_pid, _, _) in table.items():
+            children.setdefault(parent_pid, []).append(key)
+        tree = [key for key in table if key[0] == os.getpid()]
+        for key in tree:
+            tree.extend(children.get(key[0], []))
+
+        for key in tree:
+            self.last_cpu_s[key] = table[key][1]
+            self.baseline_cpu_s.setdefault(key, 0.0)
+        self.peak_rss_bytes = max(self.peak_rss_bytes, sum(table[key][2] for key in tree))
+
+    def _run(self):
+        while not self._stopped.wait(self.interval_s):
+            self._sample()
+
+    def __enter__(self):
+        if self.available:
+            # Processes alive at the start only count what they use from here on
+            self.baseline_cpu_s = {}
+            self.last_cpu_s = {}
+            self.peak_rss_bytes = 0
+            self._sample()
+            self.baseline_cpu_s = dict(self.last_cpu_s)
+            self._thread = threading.Thread(target=self._run, name='process-tree-monitor', daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._thread is not None:
+            self._stopped.set()
+            self._thread.join()
+            self._sample()
+            self.usage = {
+                'cpu_s': sum(cpu_s - self.baseline_cpu_s[key] for key, cpu_s in self.last_cpu_s.items()),
+                'peak_rss_mb': self.peak_rss_bytes / (1024 * 1024),
+                'processes': len(self.last_cpu_s),
+            }
+        return False
+
+def plan_threads(model, param_grid: dict, n_splits: int, cpu_budget: int = None) -> ThreadPlan:
+    '''
+    Splits the CPU budget between GridSearchCV workers and the threads each fit may use.
+    Independent candidate fits scale almost linearly, library threads on a dataset this
+    small do not, so the search gets as many workers as it has fits to run and any cores
+    left over go to the library threads of estimators that can use them. A grid with a
+    single candidate runs in this process: its few fold fits cost less than starting
+    search workers, and threaded estimators get the whole budget for each fit.
+    '''
+    try:
+        cpu_budget = cpu_budget or available_cpus()
+        n_candidates = math.prod(len(values) for values in param_grid.values())
+        search_n_jobs = 1 if n_candidates == 1 else max(1, min(cpu_budget, n_candidates * n_splits))
+
+        if type(model).__name__ in LIBRARY_THREAD_PARAMS:
+            library_threads = max(1, cpu_budget // search_n_jobs)
+        else:
+            library_threads = 1
+
+        return ThreadPlan(search_n_jobs=search_n_jobs, library_threads=library_threads, refit_threads=cpu_budget)
+    except Exception as e:
+        raise CustomException(e, sys)
+
+def apply_thread_plan(model, plan: ThreadPlan, refit: bool = False):
+    '''
+    Sets the estimator's own threading parameter (n_jobs / thread_count) from the plan: its
+    library threads for the search, or its refit threads for the final fit
+    '''
+    param = LIBRARY_THREAD_PARAMS.get(type(model).__name__)
+    if param is not None:
+        model.set_params(**{param: plan.refit_threads if refit else plan.library_threads})
+    if refit:
+        logging.info(f'{type(model).__name__}: final fit with {plan.refit_threads} threads')
+    else:
+        logging.info(f'{type(model).__name__}: {plan.search_n_jobs} search workers x {plan.library_threads} library threads')
+    return model
+
+@contextmanager
+def thread_limits(plan: ThreadPlan, refit: bool = False):
+    '''
+    Caps BLAS/OpenMP threads to the plan's library threads, both in this process (sequential
+    search) and in the loky workers GridSearchCV starts; with refit, caps this process to
+    the plan's refit threads for the final fit
+    '''
+    # Imported here so that importing the trainer, which imports this module, stays cheap
+    from joblib import parallel_backend
+    from threadpoolctl import threadpool_limits
+
+    if refit:
+        with threadpool_limits(limits=plan.refit_threads):
+            yield
+        return
+    with threadpool_limits(limits=plan.library_threads), \
+         parallel_backend('loky', inner_max_num_threads=plan.library_threads):
+        yield
@@ -0,0 +1,123 @@
+from collections import Counter
+
+import numpy as np
+
+def median_from_counts(counts: Counter) -> float:
+    '''
+    Median of the values summarised by a value -> count mapping, matching np.median
+    (the mean of the two middle values when the total count is even)
+    '''
+    total = sum(counts.values())
+    lower_rank, upper_rank = (total - 1) // 2, total // 2
+    lower = upper = None
+    seen = 0
+    for value in sorted(counts):
+        seen += counts[value]
+        if lower is None and seen > lower_rank:
+            lower = value
+        if seen > upper_rank:
+            upper = value
+            break
+    return (lower + upper) / 2
+
+def most_frequent_from_counts(counts: Counter):
+    '''
+    Most frequent value of a value -> count mapping, ties broken by the smallest value
+    like SimpleImputer(strategy="most_frequent")
+    '''
+    highest = max(counts.values())
+    return min(value for value, count in counts.items() if count == highest)
+
+class QuantileSketch:
+    '''
+    Fixed-memory quantile sketch over weighted centroids. While a column has at most
+    `capacity` distinct values the centroids are exact value counts (scores out of 100
+    never leave this mode); beyond that, neighbouring centroids are merged pairwise into
+    their weighted mean, which bounds the rank error of a quantile to about n / capacity.
+    '''
+    def __init__(self, capacity: int = 1000):
+        self.capacity = capacity
+        self.centroids = Counter()
+        self.count = 0
+        self.exact = True
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        unique, counts = np.unique(values, return_counts=True)
+        for value, count in zip(unique.tolist(), counts.tolist()):
+            self.centroids[value] += count
+        self.count += len(values)
+        if len(self.centroids) > 2 * self.capacity:
+            self._compress()
+        return self
+
+    def merge(self, other: 'QuantileSketch'):
+        self.centroids.update(other.centroids)
+        self.count += other.count
+        self.exact = self.exact and other.exact
+        if len(self.centroids) > 2 * self.capacity:
+            self._compress()
+        return self
+
+    def _compress(self):
+        while len(self.centroids) > self.capacity:
+            items = sorted(self.centroids.items())
+            merged = Counter()
+            for (value_a, weight_a), (value_b, weight_b) in zip(items[0::2], items[1::2]):
+                weight = weight_a + weight_b
+                merged[(value_a * weight_a + value_b * weight_b) / weight] += weight
+            if len(items) % 2:
+                merged[items[-1][0]] += items[-1][1]
+            self.centroids = merged
+        self.exact = False
+
+    def quantile(self, q: float) -> float:
+        target = q * self.count
+        seen = 0
+        for value, weight in sorted(self.centroids.items()):
+            seen += weight
+            if seen >= target:
+                return value
+        return max(self.centroids)
+
+    def median(self) -> float:
+        if self.exact:
+            return median_from_counts(self.centroids)
+        return self.quantile(0.5)
+
+class RunningMoments:
+    '''
+    Count, mean and sum of squared deviations of a stream of values, combined chunk by
+    chunk with Chan's parallel update so the result matches a single pass over all rows
+    '''
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if len(values):
+            self._combine(len(values), float(values.mean()), float(((values - values.mean()) ** 2).sum()))
+        return self
+
+    def update_constant(self, value: float, count: int):
+        '''
+        Adds `count` copies of one value, e.g. the imputed fill for missing entries
+        '''
+        if count:
+            self._combine(count, float(value), 0.0)
+        return self
+
+    def _combine(self, count, mean, m2):
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta ** 2 * self.count * count / total
+        self.count = total
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / self.count if self.count else 0.0
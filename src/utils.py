@@ -2,10 +2,15 @@ import os
 import sys
 import dill
 import time
-from sklearn.metrics import r2_score
+import shutil
+import tempfile
+from contextlib import contextmanager, nullcontext
+import numpy as np
 from src.exception import CustomException
 from src.logger import logging
-from sklearn.model_selection import GridSearchCV
+
+# sklearn, joblib and threadpoolctl are only needed for training, so they are imported inside
+# the training helpers below; the serving path only needs save_object/load_object.
 
 def save_object(file_path: str, obj: object) -> None:
     try:
@@ -25,61 +30,378 @@ def load_object(file_path: str) -> object:
         logging.info('Error in loading object')
         raise CustomException(e, sys)
 
-def evaluate_models(X_train, y_train, X_test, y_test, models, params):
+def iter_row_blocks(features, block_size: int):
+    '''
+    Yields fixed-size row blocks of a DataFrame, or of a CSV/Parquet file read chunk by chunk
+    when features is a path, so the whole input never has to be in memory at once
+    '''
+    import pandas as pd
+
+    if isinstance(features, str) and features.endswith('.parquet'):
+        # pyarrow is optional and only needed for Parquet sources
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(features).iter_batches(batch_size=block_size):
+            yield batch.to_pandas()
+    elif isinstance(features, str):
+        yield from pd.read_csv(features, chunksize=block_size)
+    else:
+        for start in range(0, len(features), block_size):
+            yield features.iloc[start:start + block_size]
+
+def transform_in_blocks(transformer, features, block_size: int = 10000, n_jobs=None):
+    '''
+    Applies a fitted transformer block by block, in parallel when n_jobs is set. Blocks are
+    taken in order as they finish, and dense results of a DataFrame are copied into one
+    output array allocated from the first block, so besides the output only the blocks in
+    flight are held. Sparse results and file input, whose row count is not known up front,
+    are collected and stacked at the end, which briefly needs twice the output. Empty input
+    gives an array with no rows.
+    '''
+    from joblib import Parallel, delayed
+    from scipy import sparse
+
+    try:
+        n_rows = None if isinstance(features, str) else len(features)
+        transformed = Parallel(n_jobs=n_jobs, return_as='generator')(
+            delayed(transformer.transform)(block) for block in iter_row_blocks(features, block_size) if len(block)
+        )
+        output, blocks, n_written = None, [], 0
+        for block in transformed:
+            if n_rows is None or sparse.issparse(block) or blocks:
+                if output is not None:
+                    # A sparse block after dense ones: stack everything instead
+                    blocks.append(output[:n_written])
+                    output = None
+                blocks.append(block)
+                continue
+            if output is None:
+                output = np.empty((n_rows, block.shape[1]), dtype=block.dtype)
+            output[n_written:n_written + block.shape[0]] = block
+            n_written += block.shape[0]
+
+        if output is not None:
+            return output
+        if not blocks:
+            return np.empty((0, len(transformer.get_feature_names_out())))
+        if any(sparse.issparse(block) for block in blocks):
+            return sparse.vstack(blocks).tocsr()
+        return np.vstack(blocks)
+    except Exception as e:
+        logging.info('Error in transforming blocks')
+        raise CustomException(e, sys)
+
+def get_cv_folds(n_samples: int, n_splits: int = 3) -> list:
+    '''
+    Train/validation index pairs computed once and reused for every candidate of every model,
+    identical to the folds GridSearchCV(cv=n_splits) builds for a regressor
+    '''
+    from sklearn.model_selection import KFold
+
+    return list(KFold(n_splits=n_splits).split(np.empty((n_samples, 1))))
+
+@contextmanager
+def shared_training_data(X_train, y_train):
+    '''
+    Writes the training matrix to a temporary .npy file and yields read-only memmaps of it.
+    joblib hands memmaps to search workers by file name, so every worker maps the same pages
+    instead of unpickling its own copy of the data.
+    '''
+    temp_dir = tempfile.mkdtemp(prefix='mlproject_cv_')
+    try:
+        X_path = os.path.join(temp_dir, 'X_train.npy')
+        y_path = os.path.join(temp_dir, 'y_train.npy')
+        np.save(X_path, np.ascontiguousarray(X_train))
+        np.save(y_path, np.ascontiguousarray(y_train))
+        yield np.load(X_path, mmap_mode='r'), np.load(y_path, mmap_mode='r')
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+class OutOfFoldRecorder:
+    '''
+    GridSearchCV scorer that returns R2 (the search's default score for regressors) and
+    writes each candidate's validation-fold predictions into a memmap shared with the
+    search workers. After the search, the row of the best candidate holds out-of-fold
+    predictions for every training row, without fitting anything again.
+
+    The validation rows reach the scorer as a copy, so their positions are passed along
+    through metadata routing: fit the search with sample_index=np.arange(n_samples) under
+    sklearn.config_context(enable_metadata_routing=True) and the scorer receives the
+    fold's test indices.
+    '''
+    def __init__(self, candidate_params, n_samples, file_path):
+        self.candidate_params = candidate_params
+        self.predictions = np.lib.format.open_memmap(
+            file_path, mode='w+', dtype=np.float64, shape=(len(candidate_params), n_samples)
+        )
+
+    def get_metadata_routing(self):
+        from sklearn.utils.metadata_routing import MetadataRequest
+
+        routing = MetadataRequest(owner=self.__class__.__name__)
+        routing.score.add_request(param='sample_index', alias=True)
+        return routing
+
+    def __call__(self, estimator, X, y_true, sample_index=None):
+        from sklearn.metrics import r2_score
+
+        if sample_index is None:
+            raise ValueError('OutOfFoldRecorder needs sample_index routed to it, see the class docstring')
+        y_pred = estimator.predict(X)
+        params = estimator.get_params()
+        candidate = next(
+            index for index, candidate_params in enumerate(self.candidate_params)
+            if all(params[name] == value for name, value in candidate_params.items())
+        )
+        self.predictions[candidate, np.asarray(sample_index)] = y_pred
+        return r2_score(y_true, y_pred)
+
+    def get_predictions(self, candidate: int):
+        return np.array(self.predictions[candidate])
+
+    @staticmethod
+    def supports(estimator) -> bool:
+        '''
+        Whether GridSearchCV can route sample_index past the estimator. GridSearchCV routes
+        metadata from scikit-learn 1.4 on, the last release for Python 3.8 is 1.3, and some
+        estimators (e.g. AdaBoostRegressor) refuse any routing.
+        '''
+        import sklearn
+
+        if tuple(int(part) for part in sklearn.__version__.split('.')[:2]) < (1, 4):
+            return False
+        from sklearn.utils.metadata_routing import get_routing_for_object
+
+        try:
+            get_routing_for_object(estimator)
+            return True
+        except NotImplementedError:
+            return False
+
+def evaluate_models(X_train, y_train, X_test, y_test, models, params, n_jobs=None, thread_plans=None,
+                    return_oof=False, search_details=None):
 # def evaluate_models(X_train, y_train, X_test, y_test, models):
+    '''
+    Grid-searches each model on shared memory-mapped folds, refits it with the best
+    parameters and returns its test R2 by name. When search_details is a dict it is filled
+    per model with the search's candidates (mean fit/score time, CV score, rank), best
+    parameters, wall time, and the CPU time and peak RSS of the search and refit summed
+    over this process and its search workers (see ProcessTreeMonitor), for the run report.
+    '''
+    from sklearn import config_context
+    from sklearn.base import clone
+    from sklearn.metrics import r2_score
+    from sklearn.model_selection import GridSearchCV, ParameterGrid, cross_val_predict
+    from src.resources import apply_thread_plan, thread_limits, ProcessTreeMonitor
+
     try:
         report = {}
+        oof_predictions = {}
         total_start_time = time.time()
-        
-        for i in range(len(list(models))):
-            iteration_start_time = time.time()
-            model_name = list(models.keys())[i]
-            print(f'Evaluating MODEL NAME: {model_name}')
-            logging.info(f'Starting evaluation for model: {model_name}')
-            
-            model = list(models.values())[i]
-            param_settings = params[list(models.keys())[i]]
-            
-            # Time GridSearchCV
-            gs_start_time = time.time()
-            gs = GridSearchCV(model, param_settings, cv=3)
-            gs.fit(X_train, y_train)
-            gs_time = time.time() - gs_start_time
-            
-            print(f'Best Params for {model_name}: {gs.best_params_}')
-            print(f'GridSearchCV completed in {gs_time:.2f} seconds')
-            logging.info(f'GridSearchCV for {model_name} completed in {gs_time:.2f} seconds')
-            
-            # Time final model training
-            training_start_time = time.time()
-            model.set_params(**gs.best_params_)
-            model.fit(X_train, y_train)
-            training_time = time.time() - training_start_time
-            
-            print(f'Model {model_name} trained in {training_time:.2f} seconds')
-            logging.info(f'Final training for {model_name} completed in {training_time:.2f} seconds')
-            
-            # Time prediction
-            prediction_start_time = time.time()
-            y_test_pred = model.predict(X_test)
-            prediction_time = time.time() - prediction_start_time
-            
-            test_model_score = r2_score(y_test, y_test_pred)
-            iteration_time = time.time() - iteration_start_time
-            
-            print(f'Prediction completed in {prediction_time:.2f} seconds')
-            print(f'Total time for {model_name}: {iteration_time:.2f} seconds')
-            logging.info(f'Prediction for {model_name} completed in {prediction_time:.2f} seconds')
-            logging.info(f'Total iteration time for {model_name}: {iteration_time:.2f} seconds')
-            
-            report[model_name] = test_model_score
-        
+        cv_folds = get_cv_folds(len(y_train))
+
+        with shared_training_data(X_train, y_train) as (X_shared, y_shared):
+            for i in range(len(list(models))):
+                iteration_start_time = time.time()
+                model_name = list(models.keys())[i]
+                print(f'Evaluating MODEL NAME: {model_name}')
+                logging.info(f'Starting evaluation for model: {model_name}')
+
+                model = list(models.values())[i]
+                param_settings = params[list(models.keys())[i]]
+
+                # Per-model split between search workers and library threads, when planned
+                plan = thread_plans.get(model_name) if thread_plans else None
+                search_n_jobs = plan.search_n_jobs if plan else n_jobs
+
+                # Optionally keep the out-of-fold predictions the search computes anyway
+                recorder = None
+                if return_oof and OutOfFoldRecorder.supports(model):
+                    recorder = OutOfFoldRecorder(
+                        list(ParameterGrid(param_settings)), len(y_shared),
+                        os.path.join(os.path.dirname(X_shared.filename), f'oof_{i}.npy')
+                    )
+
+                with ProcessTreeMonitor() as monitor:
+                    with thread_limits(plan) if plan else nullcontext():
+                        # Time GridSearchCV
+                        gs_start_time = time.time()
+                        gs = GridSearchCV(
+                            model, param_settings, cv=cv_folds, n_jobs=search_n_jobs, scoring=recorder, refit=False
+                        )
+                        if recorder is not None:
+                            # Routes each validation fold's row positions to the recorder
+                            with config_context(enable_metadata_routing=True):
+                                gs.fit(X_shared, y_shared, sample_index=np.arange(len(y_shared)))
+                        else:
+                            gs.fit(X_shared, y_shared)
+                        gs_time = time.time() - gs_start_time
+                        if recorder is not None:
+                            oof_predictions[model_name] = recorder.get_predictions(gs.best_index_)
+                        elif return_oof:
+                            # Without routing the folds cannot be told apart, so the best
+                            # candidate's out-of-fold predictions are computed on the same folds
+                            logging.info(f'{model_name} does not support metadata routing, refitting its folds')
+                            oof_predictions[model_name] = cross_val_predict(
+                                clone(model).set_params(**gs.best_params_), X_shared, y_shared,
+                                cv=cv_folds, n_jobs=search_n_jobs
+                            )
+
+                        print(f'Best Params for {model_name}: {gs.best_params_}')
+                        print(f'GridSearchCV completed in {gs_time:.2f} seconds')
+                        logging.info(f'GridSearchCV for {model_name} completed in {gs_time:.2f} seconds')
+
+                    # Time final model training. GridSearchCV does not refit: the search
+                    # workers are done by now, so the final fit gets the plan's refit threads,
+                    # after which the model goes back to its library threads
+                    training_start_time = time.time()
+                    model.set_params(**gs.best_params_)
+                    if plan:
+                        apply_thread_plan(model, plan, refit=True)
+                    with thread_limits(plan, refit=True) if plan else nullcontext():
+                        model.fit(X_train, y_train)
+                    if plan:
+                        apply_thread_plan(model, plan)
+                    training_time = time.time() - training_start_time
+
+                print(f'Model {model_name} trained in {training_time:.2f} seconds')
+                logging.info(f'Final training for {model_name} completed in {training_time:.2f} seconds')
+
+                # Time prediction
+                prediction_start_time = time.time()
+                y_test_pred = model.predict(X_test)
+                prediction_time = time.time() - prediction_start_time
+
+                test_model_score = r2_score(y_test, y_test_pred)
+                iteration_time = time.time() - iteration_start_time
+
+                print(f'Prediction completed in {prediction_time:.2f} seconds')
+                print(f'Total time for {model_name}: {iteration_time:.2f} seconds')
+                logging.info(f'Prediction for {model_name} completed in {prediction_time:.2f} seconds')
+                logging.info(f'Total iteration time for {model_name}: {iteration_time:.2f} seconds')
+
+                report[model_name] = test_model_score
+
+                if search_details is not None:
+                    cv_results = gs.cv_results_
+                    search_details[model_name] = {
+                        'best_params': gs.best_params_,
+                        'cv_score': float(gs.best_score_),
+                        'test_r2': test_model_score,
+                        'search_n_jobs': search_n_jobs,
+                        'wall_s': iteration_time,
+                        'search_wall_s': gs_time,
+                        'fit_wall_s': training_time,
+                        'cpu_s': monitor.usage['cpu_s'],
+                        'peak_rss_mb': monitor.usage['peak_rss_mb'],
+                        'processes': monitor.usage['processes'],
+                        'candidates': [
+                            {
+                                'params': cv_results['params'][index],
+                                'mean_fit_time': float(cv_results['mean_fit_time'][index]),
+                                'mean_score_time': float(cv_results['mean_score_time'][index]),
+                                'cv_score': float(cv_results['mean_test_score'][index]),
+                                'rank': int(cv_results['rank_test_score'][index]),
+                            }
+                            for index in range(len(cv_results['params']))
+                        ],
+                    }
+
         total_time = time.time() - total_start_time
         print(f'Total evaluation time: {total_time:.2f} seconds')
         logging.info(f'Total model evaluation time: {total_time:.2f} seconds')
-        
+
+        if return_oof:
+            return report, oof_predictions
         return report
     except Exception as e:
         logging.info('Error in evaluating models')
         raise CustomException(e, sys)
 
+def get_model_costs(models, X_test, n_repeats: int = 50) -> dict:
+    '''
+    Serving cost of each fitted model: median single-row predict latency, batch predict
+    latency per row over X_test (both in milliseconds) and serialized size in bytes
+    '''
+    try:
+        costs = {}
+        single_row = X_test[:1]
+        for model_name, model in models.items():
+            model.predict(single_row)  # warm-up, first calls pay one-off setup costs
+
+            single_row_times = []
+            for _ in range(n_repeats):
+                start_time = time.perf_counter()
+                model.predict(single_row)
+                single_row_times.append(time.perf_counter() - start_time)
+
+            start_time = time.perf_counter()
+            model.predict(X_test)
+            batch_time = time.perf_counter() - start_time
+
+            costs[model_name] = {
+                'single_row_latency_ms': float(np.median(single_row_times)) * 1000,
+                'batch_latency_ms_per_row': batch_time * 1000 / len(X_test),
+                'size_bytes': len(dill.dumps(model)),
+            }
+        return costs
+    except Exception as e:
+        logging.info('Error in measuring model costs')
+        raise CustomException(e, sys)
+
+def get_pareto_front(model_metrics: dict) -> list:
+    '''
+    Models not dominated by any other on (higher r2, lower single-row latency, smaller size)
+    '''
+    def dominates(a, b):
+        no_worse = (a['r2'] >= b['r2'] and a['single_row_latency_ms'] <= b['single_row_latency_ms']
+                    and a['size_bytes'] <= b['size_bytes'])
+        better = (a['r2'] > b['r2'] or a['single_row_latency_ms'] < b['single_row_latency_ms']
+                  or a['size_bytes'] < b['size_bytes'])
+        return no_worse and better
+
+    return [
+        name for name, metrics in model_metrics.items()
+        if not any(dominates(other, metrics) for other in model_metrics.values())
+    ]
+
+def select_best_model(model_metrics: dict, selection_mode: str = 'r2', max_latency_ms: float = None,
+                      max_size_bytes: int = None, r2_tolerance: float = 0.005) -> str:
+    '''
+    Picks the model to ship from per-model metrics (r2, single_row_latency_ms, size_bytes).
+
+    'r2': highest test R2, the original behaviour.
+    'budget': highest R2 among models within max_latency_ms and max_size_bytes, falling back
+        to the highest R2 overall when nothing fits the budget.
+    'pareto': among the Pareto front, the cheapest model (lowest latency, then size) whose R2
+        is within r2_tolerance of the best.
+    '''
+    try:
+        def by_r2(name):
+            return model_metrics[name]['r2']
+
+        if selection_mode == 'r2':
+            return max(model_metrics, key=by_r2)
+
+        if selection_mode == 'budget':
+            within_budget = [
+                name for name, metrics in model_metrics.items()
+                if (max_latency_ms is None or metrics['single_row_latency_ms'] <= max_latency_ms)
+                and (max_size_bytes is None or metrics['size_bytes'] <= max_size_bytes)
+            ]
+            if not within_budget:
+                logging.info('No model fits the latency/size budget, selecting by R2')
+                return max(model_metrics, key=by_r2)
+            return max(within_budget, key=by_r2)
+
+        if selection_mode == 'pareto':
+            front = get_pareto_front(model_metrics)
+            best_r2 = max(by_r2(name) for name in front)
+            acceptable = [name for name in front if by_r2(name) >= best_r2 - r2_tolerance]
+            return min(acceptable, key=lambda name: (model_metrics[name]['single_row_latency_ms'],
+                                                     model_metrics[name]['size_bytes']))
+
+        raise ValueError(f'Unknown selection mode: {selection_mode}')
+    except Exception as e:
+        logging.info('Error in selecting best model')
+        raise CustomException(e, sys)
@@ -0,0 +1,364 @@
+"""
+Test suite for app.py.
+
+This module tests the prediction form built from the fitted categories
+and content negotiation between HTML and JSON responses.
+"""
+import os
+import pytest
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+import app as app_module
+import src.pipeline.predict_pipeline as predict_pipeline_module
+from src.components.data_transformation import DataTransformation
+from src.pipeline.drift_monitor import DriftMonitorConfig
+from src.pipeline.predict_pipeline import PredictPipelineConfig
+from src.utils import save_object
+
+SOURCE_CSV = os.path.join(os.path.dirname(__file__), '..', 'notebook', 'data', 'stud.csv')
+
+VALID_FORM = {
+    "gender": "male",
+    "race_ethnicity": "group C",
+    "parental_level_of_education": "high school",
+    "lunch": "standard",
+    "test_preparation_course": "none",
+    "reading_score": "50",
+    "writing_score": "33",
+}
+
+
+@pytest.fixture
+def client(temp_dir, monkeypatch):
+    """Flask test client serving a preprocessor and linear model saved to a temporary directory."""
+    df = pd.read_csv(SOURCE_CSV)
+    transformation = DataTransformation()
+    target = transformation.data_transformation_config.target_columns[0]
+    preprocessor = transformation.get_data_transformer_object()
+    model = LinearRegression().fit(preprocessor.fit_transform(df.drop(columns=[target])), df[target])
+
+    preprocessor_path = os.path.join(temp_dir, 'preprocessor.pkl')
+    model_path = os.path.join(temp_dir, 'model.pkl')
+    save_object(preprocessor_path, preprocessor)
+    save_object(model_path, model)
+    monkeypatch.setattr(PredictPipelineConfig, 'preprocessor_file_path', preprocessor_path)
+    monkeypatch.setattr(PredictPipelineConfig, 'model_file_path', model_path)
+    monkeypatch.setattr(predict_pipeline_module, '_model_manager', None)
+    monkeypatch.setattr(PredictPipelineConfig, 'bundle_dir', os.path.join(temp_dir, 'models'))
+    monkeypatch.setattr(app_module, '_form_html', {})
+    monkeypatch.setattr(app_module, '_drift_monitor', None)
+    stats_path = os.path.join(temp_dir, 'preprocessor_stats.pkl')
+    save_object(stats_path, transformation.get_preprocessor_statistics(df))
+    monkeypatch.setattr(DriftMonitorConfig, 'reference_stats_file_path', stats_path)
+    return app_module.app.test_client()
+
+
+class TestPredictForm:
+    """Test cases for the HTML form path."""
+
+    def test_options_come_from_fitted_categories(self, client):
+        """Test that the form lists every fitted category once."""
+        html = client.get('/predictdata').data.decode()
+
+        assert html.count('<option value=') == 2 + 5 + 6 + 2 + 2
+        assert '<option value="group E">Group E</option>' in html
+
+    def test_single_target_button_is_neutral(self, client):
+        """Test that a single-target bundle's button does not name a score it may not predict."""
+        html = client.get('/predictdata').data.decode()
+
+        assert 'type="submit" value="Predict"' in html
+        assert 'Maths Score' not in html
+
+    def test_form_fragment_is_rendered_once(self, client):
+        """Test that later requests reuse the cached form markup."""
+        client.get('/predictdata')
+        cached = app_module._form_html[None]
+        client.post('/predictdata', data=VALID_FORM)
+        assert app_module._form_html[None] is cached
+
+    def test_form_follows_model_key(self, client, temp_dir):
+        """Test that ?model= renders that bundle's form, posting back to the same bundle."""
+        from src.pipeline.predict_pipeline import publish_model_bundle
+
+        publish_model_bundle('other', os.path.join(temp_dir, 'preprocessor.pkl'), os.path.join(temp_dir, 'model.pkl'))
+        html = client.get('/predictdata?model=other').data.decode()
+
+        assert 'action="/predictdata?model=other"' in html
+        assert 'action="/predictdata"' in client.get('/predictdata').data.decode()
+        assert client.get('/predictdata?model=missing').status_code == 404
+
+    def test_republished_model_gets_a_new_form(self, client, temp_dir):
+        """Test that the form is rebuilt from the categories of a newly published default version."""
+        from src.pipeline.predict_pipeline import publish_model_bundle
+
+        assert 'group E' in client.get('/predictdata').data.decode()
+        df = pd.read_csv(SOURCE_CSV)
+        df = df[df['race_ethnicity'] != 'group E']
+        preprocessor = DataTransformation().get_data_transformer_object().fit(df.drop(columns=['math_score']))
+        save_object(os.path.join(temp_dir, 'retrained', 'preprocessor.pkl'), preprocessor)
+        publish_model_bundle('default', os.path.join(temp_dir, 'retrained', 'preprocessor.pkl'),
+                             os.path.join(temp_dir, 'model.pkl'))
+
+        assert 'group E' not in client.get('/predictdata').data.decode()
+
+    def test_html_prediction_is_rounded(self, client):
+        """Test that the HTML response shows a rounded prediction."""
+        html = client.post('/predictdata', data=VALID_FORM).data.decode()
+        assert 'prediction is' in html
+        assert 'np.float64' not in html
+
+
+class TestContentNegotiation:
+    """Test cases for JSON responses from /predictdata."""
+
+    def test_accept_header_returns_json(self, client):
+        """Test that Accept: application/json skips HTML rendering."""
+        response = client.post('/predictdata', data=VALID_FORM, headers={'Accept': 'application/json'})
+        assert response.is_json
+        assert isinstance(response.get_json()['prediction'], float)
+
+    def test_json_body_matches_form_prediction(self, client):
+        """Test that a JSON body gives the same prediction as the form."""
+        from_form = client.post('/predictdata', data=VALID_FORM, headers={'Accept': 'application/json'})
+        from_json = client.post('/predictdata', json=VALID_FORM)
+        assert np.isclose(from_form.get_json()['prediction'], from_json.get_json()['prediction'])
+
+    def test_invalid_json_request_returns_json_errors(self, client):
+        """Test that validation errors are returned as JSON for JSON clients."""
+        response = client.post('/predictdata', json={**VALID_FORM, 'gender': 'unknown'})
+        assert response.status_code == 400
+        assert response.get_json()['errors'][0]['field'] == 'gender'
+
+
+class TestBatchEndpoint:
+    """Test cases for /predictbatch."""
+
+    def test_empty_batch_returns_no_predictions(self, client):
+        """Test that an empty list is answered with an empty result, not a server error."""
+        response = client.post('/predictbatch', json=[])
+        assert response.status_code == 200
+        assert response.get_json() == {'predictions': []}
+
+
+class TestModelRouting:
+    """Test cases for routing requests by model key."""
+
+    def test_unknown_model_returns_404(self, client):
+        """Test that a request for a missing bundle is rejected before validation."""
+        response = client.post('/predictdata?model=missing', json=VALID_FORM)
+        assert response.status_code == 404
+        assert client.post('/predictbatch?model=missing', json=[VALID_FORM]).status_code == 404
+
+    def test_bundle_is_resolved_once_per_request(self, client, monkeypatch):
+        """Test that form, validation, prediction and drift monitoring share one bundle lookup."""
+        # The first request also builds the drift monitor, once per model version
+        client.post('/predictdata', data=VALID_FORM)
+        manager = predict_pipeline_module.get_model_manager()
+        lookups = []
+        get = manager.get
+        monkeypatch.setattr(manager, 'get', lambda model_key=None: lookups.append(model_key) or get(model_key))
+
+        for send in (lambda: client.get('/predictdata'), lambda: client.post('/predictdata', data=VALID_FORM),
+                     lambda: client.post('/predictbatch', json=[VALID_FORM])):
+            lookups.clear()
+            assert send().status_code == 200
+            assert lookups == [None]
+
+    def test_models_endpoint_reports_resident_bundles(self, client):
+        """Test that /models lists the bundles loaded by earlier requests."""
+        client.post('/predictbatch', json=[VALID_FORM])
+        described = client.get('/models').get_json()
+        assert list(described['resident']) == ['default']
+        assert described['loads'] == 1
+
+
+class TestShadowEndpoint:
+    """Test cases for shadow evaluation in the app."""
+
+    def test_shadow_disabled_by_default(self, client):
+        """Test that /shadow reports shadowing as disabled without a candidate."""
+        assert client.get('/shadow').get_json() == {'enabled': False}
+
+    def test_shadow_scores_live_requests(self, client, temp_dir, monkeypatch):
+        """Test that requests served by the default model are scored by the candidate."""
+        from src.pipeline.predict_pipeline import publish_model_bundle
+        from src.pipeline.shadow import ShadowConfig
+
+        publish_model_bundle('candidate', os.path.join(temp_dir, 'preprocessor.pkl'), os.path.join(temp_dir, 'model.pkl'))
+        monkeypatch.setattr(ShadowConfig, 'candidate_model_key', 'candidate')
+        monkeypatch.setattr(ShadowConfig, 'sample_rate', 1.0)
+        monkeypatch.setattr(app_module, '_shadow_evaluator', None)
+
+        client.post('/predictbatch', json=[VALID_FORM, VALID_FORM])
+        assert app_module.get_shadow_evaluator().wait(timeout=10)
+
+        summary = client.get('/shadow').get_json()
+        assert summary['rows'] == 2
+        assert summary['max_abs_delta'] == pytest.approx(0.0)
+
+
+class TestDriftEndpoint:
+    """Test cases for input drift monitoring in the app."""
+
+    def test_requests_feed_the_drift_monitor(self, client):
+        """Test that validated rows from both endpoints are observed."""
+        client.post('/predictdata', json=VALID_FORM)
+        client.post('/predictbatch', json=[VALID_FORM] * 3)
+
+        current = client.get('/drift').get_json()['current_window']
+        assert current['rows'] == 4
+        assert current['columns']['gender']['unseen'] == 0
+
+    def test_reference_statistics_published_later_are_picked_up(self, client, temp_dir):
+        """Test that a missing statistics file is not cached and a republished model gets a new monitor."""
+        from src.pipeline.predict_pipeline import publish_model_bundle
+
+        stats_path = os.path.join(temp_dir, 'preprocessor_stats.pkl')
+        os.rename(stats_path, stats_path + '.bak')
+        assert client.get('/drift').get_json() == {'enabled': False}
+
+        os.rename(stats_path + '.bak', stats_path)
+        client.post('/predictdata', json=VALID_FORM)
+        assert client.get('/drift').get_json()['current_window']['rows'] == 1
+
+        publish_model_bundle('default', os.path.join(temp_dir, 'preprocessor.pkl'), os.path.join(temp_dir, 'model.pkl'))
+        assert client.get('/drift').get_json()['current_window'] is None
+
+    def test_monitor_is_kept_for_the_same_version(self, client, monkeypatch):
+        """Test that requests for an unchanged model version reuse the monitor without checking the statistics."""
+        client.post('/predictdata', json=VALID_FORM)
+        monkeypatch.setattr(app_module.DriftMonitor, 'from_artifacts', lambda: pytest.fail('monitor rebuilt'))
+        monkeypatch.setattr(app_module.os, 'stat', lambda *args, **kwargs: pytest.fail('statistics checked'))
+
+        client.post('/predictdata', json=VALID_FORM)
+        assert client.get('/drift').get_json()['current_window']['rows'] == 2
+
+    def test_routed_models_are_not_monitored(self, client, temp_dir):
+        """Test that traffic for other bundles does not mix into the default model's window."""
+        from src.pipeline.predict_pipeline import publish_model_bundle
+
+        publish_model_bundle('other', os.path.join(temp_dir, 'preprocessor.pkl'), os.path.join(temp_dir, 'model.pkl'))
+        client.post('/predictbatch?model=other', json=[VALID_FORM])
+        assert client.get('/drift').get_json()['current_window'] is None
+
+
+class TestMultiTargetScores:
+    """Test cases for predicting every score from one request."""
+
+    TARGETS = ['math_score', 'reading_score', 'writing_score']
+
+    @pytest.fixture
+    def scores_client(self, client, temp_dir):
+        """Client with a 'scores' bundle predicting all three scores from the categorical fields."""
+        from src.components.model_trainer import MultiTargetRegressor
+        from src.pipeline.predict_pipeline import publish_model_bundle
+
+        df = pd.read_csv(SOURCE_CSV)
+        transformation = DataTransformation()
+        transformation.data_transformation_config.target_columns = self.TARGETS
+        preprocessor = transformation.get_data_transformer_object()
+        features = preprocessor.fit_transform(df.drop(columns=self.TARGETS))
+        model = MultiTargetRegressor(self.TARGETS, [LinearRegression().fit(features, df[target]) for target in self.TARGETS])
+
+        save_object(os.path.join(temp_dir, 'scores_preprocessor.pkl'), preprocessor)
+        save_object(os.path.join(temp_dir, 'scores_model.pkl'), model)
+        publish_model_bundle('scores', os.path.join(temp_dir, 'scores_preprocessor.pkl'),
+                             os.path.join(temp_dir, 'scores_model.pkl'))
+        return client
+
+    def test_one_request_returns_every_score(self, scores_client):
+        """Test that the categorical fields alone return all three scores."""
+        payload = {key: value for key, value in VALID_FORM.items() if not key.endswith('_score')}
+        body = scores_client.post('/predictdata?model=scores', json=payload).get_json()
+
+        assert list(body['scores']) == self.TARGETS
+        assert body['prediction'] == body['scores']['math_score']
+        assert all(0 < score < 100 for score in body['scores'].values())
+
+    def test_batch_returns_every_score(self, scores_client):
+        """Test that the batch endpoint returns one list per score."""
+        body = scores_client.post('/predictbatch?model=scores', json=[VALID_FORM, VALID_FORM]).get_json()
+
+        assert {target: len(values) for target, values in body['scores'].items()} == dict.fromkeys(self.TARGETS, 2)
+        assert body['predictions'] == body['scores']['math_score']
+
+    def test_empty_batch_returns_empty_scores(self, scores_client):
+        """Test that an empty batch returns an empty list per score."""
+        body = scores_client.post('/predictbatch?model=scores', json=[]).get_json()
+        assert body == {'predictions': [], 'scores': dict.fromkeys(self.TARGETS, [])}
+
+    def test_features_are_preprocessed_once_per_request(self, scores_client, monkeypatch):
+        """Test that all scores come from a single preprocessor transform."""
+        bundle = predict_pipeline_module.get_model_manager().get('scores')
+        calls = []
+        transform = bundle.preprocessor.transform
+        monkeypatch.setattr(bundle.preprocessor, 'transform', lambda X: calls.append(len(X)) or transform(X))
+
+        scores_client.post('/predictbatch?model=scores', json=[VALID_FORM] * 4)
+        assert calls == [4]
+
+    def test_form_button_names_every_score(self, scores_client):
+        """Test that a multi-target bundle's button names the scores it predicts."""
+        html = scores_client.get('/predictdata?model=scores').data.decode()
+        assert 'value="Predict Math Score, Reading Score and Writing Score"' in html
+
+    def test_single_target_response_is_unchanged(self, scores_client):
+        """Test that the default single-target bundle answers without scores."""
+        assert 'scores' not in scores_client.post('/predictdata', json=VALID_FORM).get_json()
+
+
+class TestAdminEndpoints:
+    """Test cases for the training job admin endpoints."""
+
+    @pytest.fixture
+    def admin(self, client, temp_dir, monkeypatch):
+        """Admin headers, with jobs queued in a temporary directory."""
+        from src.pipeline.job_runner import JobRunner, JobRunnerConfig
+
+        monkeypatch.setenv('ADMIN_TOKEN', 'secret')
+        monkeypatch.setattr(app_module, '_job_runner', JobRunner(JobRunnerConfig(jobs_dir=os.path.join(temp_dir, 'jobs'))))
+        return {'X-Admin-Token': 'secret'}
+
+    def test_admin_requires_token(self, client, admin, monkeypatch):
+        """Test that admin endpoints reject a wrong token and are off without ADMIN_TOKEN."""
+        assert client.post('/admin/train', headers={'X-Admin-Token': 'wrong'}).status_code == 403
+        monkeypatch.delenv('ADMIN_TOKEN')
+        assert client.get('/admin/jobs', headers=admin).status_code == 403
+
+    def test_train_queues_job_without_running_it(self, client, admin):
+        """Test that a retrain request returns at once with a queued job."""
+        response = client.post('/admin/train', json={'force': True}, headers=admin)
+        assert response.status_code == 202
+        job = response.get_json()
+        assert job['status'] == 'queued'
+
+        status = client.get(f"/admin/jobs/{job['job_id']}", headers=admin).get_json()
+        assert status['options']['force'] is True
+        assert [job['job_id'] for job in client.get('/admin/jobs', headers=admin).get_json()['jobs']] == [job['job_id']]
+
+    def test_cancel_job(self, client, admin):
+        """Test that a queued job can be cancelled once and unknown jobs return 404."""
+        job_id = client.post('/admin/train', headers=admin).get_json()['job_id']
+
+        response = client.post(f'/admin/jobs/{job_id}/cancel', headers=admin)
+        assert response.get_json()['cancel_requested'] is True
+        assert client.get('/admin/jobs/missing', headers=admin).status_code == 404
+        assert client.post('/admin/jobs/missing/cancel', headers=admin).status_code == 404
+
+    def test_invalid_publish_key_is_rejected(self, client, admin):
+        """Test that publish_as must be a valid model key and targets a list of names."""
+        response = client.post('/admin/train', json={'publish_as': '../default'}, headers=admin)
+        assert response.status_code == 400
+        assert client.post('/admin/train', json={'targets': 'math_score'}, headers=admin).status_code == 400
+
+    def test_train_passes_targets(self, client, admin):
+        """Test that the scores to predict are recorded on the queued job."""
+        targets = ['math_score', 'reading_score']
+        job = client.post('/admin/train', json={'targets': targets}, headers=admin).get_json()
+        assert job['options']['targets'] == targets
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,144 @@
+"""
+Test suite for data_ingestion.py module.
+
+This module tests the hash-based train/test split, the dataset manifest
+written to artifacts and keeping incrementally appended rows.
+"""
+import os
+import runpy
+import shutil
+import pytest
+import pandas as pd
+from src.components.data_ingestion import DataIngestion, DataIngestionConfig
+import src.components.data_ingestion as data_ingestion_module
+
+SOURCE_CSV = os.path.join(os.path.dirname(__file__), '..', 'notebook', 'data', 'stud.csv')
+
+
+@pytest.fixture
+def ingestion(temp_dir):
+    """DataIngestion in hash mode writing its artifacts to a temporary directory."""
+    config = DataIngestionConfig(
+        train_data_path=os.path.join(temp_dir, 'train.csv'),
+        test_data_path=os.path.join(temp_dir, 'test.csv'),
+        raw_data_path=os.path.join(temp_dir, 'data.csv'),
+        new_train_data_path=os.path.join(temp_dir, 'new_train.csv'),
+        appended_data_path=os.path.join(temp_dir, 'appended_data.csv'),
+        manifest_path=os.path.join(temp_dir, 'data_manifest.json'),
+        source_data_path=os.path.abspath(SOURCE_CSV),
+        split_mode='hash',
+    )
+    return DataIngestion(config)
+
+
+class TestHashSplit:
+    """Test cases for the hash-based split."""
+
+    def test_split_is_close_to_test_size(self, ingestion):
+        """Test that roughly test_size of the rows land in the test split."""
+        df = pd.read_csv(SOURCE_CSV)
+        assert abs(ingestion.get_hash_split_mask(df).mean() - 0.2) < 0.05
+
+    def test_appending_rows_does_not_move_existing_rows(self, ingestion):
+        """Test that a row's split is independent of the other rows."""
+        df = pd.read_csv(SOURCE_CSV)
+        mask_before = ingestion.get_hash_split_mask(df.iloc[:500])
+        mask_after = ingestion.get_hash_split_mask(df)
+        assert (mask_before == mask_after[:500]).all()
+
+
+class TestManifest:
+    """Test cases for the dataset manifest."""
+
+    def test_manifest_records_counts_and_fingerprint(self, ingestion):
+        """Test that ingestion writes row counts and a fingerprint."""
+        ingestion.initiate_data_ingestion()
+        manifest = ingestion.load_manifest()
+
+        counts = manifest['row_counts']
+        assert counts['raw'] == counts['train'] + counts['test'] == 1000
+        assert set(manifest['column_hashes']) == set(pd.read_csv(SOURCE_CSV).columns)
+        assert len(manifest['fingerprint']) == 64
+
+    def test_fingerprint_is_stable_and_tracks_new_rows(self, ingestion, temp_dir):
+        """Test that re-ingesting keeps the fingerprint and appending changes it."""
+        ingestion.initiate_data_ingestion()
+        first = ingestion.load_manifest()['fingerprint']
+        ingestion.initiate_data_ingestion()
+        assert ingestion.load_manifest()['fingerprint'] == first
+
+        new_rows_path = os.path.join(temp_dir, 'new_rows.csv')
+        pd.read_csv(SOURCE_CSV).head(5).to_csv(new_rows_path, index=False)
+        ingestion.initiate_incremental_ingestion(new_rows_path)
+        manifest = ingestion.load_manifest()
+        assert manifest['fingerprint'] != first
+        assert manifest['row_counts']['raw'] == 1005
+
+    def test_fingerprint_does_not_depend_on_the_checkout(self, ingestion, temp_dir, monkeypatch):
+        """Test that the same data ingested from two directories gets the same fingerprint."""
+        config = ingestion.ingestion_config
+        config.source_data_path = os.path.join('notebook', 'data', 'stud.csv')
+        manifests = []
+        for checkout in ('first', 'second'):
+            os.makedirs(os.path.join(temp_dir, checkout, 'notebook', 'data'))
+            shutil.copy(SOURCE_CSV, os.path.join(temp_dir, checkout, config.source_data_path))
+            monkeypatch.chdir(os.path.join(temp_dir, checkout))
+            ingestion.initiate_data_ingestion()
+            manifests.append(ingestion.load_manifest())
+
+        assert manifests[0]['source_path'] == config.source_data_path
+        assert manifests[0]['fingerprint'] == manifests[1]['fingerprint']
+
+    def test_incremental_batches_are_recorded_separately(self, ingestion, temp_dir):
+        """Test that incremental ingestion keeps the source fields and lists each appended batch."""
+        ingestion.initiate_data_ingestion()
+        source = ingestion.load_manifest()
+        new_rows_path = os.path.join(temp_dir, 'new_rows.csv')
+        for start in (0, 5):
+            pd.read_csv(SOURCE_CSV).iloc[start:start + 5].to_csv(new_rows_path, index=False)
+            ingestion.initiate_incremental_ingestion(new_rows_path)
+
+        manifest = ingestion.load_manifest()
+        assert (manifest['source_path'], manifest['source_sha256']) == (source['source_path'], source['source_sha256'])
+        assert [batch['rows'] for batch in manifest['appended_batches']] == [5, 5]
+        assert manifest['appended_batches'][0]['sha256'] != manifest['appended_batches'][1]['sha256']
+
+        ingestion.initiate_data_ingestion()
+        assert ingestion.load_manifest()['appended_batches'] == manifest['appended_batches']
+
+
+class TestIncrementalIngestion:
+    """Test cases for rows added by initiate_incremental_ingestion."""
+
+    def test_full_ingestion_keeps_appended_rows(self, ingestion, temp_dir):
+        """Test that a full re-ingestion splits the appended rows again instead of dropping them."""
+        ingestion.initiate_data_ingestion()
+        new_rows_path = os.path.join(temp_dir, 'new_rows.csv')
+        for start in (0, 5):
+            pd.read_csv(SOURCE_CSV).iloc[start:start + 5].to_csv(new_rows_path, index=False)
+            ingestion.initiate_incremental_ingestion(new_rows_path)
+
+        ingestion.initiate_data_ingestion()
+
+        config = ingestion.ingestion_config
+        assert len(pd.read_csv(config.appended_data_path)) == 10
+        assert len(pd.read_csv(config.raw_data_path)) == 1010
+        assert len(pd.read_csv(config.train_data_path)) + len(pd.read_csv(config.test_data_path)) == 1010
+        assert ingestion.load_manifest()['row_counts']['raw'] == 1010
+
+
+class TestEntryPoint:
+    """Test cases for running the module as a script."""
+
+    def test_script_runs_the_train_pipeline(self, monkeypatch):
+        """Test that the script trains through TrainPipeline, which publishes the model for serving."""
+        from src.pipeline.train_pipeline import TrainPipeline
+
+        runs = []
+        monkeypatch.setattr(TrainPipeline, 'run', lambda self, force=False: runs.append(force) or 'Model')
+        runpy.run_path(data_ingestion_module.__file__, run_name='__main__')
+        assert runs == [True]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
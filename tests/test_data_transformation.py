@@ -0,0 +1,133 @@
+"""
+Test suite for data_transformation.py module.
+
+This module tests the incremental preprocessor update and the streaming
+fit against a preprocessor fitted from scratch in memory, and transforming
+with several target columns.
+"""
+import os
+import pytest
+import numpy as np
+import pandas as pd
+from src.components.data_transformation import DataTransformation
+
+
+def make_frame(n_rows, seed):
+    """Build a small synthetic frame with the columns the preprocessor expects."""
+    rng = np.random.RandomState(seed)
+    return pd.DataFrame({
+        "gender": rng.choice(["female", "male"], n_rows),
+        "race_ethnicity": rng.choice(["group A", "group B", "group C"], n_rows),
+        "parental_level_of_education": rng.choice(["high school", "some college"], n_rows),
+        "lunch": rng.choice(["standard", "free/reduced"], n_rows),
+        "test_preparation_course": rng.choice(["none", "completed"], n_rows),
+        "reading_score": rng.randint(0, 101, n_rows).astype(float),
+        "writing_score": rng.randint(0, 101, n_rows).astype(float),
+    })
+
+
+class TestIncrementalUpdate:
+    """Test cases for update_data_transformer_object."""
+
+    def test_update_matches_full_refit(self):
+        """Test that updating from new rows gives the same transform as refitting."""
+        old_df, new_df = make_frame(200, seed=0), make_frame(50, seed=1)
+        new_df.loc[:4, "reading_score"] = np.nan
+
+        transformation = DataTransformation()
+        preprocessor = transformation.get_data_transformer_object()
+        preprocessor.fit(old_df)
+        statistics = transformation.get_preprocessor_statistics(old_df)
+
+        assert transformation.update_data_transformer_object(preprocessor, statistics, new_df)
+
+        combined_df = pd.concat([old_df, new_df], ignore_index=True)
+        refitted = transformation.get_data_transformer_object().fit(combined_df)
+        np.testing.assert_allclose(preprocessor.transform(combined_df), refitted.transform(combined_df))
+
+    def test_unseen_category_requires_rebuild(self):
+        """Test that an unseen category is reported instead of applied."""
+        old_df, new_df = make_frame(100, seed=0), make_frame(10, seed=1)
+        new_df.loc[0, "race_ethnicity"] = "group Z"
+
+        transformation = DataTransformation()
+        preprocessor = transformation.get_data_transformer_object().fit(old_df)
+        statistics = transformation.get_preprocessor_statistics(old_df)
+
+        assert transformation.update_data_transformer_object(preprocessor, statistics, new_df) is False
+        assert sum(statistics["gender"].values()) == 100
+
+
+class TestStreamingFit:
+    """Test cases for fit_streaming_data_transformer_object."""
+
+    def test_streaming_fit_matches_in_memory_fit(self, temp_dir):
+        """Test that a chunked single-pass fit transforms like an in-memory fit."""
+        df = make_frame(300, seed=2)
+        df.loc[:3, "writing_score"] = np.nan
+        df.loc[4:6, "lunch"] = np.nan
+        csv_path = os.path.join(temp_dir, "train.csv")
+        df.to_csv(csv_path, index=False)
+
+        transformation = DataTransformation()
+        transformation.data_transformation_config.transform_block_size = 64
+        streamed, statistics = transformation.fit_streaming_data_transformer_object(csv_path)
+        in_memory = transformation.get_data_transformer_object().fit(df)
+
+        np.testing.assert_allclose(streamed.transform(df), in_memory.transform(df), atol=1e-10)
+        assert sum(statistics["gender"].values()) == 300
+
+
+class TestMultiTarget:
+    """Test cases for transforming with several target columns."""
+
+    @pytest.fixture
+    def transformation(self, temp_dir):
+        """DataTransformation predicting all three scores, with train/test CSVs and artifacts in temp_dir."""
+        train_df = make_frame(200, seed=3).assign(math_score=np.arange(200.0))
+        test_df = make_frame(50, seed=4).assign(math_score=np.arange(50.0))
+        train_df.to_csv(os.path.join(temp_dir, "train.csv"), index=False)
+        test_df.to_csv(os.path.join(temp_dir, "test.csv"), index=False)
+
+        transformation = DataTransformation()
+        config = transformation.data_transformation_config
+        config.target_columns = ["math_score", "reading_score", "writing_score"]
+        config.preprocessor_obj_file_path = os.path.join(temp_dir, "preprocessor.pkl")
+        config.preprocessor_stats_file_path = os.path.join(temp_dir, "preprocessor_stats.pkl")
+        return transformation, train_df
+
+    def test_targets_are_dropped_from_features(self, transformation, temp_dir):
+        """Test that no target is an input and every target follows the features."""
+        transformation, train_df = transformation
+        train_arr, test_arr, _ = transformation.initiate_data_transformation(
+            os.path.join(temp_dir, "train.csv"), os.path.join(temp_dir, "test.csv")
+        )
+
+        assert transformation.get_feature_columns()[0] == []
+        assert train_arr.shape == (200, 11 + 3)
+        assert test_arr.shape == (50, 11 + 3)
+        np.testing.assert_array_equal(
+            train_arr[:, -3:], train_df[["math_score", "reading_score", "writing_score"]].to_numpy()
+        )
+
+    def test_categorical_only_output_is_dense(self, transformation):
+        """Test that one-hot columns alone still give a dense matrix the targets can be stacked onto."""
+        transformation, _ = transformation
+        source_csv = os.path.join(os.path.dirname(__file__), "..", "notebook", "data", "stud.csv")
+        df = pd.read_csv(source_csv).drop(columns=transformation.data_transformation_config.target_columns)
+
+        assert isinstance(transformation.get_data_transformer_object().fit_transform(df), np.ndarray)
+
+    def test_streaming_fit_matches_in_memory_fit(self, transformation, temp_dir):
+        """Test that the streamed variant produces the same multi-target arrays."""
+        transformation, _ = transformation
+        paths = os.path.join(temp_dir, "train.csv"), os.path.join(temp_dir, "test.csv")
+        in_memory = transformation.initiate_data_transformation(*paths)
+        streamed = transformation.initiate_streaming_data_transformation(*paths)
+
+        np.testing.assert_allclose(streamed[0], in_memory[0], atol=1e-10)
+        np.testing.assert_allclose(streamed[1], in_memory[1], atol=1e-10)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,89 @@
+"""
+Test suite for drift_monitor.py module.
+
+This module tests the population stability index and the streaming
+comparison of prediction inputs with the training statistics.
+"""
+import os
+import pytest
+import pandas as pd
+from src.components.data_transformation import DataTransformation
+from src.pipeline.drift_monitor import DriftMonitor, DriftMonitorConfig, population_stability_index
+
+SOURCE_CSV = os.path.join(os.path.dirname(__file__), '..', 'notebook', 'data', 'stud.csv')
+
+
+@pytest.fixture
+def training_df():
+    """The source data as training rows."""
+    return pd.read_csv(SOURCE_CSV)
+
+
+@pytest.fixture
+def monitor(training_df):
+    """DriftMonitor over statistics of the source data with 500-row windows."""
+    transformation = DataTransformation()
+    numerical_columns, categorical_columns = transformation.get_feature_columns()
+    config = DriftMonitorConfig()
+    config.window_size = 500
+    return DriftMonitor(
+        transformation.get_preprocessor_statistics(training_df),
+        categorical_columns,
+        numerical_columns,
+        config,
+    )
+
+
+class TestPopulationStabilityIndex:
+    """Test cases for population_stability_index."""
+
+    def test_identical_distributions(self):
+        """Test that identical histograms have zero PSI."""
+        assert population_stability_index([10, 20, 30], [1, 2, 3]) == pytest.approx(0.0)
+
+    def test_shifted_distribution(self):
+        """Test that moving mass between bins raises PSI."""
+        assert population_stability_index([50, 50], [90, 10]) > 0.25
+
+
+class TestDriftMonitor:
+    """Test cases for DriftMonitor."""
+
+    def test_training_like_traffic_does_not_drift(self, monitor, training_df):
+        """Test that rows drawn from the training data stay under the threshold."""
+        for record in training_df.sample(500, random_state=0).to_dict('records'):
+            monitor.observe(record)
+
+        report = monitor.get_report()['last_window']
+        assert report['rows'] == 500
+        assert not report['drifted']
+
+    def test_shifted_scores_and_new_categories_drift(self, monitor, training_df):
+        """Test that low scores and an unseen category are flagged."""
+        shifted = training_df.sample(500, random_state=0).assign(reading_score=10, lunch='packed')
+        for record in shifted.to_dict('records'):
+            monitor.observe(record)
+
+        report = monitor.get_report()['last_window']
+        assert set(report['drifted_columns']) == {'reading_score', 'lunch'}
+        assert report['columns']['lunch']['unseen'] == 500
+        assert report['columns']['reading_score']['quantiles']['p50'] == 10
+
+    def test_windows_reset(self, monitor, training_df):
+        """Test that a completed window starts a new, empty one."""
+        for record in training_df.head(600).to_dict('records'):
+            monitor.observe(record)
+
+        report = monitor.get_report()
+        assert report['last_window']['window'] == 1
+        assert report['current_window']['rows'] == 100
+
+    def test_observe_columns_matches_observe(self, monitor, training_df):
+        """Test that a column-oriented batch is observed row by row."""
+        rows = training_df.head(50)
+        monitor.observe_columns({column: rows[column].tolist() for column in rows.columns})
+        assert monitor.get_report()['current_window']['rows'] == 50
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
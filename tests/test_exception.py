@@ -235,5 +235,75 @@ class TestExceptionIntegration:
                 assert "20" in str(wrapped)
 
 
+class TestLazyCustomException:
+    """Test cases for lazy formatting, re-wrapping and structured fields."""
+
+    def test_message_is_formatted_only_when_read(self):
+        """Test that constructing the exception does not format the error."""
+        class CountingError(Exception):
+            calls = 0
+
+            def __str__(self):
+                CountingError.calls += 1
+                return "counted"
+
+        try:
+            raise CountingError()
+        except CountingError as e:
+            custom_exception = CustomException(e, sys)
+
+        assert CountingError.calls == 0
+        assert "counted" in str(custom_exception)
+        str(custom_exception)
+        assert CountingError.calls == 1
+
+    def test_rewrapping_keeps_first_location_and_cause(self):
+        """Test that wrapping a CustomException again returns the same instance."""
+        def load():
+            try:
+                raise KeyError("missing")
+            except Exception as e:
+                raise CustomException(e, sys)
+
+        def predict():
+            try:
+                load()
+            except Exception as e:
+                raise CustomException(e, sys)
+
+        with pytest.raises(CustomException) as exc_info:
+            predict()
+
+        assert exc_info.value.stage == "load"
+        assert isinstance(exc_info.value.__cause__, KeyError)
+        assert str(exc_info.value).count("Error occurred") == 1
+
+    def test_structured_fields(self):
+        """Test that stage, file and line are available for logging."""
+        try:
+            raise ValueError("bad value")
+        except ValueError as e:
+            custom_exception = CustomException(e, sys, stage="transformation")
+
+        fields = custom_exception.to_dict()
+        assert fields["stage"] == "transformation"
+        assert fields["file_name"] == __file__
+        assert fields["error_type"] == "ValueError"
+        assert isinstance(fields["line_number"], int)
+
+    def test_pickle_round_trip(self):
+        """Test that the exception survives pickling, e.g. from a worker process."""
+        import pickle
+
+        try:
+            raise ValueError("pickled")
+        except ValueError as e:
+            custom_exception = CustomException(e, sys)
+
+        restored = pickle.loads(pickle.dumps(custom_exception))
+        assert str(restored) == str(custom_exception)
+        assert restored.to_dict() == custom_exception.to_dict()
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
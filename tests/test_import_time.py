@@ -0,0 +1,57 @@
+"""
+Import-time regression tests.
+
+Each check imports a module in a fresh interpreter and asserts which heavy
+libraries it pulled in, so a stray top-level import on the serving path
+shows up as a failing test rather than a slower worker boot.
+"""
+import os
+import sys
+import json
+import subprocess
+import pytest
+
+REPO_ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+# Libraries the serving path should only load when the saved model is first used
+HEAVY_MODULES = ["catboost", "xgboost", "sklearn", "scipy", "pandas", "joblib", "threadpoolctl"]
+
+
+def import_in_fresh_interpreter(module_name):
+    """Import module_name in a new process and return the heavy modules it loaded and the time taken."""
+    code = (
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        f"import {module_name}\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"print(json.dumps({{'loaded': [m for m in {HEAVY_MODULES!r} if m in sys.modules], 'seconds': elapsed}}))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+class TestServingImports:
+    """The serving path must not import training or model libraries at module load."""
+
+    @pytest.mark.parametrize("module_name", ["app", "src.pipeline.predict_pipeline", "src.utils"])
+    def test_serving_modules_import_no_heavy_libraries(self, module_name):
+        """Test that serving modules leave heavy libraries for first use."""
+        assert import_in_fresh_interpreter(module_name)["loaded"] == []
+
+    def test_model_trainer_defers_estimator_libraries(self):
+        """Test that importing the trainer loads neither estimator nor threading libraries."""
+        loaded = import_in_fresh_interpreter("src.components.model_trainer")["loaded"]
+        assert "catboost" not in loaded
+        assert "xgboost" not in loaded
+        assert "joblib" not in loaded
+        assert "threadpoolctl" not in loaded
+
+    def test_predict_pipeline_import_is_fast(self):
+        """Test a generous wall-clock budget for importing the predict pipeline."""
+        assert import_in_fresh_interpreter("src.pipeline.predict_pipeline")["seconds"] < 1.0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
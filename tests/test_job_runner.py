@@ -0,0 +1,200 @@
+"""
+Test suite for job_runner.py module.
+
+This module tests the file-based training job queue and the worker that
+runs each job in a separate process and publishes its artifacts.
+"""
+import os
+import json
+import time
+import pytest
+from src.pipeline.job_runner import JobRunner, JobRunnerConfig
+from src.pipeline.train_pipeline import TrainPipeline
+
+
+def fake_run(self, force=False):
+    """Stands in for a full training run: writes artifacts into the job's workspace."""
+    # The runner publishes once the job has succeeded, so the run itself must not
+    assert self.train_pipeline_config.publish is False
+    with open(os.path.join('artifacts', 'model.pkl'), 'w') as file_obj:
+        file_obj.write(f'model trained in {os.getcwd()} nice {os.nice(0)}')
+    with open(os.path.join('artifacts', 'preprocessor.pkl'), 'w') as file_obj:
+        file_obj.write('preprocessor')
+    return 'Fake Regressor'
+
+
+def workspace_path(runner, job_id):
+    return os.path.join(runner.job_runner_config.jobs_dir, job_id, 'workspace')
+
+
+@pytest.fixture
+def runner(temp_dir):
+    """JobRunner with its jobs and live artifacts in a temporary directory."""
+    artifacts_dir = os.path.join(temp_dir, 'artifacts')
+    os.makedirs(artifacts_dir)
+    with open(os.path.join(artifacts_dir, 'model.pkl'), 'w') as file_obj:
+        file_obj.write('live model')
+    return JobRunner(JobRunnerConfig(
+        jobs_dir=os.path.join(temp_dir, 'jobs'), artifacts_dir=artifacts_dir,
+        bundle_dir=os.path.join(artifacts_dir, 'models'), nice=5, poll_interval_s=0.05,
+    ))
+
+
+def read_bundle_file(runner, model_key, name):
+    """Reads a file of the version a bundle's CURRENT pointer names, None if it has none."""
+    bundle_path = os.path.join(runner.job_runner_config.bundle_dir, model_key)
+    if not os.path.exists(os.path.join(bundle_path, 'CURRENT')):
+        return None
+    with open(os.path.join(bundle_path, 'CURRENT')) as file_obj:
+        version = file_obj.read()
+    with open(os.path.join(bundle_path, version, name)) as file_obj:
+        return file_obj.read()
+
+
+def read_live_model(runner):
+    """The model the default key serves: the published version, else the legacy artifacts pair."""
+    model = read_bundle_file(runner, 'default', 'model.pkl')
+    if model is None:
+        with open(os.path.join(runner.job_runner_config.artifacts_dir, 'model.pkl')) as file_obj:
+            model = file_obj.read()
+    return model
+
+
+class TestJobQueue:
+    """Test cases for submitting, inspecting and cancelling jobs."""
+
+    def test_submit_queues_job(self, runner):
+        """Test that a submitted job is queued with its options."""
+        job_id = runner.submit(force=True)
+        job = runner.status(job_id)
+
+        assert job['status'] == 'queued'
+        assert job['options']['force'] is True
+        assert [job['job_id'] for job in runner.list_jobs()] == [job_id]
+
+    def test_unknown_job(self, runner):
+        """Test that unknown or path-like job ids have no status and cannot be cancelled."""
+        assert runner.status('missing') is None
+        assert runner.status('../jobs') is None
+        assert runner.cancel('missing') is False
+
+    def test_cancelled_queued_job_is_skipped(self, runner, monkeypatch):
+        """Test that the worker marks a job cancelled before it starts without running it."""
+        monkeypatch.setattr(TrainPipeline, 'run', fake_run)
+        job_id = runner.submit()
+        assert runner.cancel(job_id)
+
+        runner.run_worker(once=True)
+
+        assert runner.status(job_id)['status'] == 'cancelled'
+        assert read_live_model(runner) == 'live model'
+        assert runner.cancel(job_id) is False
+
+
+class TestWorker:
+    """Test cases for running jobs in a separate process."""
+
+    def test_successful_job_publishes_artifacts(self, runner, monkeypatch):
+        """Test that a job trains in its workspace at a lower priority and then publishes a new default version."""
+        monkeypatch.setattr(TrainPipeline, 'run', fake_run)
+        job_id = runner.submit()
+
+        runner.run_worker(once=True)
+
+        job = runner.status(job_id)
+        assert job['status'] == 'succeeded'
+        assert job['model_name'] == 'Fake Regressor'
+        assert job['published']['model_key'] == 'default'
+        assert job['published']['files'] == ['model.pkl', 'preprocessor.pkl']
+        assert job['pid'] != os.getpid()
+        live_model = read_live_model(runner)
+        assert os.path.join(job_id, 'workspace') in live_model
+        assert live_model.endswith(f'nice {os.nice(0) + 5}')
+        assert read_bundle_file(runner, 'default', 'preprocessor.pkl') == 'preprocessor'
+        with open(os.path.join(runner.job_runner_config.bundle_dir, 'default', 'CURRENT')) as file_obj:
+            assert file_obj.read() == job['published']['version']
+
+    def test_finished_job_removes_its_workspace(self, runner, monkeypatch, temp_dir):
+        """Test that only the job record, log and result outlive a published job, and the source data is untouched."""
+        source_data_dir = os.path.join(temp_dir, 'notebook')
+        os.makedirs(source_data_dir)
+        open(os.path.join(source_data_dir, 'stud.csv'), 'w').close()
+        runner.job_runner_config.source_data_dir = source_data_dir
+        monkeypatch.setattr(TrainPipeline, 'run', fake_run)
+        job_id = runner.submit()
+
+        runner.run_worker(once=True)
+
+        assert runner.status(job_id)['status'] == 'succeeded'
+        assert not os.path.exists(workspace_path(runner, job_id))
+        assert {'job.json', 'job.log', 'result.json'} <= set(os.listdir(os.path.join(runner.job_runner_config.jobs_dir, job_id)))
+        assert os.listdir(source_data_dir) == ['stud.csv']
+
+    def test_publish_as_writes_model_bundle(self, runner, monkeypatch):
+        """Test that publish_as leaves the live model alone and publishes a named bundle."""
+        monkeypatch.setattr(TrainPipeline, 'run', fake_run)
+        job_id = runner.submit(publish_as='candidate')
+
+        runner.run_worker(once=True)
+
+        published = runner.status(job_id)['published']
+        assert published['model_key'] == 'candidate'
+        assert published['files'] == []
+        assert read_live_model(runner) == 'live model'
+        assert read_bundle_file(runner, 'candidate', 'preprocessor.pkl') == 'preprocessor'
+
+    def test_failed_job_publishes_nothing(self, runner, monkeypatch):
+        """Test that a job whose training raises is marked failed."""
+        def failing_run(self, force=False):
+            raise ValueError('training failed')
+
+        monkeypatch.setattr(TrainPipeline, 'run', failing_run)
+        job_id = runner.submit()
+
+        runner.run_worker(once=True)
+
+        job = runner.status(job_id)
+        assert job['status'] == 'failed'
+        assert job['exit_code'] != 0
+        assert read_live_model(runner) == 'live model'
+        assert not os.path.exists(workspace_path(runner, job_id))
+        with open(os.path.join(runner.job_runner_config.jobs_dir, job_id, 'job.log')) as file_obj:
+            assert 'training failed' in file_obj.read()
+
+    def test_cancel_terminates_running_job(self, runner, monkeypatch):
+        """Test that cancelling a running job stops its process without publishing."""
+        def slow_run(self, force=False):
+            time.sleep(60)
+
+        monkeypatch.setattr(TrainPipeline, 'run', slow_run)
+        job_id = runner.submit()
+        job = runner._claim_next()
+
+        original_update = runner._update
+
+        def cancel_once_running(job, **changes):
+            job = original_update(job, **changes)
+            if changes.get('status') == 'running':
+                runner.cancel(job['job_id'])
+            return job
+
+        monkeypatch.setattr(runner, '_update', cancel_once_running)
+        start = time.monotonic()
+        runner.run_job(job)
+
+        assert time.monotonic() - start < 30
+        with open(os.path.join(runner.job_runner_config.jobs_dir, job_id, 'job.json')) as file_obj:
+            assert json.load(file_obj)['status'] == 'cancelled'
+        assert read_live_model(runner) == 'live model'
+        assert not os.path.exists(workspace_path(runner, job_id))
+
+    def test_job_is_claimed_once(self, runner):
+        """Test that a claimed job is not handed to a second worker."""
+        runner.submit()
+
+        assert runner._claim_next() is not None
+        assert runner._claim_next() is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,95 @@
+"""
+Test suite for load_test.py module.
+
+This module tests the random payload generator and the load generator
+against a small stand-in Flask app, through both the test client and a
+locally started server.
+"""
+import os
+import pytest
+from flask import Flask, request, jsonify
+from src.pipeline.load_test import LoadTest, LoadTestConfig, PayloadGenerator, start_local_server
+from src.pipeline.request_schema import RequestSchema
+
+CATEGORIES = {
+    "gender": ["female", "male"],
+    "race_ethnicity": ["group A", "group B", "group C"],
+    "parental_level_of_education": ["high school", "some college"],
+    "lunch": ["free/reduced", "standard"],
+    "test_preparation_course": ["completed", "none"],
+}
+NUMERICAL_COLUMNS = ["writing_score", "reading_score"]
+
+
+@pytest.fixture
+def schema():
+    """Request schema with a small set of categories."""
+    return RequestSchema(CATEGORIES, NUMERICAL_COLUMNS)
+
+
+@pytest.fixture
+def stand_in_app(schema):
+    """Flask app that validates payloads like app.py without loading a model."""
+    app = Flask(__name__)
+
+    @app.route('/predictdata', methods=['POST'])
+    def predict_datapoint():
+        schema.validate(request.form)
+        return 'ok'
+
+    @app.route('/predictbatch', methods=['POST'])
+    def predict_batch():
+        columns = schema.validate_many(request.get_json())
+        return jsonify(predictions=[0.0] * len(columns["gender"]))
+
+    return app
+
+
+class TestPayloadGenerator:
+    """Test cases for PayloadGenerator."""
+
+    def test_payloads_pass_validation(self, schema):
+        """Test that generated payloads are valid requests."""
+        payloads = PayloadGenerator(schema, seed=0)
+        schema.validate_many(payloads.records(100))
+
+    def test_seed_makes_payloads_reproducible(self, schema):
+        """Test that the same seed gives the same payloads."""
+        assert PayloadGenerator(schema, seed=1).records(5) == PayloadGenerator(schema, seed=1).records(5)
+
+
+class TestLoadTest:
+    """Test cases for LoadTest."""
+
+    def test_test_client_report(self, schema, stand_in_app, temp_dir):
+        """Test a run through the Flask test client at two concurrency levels."""
+        config = LoadTestConfig(concurrency_levels=[1, 2], duration_s=0.2,
+                                report_file_path=os.path.join(temp_dir, 'report.json'))
+
+        report = LoadTest(config).run(stand_in_app, schema)
+
+        assert [level['concurrency'] for level in report['levels']] == [1, 2]
+        for level in report['levels']:
+            assert level['requests'] > 0
+            assert level['errors'] == 0
+            assert level['p50_ms'] <= level['p99_ms'] <= level['max_ms']
+        assert os.path.exists(config.report_file_path)
+
+    def test_batch_endpoint_over_http(self, schema, stand_in_app, temp_dir):
+        """Test a batch run against a locally started server."""
+        server, base_url = start_local_server(stand_in_app)
+        try:
+            config = LoadTestConfig(endpoint='/predictbatch', concurrency_levels=[2], duration_s=0.2,
+                                    batch_size=8, base_url=base_url,
+                                    report_file_path=os.path.join(temp_dir, 'report.json'))
+            report = LoadTest(config).run(stand_in_app, schema)
+        finally:
+            server.shutdown()
+
+        level = report['levels'][0]
+        assert level['errors'] == 0
+        assert level['rows_per_s'] == pytest.approx(level['requests_per_s'] * 8)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,92 @@
+"""
+Test suite for model_distillation.py module.
+
+This module tests labelling synthetic payloads with the trained model and
+promoting a cheap student model when it stays within tolerance.
+"""
+import os
+import json
+import pytest
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from src.components.data_transformation import DataTransformation
+from src.components.model_distillation import ModelDistillation
+from src.utils import save_object, load_object
+
+SOURCE_CSV = os.path.join(os.path.dirname(__file__), '..', 'notebook', 'data', 'stud.csv')
+
+
+@pytest.fixture
+def distillation(temp_dir):
+    """ModelDistillation over a saved preprocessor and random forest teacher."""
+    df = pd.read_csv(SOURCE_CSV)
+    train_df, test_df = df.iloc[:800], df.iloc[800:]
+    transformation = DataTransformation()
+    preprocessor = transformation.get_data_transformer_object()
+    target = transformation.data_transformation_config.target_columns[0]
+    train_array = np.c_[preprocessor.fit_transform(train_df.drop(columns=[target])), train_df[target]]
+    test_array = np.c_[preprocessor.transform(test_df.drop(columns=[target])), test_df[target]]
+    teacher = RandomForestRegressor(n_estimators=64, random_state=0).fit(train_array[:, :-1], train_array[:, -1])
+
+    distillation = ModelDistillation()
+    distillation.data_transformation_config.preprocessor_obj_file_path = os.path.join(temp_dir, 'preprocessor.pkl')
+    distillation.model_trainer_config.trained_model_file_path = os.path.join(temp_dir, 'model.pkl')
+    distillation.model_distillation_config.teacher_model_file_path = os.path.join(temp_dir, 'teacher_model.pkl')
+    distillation.model_distillation_config.distillation_report_file_path = os.path.join(temp_dir, 'report.json')
+    distillation.model_distillation_config.n_synthetic_samples = 5000
+    save_object(distillation.data_transformation_config.preprocessor_obj_file_path, preprocessor)
+    save_object(distillation.model_trainer_config.trained_model_file_path, teacher)
+    return distillation, test_array
+
+
+class TestSampleInputDomain:
+    """Test cases for sample_input_domain."""
+
+    def test_samples_stay_inside_the_schema(self, distillation):
+        """Test that every synthetic payload passes request validation."""
+        from src.pipeline.request_schema import RequestSchema
+
+        distillation, _ = distillation
+        preprocessor = load_object(distillation.data_transformation_config.preprocessor_obj_file_path)
+        schema = RequestSchema.from_preprocessor(preprocessor)
+
+        df = distillation.sample_input_domain(schema, 200)
+        schema.validate_many(df.to_dict('records'))
+        assert len(df) == 200
+
+
+class TestModelDistillation:
+    """Test cases for initiate_model_distillation."""
+
+    def test_promotes_fast_student_within_tolerance(self, distillation):
+        """Test that a student within tolerance replaces the teacher for serving."""
+        distillation, test_array = distillation
+        distillation.model_distillation_config.r2_tolerance = 1.0
+
+        report = distillation.initiate_model_distillation(test_array)
+
+        assert report['promoted'] in report['students']
+        assert all(0 < student['fidelity_r2'] <= 1 for student in report['students'].values())
+        served = load_object(distillation.model_trainer_config.trained_model_file_path)
+        assert not isinstance(served, RandomForestRegressor)
+        assert isinstance(load_object(distillation.model_distillation_config.teacher_model_file_path),
+                          RandomForestRegressor)
+        with open(distillation.model_distillation_config.distillation_report_file_path) as file_obj:
+            assert json.load(file_obj)['promoted'] == report['promoted']
+
+    def test_keeps_teacher_when_no_student_is_close(self, distillation):
+        """Test that the teacher keeps serving when every student loses too much R2."""
+        distillation, test_array = distillation
+        distillation.model_distillation_config.r2_tolerance = -1.0
+
+        report = distillation.initiate_model_distillation(test_array)
+
+        assert report['promoted'] is None
+        assert isinstance(load_object(distillation.model_trainer_config.trained_model_file_path),
+                          RandomForestRegressor)
+        assert not os.path.exists(distillation.model_distillation_config.teacher_model_file_path)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,85 @@
+"""
+Test suite for model_stacking.py module.
+
+This module tests blending the search winners from their out-of-fold
+predictions and the latency-aware pruning of blend members.
+"""
+import os
+import pytest
+import numpy as np
+from sklearn.linear_model import Ridge
+from sklearn.tree import DecisionTreeRegressor
+from src.components.model_stacking import ModelStacking, StackedRegressor
+from src.utils import evaluate_models, get_model_costs
+
+
+@pytest.fixture
+def search_results():
+    """Out-of-fold predictions and metrics of a small search over two models."""
+    rng = np.random.RandomState(0)
+    X = rng.rand(400, 4)
+    y = X @ [1.0, 2.0, 3.0, 4.0] + np.sin(6 * X[:, 0]) + rng.normal(0, 0.1, 400)
+    X_train, y_train, X_test, y_test = X[:320], y[:320], X[320:], y[320:]
+    models = {"Ridge": Ridge(), "Tree": DecisionTreeRegressor(random_state=0)}
+    params = {"Ridge": {"alpha": [0.1, 1.0]}, "Tree": {"max_depth": [3, 6]}}
+    report, oof_predictions = evaluate_models(
+        X_train, y_train, X_test, y_test, models, params, n_jobs=1, return_oof=True
+    )
+    costs = get_model_costs(models, X_test, n_repeats=5)
+    metrics = {name: {"r2": score, **costs[name]} for name, score in report.items()}
+    return oof_predictions, y_train, X_test, y_test, models, metrics
+
+
+class TestModelStacking:
+    """Test cases for initiate_model_stacking."""
+
+    def test_report_compares_blend_with_best_single(self, search_results, temp_dir):
+        """Test that the report scores the blend against the best single model."""
+        stacking = ModelStacking()
+        stacking.model_stacking_config.stacking_report_file_path = os.path.join(temp_dir, "stacking.json")
+        stacking.model_stacking_config.min_gain_per_ms = float("-inf")
+        oof_predictions, y_train, X_test, y_test, models, metrics = search_results
+
+        stacked_model, report = stacking.initiate_model_stacking(
+            oof_predictions, y_train, X_test, y_test, models, metrics
+        )
+
+        assert isinstance(stacked_model, StackedRegressor)
+        assert report["best_single_model"] == "Ridge"
+        assert report["beats_best_single"] == (report["test_r2"] > metrics["Ridge"]["r2"])
+        assert all(weight >= 0 for weight in report["weights"].values())
+        assert os.path.exists(stacking.model_stacking_config.stacking_report_file_path)
+
+    def test_expensive_members_are_pruned(self, search_results, temp_dir):
+        """Test that a member whose gain does not pay for its latency is dropped."""
+        stacking = ModelStacking()
+        stacking.model_stacking_config.stacking_report_file_path = os.path.join(temp_dir, "stacking.json")
+        stacking.model_stacking_config.min_gain_per_ms = 1e6
+        oof_predictions, y_train, X_test, y_test, models, metrics = search_results
+
+        _, report = stacking.initiate_model_stacking(
+            oof_predictions, y_train, X_test, y_test, models, metrics
+        )
+
+        assert len(report["members"]) == 1
+        assert len(report["dropped"]) == 1
+
+    def test_stacked_model_predicts_like_its_meta_model(self, search_results, temp_dir):
+        """Test that the blend is the meta-learner applied to the member predictions."""
+        stacking = ModelStacking()
+        stacking.model_stacking_config.stacking_report_file_path = os.path.join(temp_dir, "stacking.json")
+        stacking.model_stacking_config.min_gain_per_ms = float("-inf")
+        oof_predictions, y_train, X_test, y_test, models, metrics = search_results
+
+        stacked_model, report = stacking.initiate_model_stacking(
+            oof_predictions, y_train, X_test, y_test, models, metrics
+        )
+
+        expected = sum(
+            weight * models[name].predict(X_test) for name, weight in report["weights"].items()
+        ) + report["intercept"]
+        np.testing.assert_allclose(stacked_model.predict(X_test), expected)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,152 @@
+"""
+Test suite for model_trainer.py module.
+
+This module tests the per-target model search, including offering the
+stacked blend to the configured selection mode, incremental training of
+a saved model and wrapping setup failures in CustomException.
+"""
+import os
+import sys
+import json
+import pytest
+import numpy as np
+from sklearn.linear_model import Ridge
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.tree import DecisionTreeRegressor
+from src.exception import CustomException
+from src.components.model_stacking import ModelStackingConfig
+from src.components.model_trainer import ModelTrainer, MultiTargetRegressor
+from src.utils import load_object, save_object, select_best_model
+
+
+@pytest.fixture
+def trainer(monkeypatch):
+    """ModelTrainer searching two small models serially, with stacking enabled."""
+    trainer = ModelTrainer()
+    monkeypatch.setattr(trainer, 'get_models_and_params', lambda: (
+        {"Ridge": Ridge(), "Tree": DecisionTreeRegressor(random_state=0)},
+        {"Ridge": {"alpha": [0.1, 1.0]}, "Tree": {"max_depth": [3, 6]}},
+    ))
+    monkeypatch.setattr(ModelStackingConfig, 'min_gain_per_ms', float("-inf"))
+    trainer.model_trainer_config.search_n_jobs = 1
+    trainer.model_trainer_config.stacking = True
+    return trainer
+
+
+@pytest.fixture
+def split():
+    """Train/test data that neither model fits alone: a linear trend plus a step."""
+    rng = np.random.RandomState(0)
+    X = rng.rand(400, 4)
+    y = X @ [1.0, 2.0, 3.0, 4.0] + np.sin(6 * X[:, 0]) + rng.normal(0, 0.1, 400)
+    return X[:320], y[:320], X[320:], y[320:]
+
+
+class TestSearchTarget:
+    """Test cases for search_target with stacking."""
+
+    def test_blend_competes_under_selection_mode(self, trainer, split, temp_dir):
+        """Test that the blend is one more candidate for select_best_model."""
+        name, model, score, metrics, _ = trainer.search_target(
+            *split, stacking_report_file_path=os.path.join(temp_dir, 'stacking.json')
+        )
+
+        assert 'Stacked Ensemble' in metrics
+        assert name == select_best_model(metrics)
+        assert score == metrics[name]['r2']
+
+    def test_blend_over_size_budget_is_not_selected(self, trainer, split, temp_dir):
+        """Test that a blend exceeding max_size_bytes loses to a single model in budget mode."""
+        stacking_report_file_path = os.path.join(temp_dir, 'stacking.json')
+        _, _, _, metrics, _ = trainer.search_target(*split, stacking_report_file_path=stacking_report_file_path)
+        trainer.model_trainer_config.selection_mode = 'budget'
+        trainer.model_trainer_config.max_size_bytes = metrics['Stacked Ensemble']['size_bytes'] - 1
+
+        name, _, _, metrics, _ = trainer.search_target(*split, stacking_report_file_path=stacking_report_file_path)
+
+        assert name != 'Stacked Ensemble'
+        assert metrics[name]['size_bytes'] <= trainer.model_trainer_config.max_size_bytes
+
+
+@pytest.fixture
+def saved_model_trainer(temp_dir, split):
+    """ModelTrainer whose artifacts live in a temporary directory, with a fitted forest saved."""
+    trainer = ModelTrainer()
+    config = trainer.model_trainer_config
+    config.trained_model_file_path = os.path.join(temp_dir, 'model.pkl')
+    config.run_report_file_path = os.path.join(temp_dir, 'run_report.json')
+    X_train, y_train, _, _ = split
+    save_object(config.trained_model_file_path,
+                RandomForestRegressor(n_estimators=8, random_state=0).fit(X_train[:100], y_train[:100]))
+    return trainer
+
+
+class TestIncrementalModelTrainer:
+    """Test cases for initiate_incremental_model_trainer."""
+
+    def test_writes_incremental_run_report(self, saved_model_trainer, split):
+        """Test that an incremental run records its timings and resource use like a full run."""
+        X_train, y_train, X_test, y_test = split
+        saved_model_trainer.initiate_incremental_model_trainer(np.c_[X_train, y_train], np.c_[X_test, y_test])
+
+        with open(saved_model_trainer.model_trainer_config.run_report_file_path) as file_obj:
+            run_report = json.load(file_obj)
+        assert run_report['run_type'] == 'incremental'
+        assert run_report['selected_model'] == 'RandomForestRegressor'
+        assert run_report['n_train_rows'] == len(X_train)
+        assert run_report['cpu_s'] > 0
+        details = run_report['models']['RandomForestRegressor']
+        assert details['fit_wall_s'] > 0
+        assert details['cpu_s'] > 0
+        assert details['candidates'] == []
+
+    def test_forest_grows_extra_trees(self, saved_model_trainer, split):
+        """Test that a saved forest keeps its trees and adds warm_start_estimators more."""
+        X_train, y_train, X_test, y_test = split
+        config = saved_model_trainer.model_trainer_config
+        old_trees = load_object(config.trained_model_file_path).estimators_
+
+        saved_model_trainer.initiate_incremental_model_trainer(np.c_[X_train, y_train], np.c_[X_test, y_test])
+
+        model = load_object(config.trained_model_file_path)
+        assert len(model.estimators_) == 8 + config.warm_start_estimators
+        np.testing.assert_array_equal(model.estimators_[0].tree_.value, old_trees[0].tree_.value)
+
+    def test_multi_target_members_continue_on_their_own_target(self, saved_model_trainer, split):
+        """Test that each member of a multi-target model is continued on its own column."""
+        X_train, y_train, X_test, y_test = split
+        config = saved_model_trainer.model_trainer_config
+        save_object(config.trained_model_file_path, MultiTargetRegressor(
+            ['math_score', 'reading_score'], [Ridge().fit(X_train, y_train), Ridge().fit(X_train, -y_train)]
+        ))
+
+        model_name = saved_model_trainer.initiate_incremental_model_trainer(
+            np.c_[X_train, y_train, 2 * y_train], np.c_[X_test, y_test, 2 * y_test]
+        )
+
+        model = load_object(config.trained_model_file_path)
+        assert model_name == 'math_score: Ridge, reading_score: Ridge'
+        np.testing.assert_allclose(model.predict(X_test)[:, 1], 2 * model.predict(X_test)[:, 0])
+
+
+class TestErrorHandling:
+    """Test cases for failures before training starts."""
+
+    def test_bad_arrays_raise_custom_exception(self):
+        """Test that splitting unusable arrays is wrapped like any other training error."""
+        with pytest.raises(CustomException):
+            ModelTrainer().initiate_model_trainer(None, None)
+
+    def test_failed_imports_raise_custom_exception(self, saved_model_trainer, split, monkeypatch):
+        """Test that a failing lazy import in incremental training is wrapped too."""
+        X_train, y_train, X_test, y_test = split
+        monkeypatch.setitem(sys.modules, 'sklearn.metrics', None)
+
+        with pytest.raises(CustomException):
+            saved_model_trainer.initiate_incremental_model_trainer(np.c_[X_train, y_train], np.c_[X_test, y_test])
+        with pytest.raises(CustomException):
+            saved_model_trainer.continue_training_with_details(Ridge(), X_train, y_train, X_test, y_test)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
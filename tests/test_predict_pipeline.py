@@ -0,0 +1,201 @@
+"""
+Test suite for predict_pipeline.py module.
+
+This module tests the model manager: loading bundles by name, LRU
+eviction under the memory budget, reloading newly published bundle
+versions, loading without blocking resident bundles and routing
+predictions by model key.
+"""
+import os
+import time
+import threading
+import pytest
+import numpy as np
+import pandas as pd
+from sklearn.dummy import DummyRegressor
+from src.components.data_transformation import DataTransformation
+from src.pipeline.predict_pipeline import (
+    ModelManager, PredictPipeline, PredictPipelineConfig, UnknownModelError, publish_model_bundle,
+)
+import src.pipeline.predict_pipeline as predict_pipeline_module
+from src.utils import save_object
+
+SOURCE_CSV = os.path.join(os.path.dirname(__file__), '..', 'notebook', 'data', 'stud.csv')
+
+
+@pytest.fixture
+def bundles(temp_dir, monkeypatch):
+    """Three published bundles whose models predict a constant 10, 20 and 30."""
+    df = pd.read_csv(SOURCE_CSV).head(200)
+    transformation = DataTransformation()
+    target = transformation.data_transformation_config.target_columns[0]
+    features = df.drop(columns=[target])
+    preprocessor = transformation.get_data_transformer_object().fit(features)
+
+    bundle_dir = os.path.join(temp_dir, 'models')
+    monkeypatch.setattr(PredictPipelineConfig, 'bundle_dir', bundle_dir)
+    monkeypatch.setattr(predict_pipeline_module, '_model_manager', None)
+    preprocessor_path = os.path.join(temp_dir, 'preprocessor.pkl')
+    save_object(preprocessor_path, preprocessor)
+    for name, value in (('math', 10.0), ('reading', 20.0), ('writing', 30.0)):
+        model_path = os.path.join(temp_dir, f'{name}.pkl')
+        save_object(model_path, DummyRegressor(strategy='constant', constant=value).fit(features, df[target]))
+        publish_model_bundle(name, preprocessor_path, model_path)
+    return bundle_dir, features.head(3)
+
+
+class TestModelManager:
+    """Test cases for ModelManager."""
+
+    def test_routes_predictions_by_model_key(self, bundles):
+        """Test that each key is served by its own bundle."""
+        _, features = bundles
+        assert PredictPipeline('math').predict(features).tolist() == [10.0] * 3
+        assert PredictPipeline('writing').predict(features).tolist() == [30.0] * 3
+
+    def test_empty_features_give_empty_predictions(self, bundles):
+        """Test that an empty frame is not passed to the fitted imputers."""
+        _, features = bundles
+        assert PredictPipeline('math').predict(features.head(0)).shape == (0,)
+
+    def test_least_recently_used_bundle_is_evicted(self, bundles):
+        """Test that the budget keeps only the most recently used bundles resident."""
+        manager = ModelManager()
+        bundle_size = manager.get('math').size_bytes
+        manager.memory_budget_bytes = 2 * bundle_size
+
+        manager.get('reading')
+        manager.get('math')
+        manager.get('writing')
+
+        assert list(manager.bundles) == ['math', 'writing']
+        assert manager.stats['evictions'] == 1
+
+    def test_repeat_requests_hit_the_cache(self, bundles):
+        """Test that a resident bundle is not loaded again."""
+        manager = ModelManager()
+        first = manager.get('math')
+        assert manager.get('math') is first
+        assert manager.stats == {'hits': 1, 'loads': 1, 'evictions': 0}
+
+    def test_republished_bundle_is_reloaded(self, bundles, temp_dir):
+        """Test that a bundle whose CURRENT pointer moves to a new version is loaded again."""
+        _, features = bundles
+        manager = ModelManager()
+        old_version = manager.get('math').version
+
+        version = publish_model_bundle('math', os.path.join(temp_dir, 'preprocessor.pkl'),
+                                       os.path.join(temp_dir, 'reading.pkl'))
+        bundle = manager.get('math')
+        assert bundle.version == version != old_version
+        assert bundle.model.predict(features).tolist() == [20.0] * 3
+        assert manager.stats['loads'] == 2
+
+    def test_pointer_is_read_again_after_its_ttl(self, bundles, temp_dir, monkeypatch):
+        """Test that a pointer moved by another process is picked up once bundle_pointer_ttl_s has passed."""
+        bundle_dir, _ = bundles
+        old_version = ModelManager().get('math').version
+        version = publish_model_bundle('math', os.path.join(temp_dir, 'preprocessor.pkl'),
+                                       os.path.join(temp_dir, 'reading.pkl'))
+        manager = ModelManager()
+        assert manager.get('math').version == version
+
+        # Another process moving the pointer does not clear this process's cache
+        with open(os.path.join(bundle_dir, 'math', 'CURRENT'), 'w') as file_obj:
+            file_obj.write(old_version)
+        monkeypatch.setattr(PredictPipelineConfig, 'bundle_pointer_ttl_s', 60.0)
+        assert manager.get('math').version == version
+        monkeypatch.setattr(PredictPipelineConfig, 'bundle_pointer_ttl_s', 0.0)
+        assert manager.get('math').version == old_version
+
+    def test_old_versions_are_pruned(self, bundles, temp_dir):
+        """Test that publishing keeps only the newest bundle_versions_kept versions."""
+        bundle_dir, _ = bundles
+        for _ in range(4):
+            version = publish_model_bundle('math', os.path.join(temp_dir, 'preprocessor.pkl'),
+                                           os.path.join(temp_dir, 'math.pkl'))
+
+        versions = sorted(name for name in os.listdir(os.path.join(bundle_dir, 'math')) if name != 'CURRENT')
+        assert len(versions) == PredictPipelineConfig.bundle_versions_kept
+        assert versions[-1] == version
+        assert ModelManager().get('math').version == version
+
+    def test_unversioned_pair_is_loaded_once(self, bundles, temp_dir, monkeypatch):
+        """Test that files rewritten in place are not picked up, so a half-written pair is never served."""
+        _, features = bundles
+        model_path = os.path.join(temp_dir, 'legacy_model.pkl')
+        save_object(model_path, DummyRegressor(strategy='constant', constant=1.0).fit(features, [0.0] * 3))
+        monkeypatch.setattr(PredictPipelineConfig, 'preprocessor_file_path', os.path.join(temp_dir, 'preprocessor.pkl'))
+        monkeypatch.setattr(PredictPipelineConfig, 'model_file_path', model_path)
+        manager = ModelManager()
+        first = manager.get()
+        assert first.version is None
+
+        save_object(model_path, DummyRegressor(strategy='constant', constant=2.0).fit(features, [0.0] * 3))
+        assert manager.get() is first
+
+        publish_model_bundle('default', os.path.join(temp_dir, 'preprocessor.pkl'), model_path)
+        assert manager.get().model.predict(features).tolist() == [2.0] * 3
+
+    def test_slow_load_does_not_block_resident_bundles(self, bundles, monkeypatch):
+        """Test that a cached bundle is served while another key is still being loaded."""
+        manager = ModelManager()
+        manager.get('math')
+        load_started, release_load = threading.Event(), threading.Event()
+        original_load_object = predict_pipeline_module.load_object
+
+        def slow_load_object(file_path):
+            if os.path.join('reading', '') in file_path:
+                load_started.set()
+                release_load.wait(10)
+            return original_load_object(file_path=file_path)
+
+        monkeypatch.setattr(predict_pipeline_module, 'load_object', slow_load_object)
+        loads = [threading.Thread(target=manager.get, args=('reading',)) for _ in range(2)]
+        for thread in loads:
+            thread.start()
+        assert load_started.wait(10)
+
+        start = time.monotonic()
+        assert manager.get('math').name == 'math'
+        assert time.monotonic() - start < 1
+
+        release_load.set()
+        for thread in loads:
+            thread.join(10)
+        assert manager.stats['loads'] == 2
+        assert list(manager.bundles) == ['math', 'reading']
+
+    @pytest.mark.parametrize("model_key", ["missing", "../models", "math/../reading"])
+    def test_unknown_keys_are_rejected(self, bundles, model_key):
+        """Test that missing bundles and path-like keys raise UnknownModelError."""
+        manager = ModelManager()
+        assert not manager.has_bundle(model_key)
+        with pytest.raises(UnknownModelError):
+            manager.get(model_key)
+
+
+class TestMultiTargetBundle:
+    """Test cases for bundles whose model predicts several scores."""
+
+    def test_predicts_one_column_per_target(self, bundles, temp_dir):
+        """Test that a multi-target bundle returns every score and its target names."""
+        from src.components.model_trainer import MultiTargetRegressor
+
+        bundle_dir, features = bundles
+        models = [
+            DummyRegressor(strategy='constant', constant=value).fit(features, np.zeros(len(features)))
+            for value in (10.0, 20.0, 30.0)
+        ]
+        model_path = os.path.join(temp_dir, 'scores.pkl')
+        save_object(model_path, MultiTargetRegressor(['math_score', 'reading_score', 'writing_score'], models))
+        publish_model_bundle('scores', os.path.join(temp_dir, 'preprocessor.pkl'), model_path)
+
+        pipeline = PredictPipeline('scores')
+        np.testing.assert_array_equal(pipeline.predict(features), [[10.0, 20.0, 30.0]] * 3)
+        assert pipeline.get_target_names() == ['math_score', 'reading_score', 'writing_score']
+        assert PredictPipeline('math').get_target_names() is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,83 @@
+"""
+Test suite for request_schema.py module.
+
+This module tests validation of single and batch prediction payloads
+against the categories and score range of a fitted preprocessor.
+"""
+import math
+import pytest
+import pandas as pd
+from src.components.data_transformation import DataTransformation
+from src.pipeline.request_schema import RequestSchema, InvalidRequestError
+
+VALID_RECORD = {
+    "gender": "female",
+    "race_ethnicity": "group B",
+    "parental_level_of_education": "high school",
+    "lunch": "standard",
+    "test_preparation_course": "none",
+    "reading_score": "72",
+    "writing_score": 74,
+}
+
+
+@pytest.fixture
+def schema():
+    """Schema built from a preprocessor fitted on a couple of rows."""
+    df = pd.DataFrame([
+        VALID_RECORD,
+        {**VALID_RECORD, "gender": "male", "lunch": "free/reduced", "reading_score": "50"},
+    ])
+    preprocessor = DataTransformation().get_data_transformer_object().fit(df)
+    return RequestSchema.from_preprocessor(preprocessor)
+
+
+class TestValidate:
+    """Test cases for single-payload validation."""
+
+    def test_valid_record_is_typed(self, schema):
+        """Test that scores are converted to integers and categories kept."""
+        record = schema.validate(VALID_RECORD)
+        assert record["reading_score"] == 72
+        assert record["writing_score"] == 74
+        assert record["gender"] == "female"
+
+    def test_missing_score_is_left_for_imputer(self, schema):
+        """Test that an empty score becomes NaN for the median imputer."""
+        record = schema.validate({**VALID_RECORD, "reading_score": ""})
+        assert math.isnan(record["reading_score"])
+
+    @pytest.mark.parametrize("field, value", [
+        ("gender", "unknown"),
+        ("race_ethnicity", "group E"),
+        ("lunch", None),
+        ("reading_score", "101"),
+        ("writing_score", "-1"),
+        ("writing_score", "seventy"),
+        ("reading_score", 70.5),
+    ])
+    def test_invalid_field_is_rejected(self, schema, field, value):
+        """Test that unknown categories and out-of-range scores raise InvalidRequestError."""
+        with pytest.raises(InvalidRequestError) as exc_info:
+            schema.validate({**VALID_RECORD, field: value})
+        assert exc_info.value.errors[0][1] == field
+
+
+class TestValidateMany:
+    """Test cases for batch validation."""
+
+    def test_batch_returns_columns(self, schema):
+        """Test that a valid batch comes back column-oriented."""
+        columns = schema.validate_many([VALID_RECORD, {**VALID_RECORD, "gender": "male"}])
+        assert columns["gender"] == ["female", "male"]
+        assert columns["reading_score"] == [72, 72]
+
+    def test_batch_reports_every_bad_row(self, schema):
+        """Test that all invalid rows are reported with their index."""
+        with pytest.raises(InvalidRequestError) as exc_info:
+            schema.validate_many([VALID_RECORD, {**VALID_RECORD, "lunch": "x"}, "not a record"])
+        assert [row for row, _, _ in exc_info.value.errors] == [1, 2]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
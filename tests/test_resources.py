@@ -0,0 +1,115 @@
+"""
+Test suite for resources.py module.
+
+This module tests how the CPU budget is split between search workers
+and library threads for each model, and the CPU and memory sampling of
+the training process tree.
+"""
+import os
+import sys
+import subprocess
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+from catboost import CatBoostRegressor
+from src.resources import ThreadPlan, ProcessTreeMonitor, plan_threads, apply_thread_plan
+
+# Burns 0.5 s of CPU, reports it, then idles like a reused search worker until killed
+BUSY_WORKER = (
+    "import time\n"
+    "start = time.process_time()\n"
+    "while time.process_time() - start < 0.5: pass\n"
+    "print('done', flush=True)\n"
+    "time.sleep(60)\n"
+)
+
+
+@pytest.fixture
+def start_worker():
+    """Starts long-lived child processes and waits until each has used its CPU."""
+    workers = []
+
+    def start():
+        worker = subprocess.Popen([sys.executable, "-c", BUSY_WORKER], stdout=subprocess.PIPE, text=True)
+        workers.append(worker)
+        return worker
+
+    yield start
+    for worker in workers:
+        worker.kill()
+        worker.wait()
+
+
+class TestPlanThreads:
+    """Test cases for plan_threads."""
+
+    def test_large_grid_uses_all_cpus_for_search(self):
+        """Test that a grid with more fits than CPUs gets one library thread per worker."""
+        plan = plan_threads(RandomForestRegressor(), {"n_estimators": [8, 16, 32, 64]}, n_splits=3, cpu_budget=8)
+        assert plan == ThreadPlan(search_n_jobs=8, library_threads=1, refit_threads=8)
+
+    def test_small_grid_gives_leftover_cpus_to_library(self):
+        """Test that leftover CPUs become library threads for threaded estimators."""
+        plan = plan_threads(CatBoostRegressor(), {"depth": [4, 6]}, n_splits=3, cpu_budget=8)
+        assert plan == ThreadPlan(search_n_jobs=6, library_threads=1, refit_threads=8)
+        plan = plan_threads(CatBoostRegressor(), {"depth": [4, 6]}, n_splits=3, cpu_budget=12)
+        assert plan == ThreadPlan(search_n_jobs=6, library_threads=2, refit_threads=12)
+
+    def test_single_candidate_grid_runs_in_process(self):
+        """Test that a grid with one candidate starts no search workers and threads each fit instead."""
+        plan = plan_threads(CatBoostRegressor(), {}, n_splits=3, cpu_budget=8)
+        assert plan == ThreadPlan(search_n_jobs=1, library_threads=8, refit_threads=8)
+        plan = plan_threads(RandomForestRegressor(), {"n_estimators": [8]}, n_splits=3, cpu_budget=8)
+        assert plan == ThreadPlan(search_n_jobs=1, library_threads=8, refit_threads=8)
+
+    def test_unthreaded_estimator_keeps_one_thread(self):
+        """Test that estimators without internal threading never get extra threads."""
+        plan = plan_threads(LinearRegression(), {"fit_intercept": [True, False]}, n_splits=3, cpu_budget=8)
+        assert plan == ThreadPlan(search_n_jobs=6, library_threads=1, refit_threads=8)
+        plan = plan_threads(LinearRegression(), {}, n_splits=3, cpu_budget=8)
+        assert plan == ThreadPlan(search_n_jobs=1, library_threads=1, refit_threads=8)
+
+
+class TestApplyThreadPlan:
+    """Test cases for apply_thread_plan."""
+
+    def test_sets_library_thread_parameter(self):
+        """Test that the estimator's own threading parameter is set from the plan."""
+        model = apply_thread_plan(CatBoostRegressor(), ThreadPlan(search_n_jobs=2, library_threads=4, refit_threads=8))
+        assert model.get_params()["thread_count"] == 4
+
+    def test_refit_uses_refit_threads(self):
+        """Test that the final fit gets the plan's refit threads."""
+        plan = ThreadPlan(search_n_jobs=8, library_threads=1, refit_threads=8)
+        model = apply_thread_plan(RandomForestRegressor(), plan, refit=True)
+        assert model.get_params()["n_jobs"] == 8
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/stat"), reason="samples /proc")
+class TestProcessTreeMonitor:
+    """Test cases for ProcessTreeMonitor."""
+
+    def test_counts_cpu_of_live_child_processes(self, start_worker):
+        """Test that CPU used by a worker that never exits is counted, which getrusage misses."""
+        with ProcessTreeMonitor(interval_s=0.05) as monitor:
+            worker = start_worker()
+            assert worker.stdout.readline().strip() == "done"
+
+        assert monitor.usage["cpu_s"] >= 0.45
+        assert monitor.usage["processes"] >= 2
+        assert monitor.usage["peak_rss_mb"] > 0
+
+    def test_excludes_cpu_used_before_the_block(self, start_worker):
+        """Test that a reused worker only counts the CPU it uses inside the block."""
+        worker = start_worker()
+        assert worker.stdout.readline().strip() == "done"
+
+        with ProcessTreeMonitor(interval_s=0.05) as monitor:
+            pass
+
+        assert monitor.usage["cpu_s"] < 0.25
+        assert monitor.usage["processes"] >= 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
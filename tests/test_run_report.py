@@ -0,0 +1,71 @@
+"""
+Test suite for run_report.py module.
+
+This module tests the comparison of two training run reports.
+"""
+import json
+import pytest
+from src.pipeline.run_report import compare_run_reports, format_comparison, load_run_report
+
+
+def make_report(wall_s, fingerprint="abc", selected="Linear Regression", n_candidates=2, alpha=1.0):
+    """Build a minimal run report with one searched model."""
+    return {
+        "data_fingerprint": fingerprint,
+        "selected_model": selected,
+        "wall_s": wall_s,
+        "cpu_s": wall_s * 2,
+        "peak_rss_mb": 200.0,
+        "models": {
+            "Ridge": {
+                "wall_s": wall_s, "search_wall_s": wall_s - 1, "fit_wall_s": 0.5, "cpu_s": wall_s,
+                "peak_rss_mb": 200.0, "cv_score": 0.85, "test_r2": 0.88,
+                "best_params": {"alpha": alpha},
+                "candidates": [{"params": {}, "mean_fit_time": 0.25, "mean_score_time": 0.01,
+                                "cv_score": 0.85, "rank": 1}] * n_candidates,
+            }
+        },
+    }
+
+
+class TestCompareRunReports:
+    """Test cases for compare_run_reports and format_comparison."""
+
+    def test_reports_time_deltas_per_model(self):
+        """Test that the extra wall time and candidates of the new run are reported."""
+        comparison = compare_run_reports(make_report(10.0), make_report(15.0, n_candidates=4, alpha=0.1))
+
+        ridge = comparison["models"]["Ridge"]
+        assert comparison["same_data"]
+        assert comparison["run"]["wall_s"]["delta"] == 5.0
+        assert ridge["wall_s"]["delta"] == 5.0
+        assert ridge["candidates"] == {"old": 2, "new": 4, "delta": 2}
+        assert ridge["candidate_fit_s"]["delta"] == pytest.approx(0.5)
+        assert ridge["best_params_changed"]
+
+    def test_models_missing_from_one_report(self):
+        """Test that a model only in the new report is compared against nothing."""
+        new = make_report(12.0, fingerprint="def")
+        new["models"]["Tree"] = new["models"]["Ridge"]
+
+        comparison = compare_run_reports(make_report(10.0), new)
+
+        assert not comparison["same_data"]
+        assert comparison["models"]["Tree"]["wall_s"] == {"old": None, "new": 12.0, "delta": None}
+        assert "Tree" in format_comparison(comparison)
+
+    def test_load_and_format(self, temp_dir):
+        """Test loading reports from disk and formatting the comparison."""
+        paths = []
+        for index, wall_s in enumerate([10.0, 11.0]):
+            paths.append(f"{temp_dir}/run_{index}.json")
+            with open(paths[-1], "w") as file_obj:
+                json.dump(make_report(wall_s), file_obj)
+
+        text = format_comparison(compare_run_reports(*map(load_run_report, paths)))
+        assert "Ridge" in text
+        assert "1.00" in text
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
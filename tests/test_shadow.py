@@ -0,0 +1,107 @@
+"""
+Test suite for shadow.py module.
+
+This module tests scoring sampled requests with a candidate bundle on a
+background worker that loads it outside the shared model manager, the
+aggregated prediction deltas and latencies, and skipping candidates
+whose output shape differs from the live model's.
+"""
+import os
+import time
+import pytest
+import numpy as np
+import pandas as pd
+from sklearn.dummy import DummyRegressor
+from src.components.data_transformation import DataTransformation
+from src.pipeline.predict_pipeline import PredictPipelineConfig, publish_model_bundle
+from src.pipeline.shadow import ShadowEvaluator
+import src.pipeline.predict_pipeline as predict_pipeline_module
+from src.utils import save_object
+
+SOURCE_CSV = os.path.join(os.path.dirname(__file__), '..', 'notebook', 'data', 'stud.csv')
+
+
+@pytest.fixture
+def features(temp_dir, monkeypatch):
+    """Request rows, with a 'candidate' bundle published that predicts a constant 20."""
+    df = pd.read_csv(SOURCE_CSV).head(100)
+    transformation = DataTransformation()
+    target = transformation.data_transformation_config.target_columns[0]
+    features = df.drop(columns=[target])
+
+    monkeypatch.setattr(PredictPipelineConfig, 'bundle_dir', os.path.join(temp_dir, 'models'))
+    monkeypatch.setattr(predict_pipeline_module, '_model_manager', None)
+    save_object(os.path.join(temp_dir, 'preprocessor.pkl'), transformation.get_data_transformer_object().fit(features))
+    save_object(os.path.join(temp_dir, 'model.pkl'),
+                DummyRegressor(strategy='constant', constant=20.0).fit(features, df[target]))
+    publish_model_bundle('candidate', os.path.join(temp_dir, 'preprocessor.pkl'), os.path.join(temp_dir, 'model.pkl'))
+    return features.head(4)
+
+
+class TestShadowEvaluator:
+    """Test cases for ShadowEvaluator."""
+
+    def test_aggregates_candidate_deltas(self, features):
+        """Test that deltas are candidate minus live over every scored row."""
+        shadow = ShadowEvaluator('candidate', sample_rate=1.0).start()
+
+        assert shadow.submit(features, np.full(4, 15.0), 0.002)
+        assert shadow.submit(features, np.full(4, 25.0), 0.004)
+        assert shadow.wait(timeout=10)
+
+        summary = shadow.summary()
+        assert summary['scored'] == 2
+        assert summary['rows'] == 8
+        assert summary['mean_delta'] == pytest.approx(0.0)
+        assert summary['mean_abs_delta'] == pytest.approx(5.0)
+        assert summary['max_abs_delta'] == pytest.approx(5.0)
+        assert summary['live_latency_ms']['p50'] == pytest.approx(2.0)
+        assert summary['candidate_latency_ms']['p50'] > 0
+
+    def test_unsampled_requests_are_not_queued(self, features):
+        """Test that a zero sample rate never queues a request."""
+        shadow = ShadowEvaluator('candidate', sample_rate=0.0)
+        assert not shadow.submit(features, np.zeros(4), 0.001)
+        assert shadow.summary()['sampled'] == 0
+
+    def test_full_queue_drops_instead_of_blocking(self, features):
+        """Test that the request path never waits for a busy worker."""
+        shadow = ShadowEvaluator('candidate', sample_rate=1.0, max_queue_size=1)
+
+        assert shadow.submit(features, np.zeros(4), 0.001)
+        start = time.perf_counter()
+        assert not shadow.submit(features, np.zeros(4), 0.001)
+        assert time.perf_counter() - start < 0.05
+        assert shadow.summary()['dropped'] == 1
+
+    def test_candidate_errors_are_counted(self, features):
+        """Test that a failing candidate is counted without raising."""
+        shadow = ShadowEvaluator('missing', sample_rate=1.0).start()
+        shadow.submit(features, np.zeros(4), 0.001)
+        assert shadow.wait(timeout=10)
+        assert shadow.summary()['errors'] == 1
+
+    def test_candidate_is_loaded_outside_the_model_manager(self, features):
+        """Test that the candidate never occupies the live bundles' cache or memory budget."""
+        shadow = ShadowEvaluator('candidate', sample_rate=1.0).start()
+        shadow.submit(features, np.zeros(4), 0.001)
+        assert shadow.wait(timeout=10)
+
+        assert shadow.summary()['scored'] == 1
+        assert 'candidate' not in predict_pipeline_module.get_model_manager().bundles
+
+    def test_mismatched_output_shapes_are_not_compared(self, features):
+        """Test that a single-target candidate shadowing a multi-target model is counted, not raised."""
+        shadow = ShadowEvaluator('candidate', sample_rate=1.0).start()
+        shadow.submit(features, np.zeros((4, 3)), 0.001)
+        assert shadow.wait(timeout=10)
+
+        summary = shadow.summary()
+        assert summary['mismatched'] == 1
+        assert summary['errors'] == 0
+        assert summary['scored'] == 0
+        assert summary['mean_delta'] is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,77 @@
+"""
+Test suite for sketches.py module.
+
+This module tests the count-based statistics helpers, the quantile
+sketch and the running moments used by the streaming preprocessor fit.
+"""
+import pytest
+import numpy as np
+from collections import Counter
+from src.sketches import QuantileSketch, RunningMoments, median_from_counts, most_frequent_from_counts
+
+
+class TestCountStatistics:
+    """Test cases for the value-count statistics helpers."""
+
+    @pytest.mark.parametrize("values", [[3], [1, 2], [5, 1, 3, 3], [7, 7, 1, 9, 2, 100]])
+    def test_median_from_counts_matches_numpy(self, values):
+        """Test that median_from_counts agrees with np.median."""
+        assert median_from_counts(Counter(values)) == np.median(values)
+
+    def test_most_frequent_breaks_ties_with_smallest_value(self):
+        """Test that ties resolve to the smallest value like SimpleImputer."""
+        assert most_frequent_from_counts(Counter(["b", "a", "b", "a", "c"])) == "a"
+
+
+class TestQuantileSketch:
+    """Test cases for QuantileSketch."""
+
+    def test_exact_for_few_distinct_values(self):
+        """Test that the median is exact while distinct values fit in capacity."""
+        values = np.random.RandomState(0).randint(0, 101, 5000).astype(float)
+        sketch = QuantileSketch(capacity=200)
+        for chunk in np.array_split(values, 7):
+            sketch.update(chunk)
+        assert sketch.exact
+        assert sketch.median() == np.median(values)
+
+    def test_approximate_for_continuous_values(self):
+        """Test that the compressed sketch stays close to the true quantiles in bounded memory."""
+        values = np.random.RandomState(1).normal(size=20000)
+        sketch = QuantileSketch(capacity=100)
+        for chunk in np.array_split(values, 20):
+            sketch.update(chunk)
+        assert not sketch.exact
+        assert len(sketch.centroids) <= 200
+        for q in (0.1, 0.5, 0.9):
+            assert abs(sketch.quantile(q) - np.quantile(values, q)) < 0.1
+
+    def test_ignores_nan(self):
+        """Test that missing values are not counted."""
+        sketch = QuantileSketch().update([1.0, np.nan, 3.0])
+        assert sketch.count == 2
+        assert sketch.median() == 2.0
+
+
+class TestRunningMoments:
+    """Test cases for RunningMoments."""
+
+    def test_chunked_moments_match_numpy(self):
+        """Test that combining chunks gives the single-pass mean and variance."""
+        values = np.random.RandomState(2).rand(1000) * 100
+        moments = RunningMoments()
+        for chunk in np.array_split(values, 9):
+            moments.update(chunk)
+        assert moments.mean == pytest.approx(values.mean())
+        assert moments.variance == pytest.approx(values.var())
+
+    def test_update_constant_adds_imputed_values(self):
+        """Test that imputed fill values are folded into the moments."""
+        moments = RunningMoments().update([1.0, 3.0]).update_constant(2.0, 2)
+        assert moments.count == 4
+        assert moments.mean == pytest.approx(2.0)
+        assert moments.variance == pytest.approx(0.5)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,112 @@
+"""
+Test suite for train_pipeline.py module.
+
+This module tests full and incremental training runs end to end in a
+temporary working directory, with a small model search, including
+redistilling instead of continuing a distilled student.
+"""
+import os
+import pytest
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+from src.components.model_distillation import ModelDistillation
+from src.components.model_trainer import ModelTrainer, ModelTrainerConfig
+from src.pipeline.predict_pipeline import ModelManager, PredictPipelineConfig
+from src.pipeline.train_pipeline import TrainPipeline, TrainPipelineConfig
+from src.utils import load_object
+
+NOTEBOOK_DIR = os.path.join(os.path.dirname(__file__), '..', 'notebook')
+
+
+@pytest.fixture
+def workspace(temp_dir, monkeypatch):
+    """Working directory with the source data linked in and a two-model search."""
+    os.symlink(os.path.abspath(NOTEBOOK_DIR), os.path.join(temp_dir, 'notebook'))
+    monkeypatch.chdir(temp_dir)
+    monkeypatch.setattr(ModelTrainerConfig, 'search_n_jobs', 1)
+    monkeypatch.setattr(ModelTrainer, 'get_models_and_params', lambda self: (
+        {"Random Forest": RandomForestRegressor(random_state=0), "Linear Regression": LinearRegression()},
+        {"Random Forest": {"n_estimators": [8]}, "Linear Regression": {}},
+    ))
+    new_rows_path = os.path.join(temp_dir, 'new_rows.csv')
+    pd.read_csv(os.path.join('notebook', 'data', 'stud.csv')).head(20).to_csv(new_rows_path, index=False)
+    return new_rows_path
+
+
+def load_state():
+    return load_object(TrainPipelineConfig().incremental_state_file_path)
+
+
+def count_split_rows():
+    return len(pd.read_csv(os.path.join('artifacts', 'train.csv'))) + len(pd.read_csv(os.path.join('artifacts', 'test.csv')))
+
+
+class TestRunIncremental:
+    """Test cases for TrainPipeline.run_incremental."""
+
+    def test_first_run_rebuilds(self, workspace):
+        """Test that without a previous run the new rows are folded into a full rebuild."""
+        TrainPipeline().run_incremental(workspace)
+
+        assert load_state()['incremental_runs'] == 0
+        assert count_split_rows() == 1020
+
+    def test_continues_saved_model_and_publishes(self, workspace):
+        """Test that a later run continues training the saved model and publishes a new version."""
+        pipeline = TrainPipeline()
+        pipeline.run(force=True)
+        version = ModelManager().get().version
+
+        model_name = pipeline.run_incremental(workspace)
+
+        assert model_name == type(load_object(os.path.join('artifacts', 'model.pkl'))).__name__
+        assert load_state()['incremental_runs'] == 1
+        assert ModelManager().get().version != version
+
+    def test_publish_can_be_turned_off(self, workspace):
+        """Test that a run with publish off leaves the default bundle unpublished."""
+        TrainPipeline(TrainPipelineConfig(publish=False)).run_incremental(workspace)
+
+        assert os.path.exists(os.path.join('artifacts', 'model.pkl'))
+        assert not os.path.exists(PredictPipelineConfig.bundle_dir)
+
+    def test_rebuilds_after_full_rebuild_every_runs(self, workspace):
+        """Test that the run after full_rebuild_every incremental runs is a full rebuild."""
+        pipeline = TrainPipeline(TrainPipelineConfig(full_rebuild_every=1))
+        pipeline.run(force=True)
+        pipeline.run_incremental(workspace)
+        assert load_state()['incremental_runs'] == 1
+
+        pipeline.run_incremental(workspace)
+        assert load_state()['incremental_runs'] == 0
+
+    def test_full_run_keeps_appended_rows(self, workspace):
+        """Test that a full run after an incremental one trains on the appended rows too."""
+        pipeline = TrainPipeline()
+        pipeline.run(force=True)
+        pipeline.run_incremental(workspace)
+
+        pipeline.run(force=True)
+
+        assert count_split_rows() == 1020
+        assert load_state()['incremental_runs'] == 0
+
+    def test_distilled_student_is_distilled_again(self, workspace, monkeypatch):
+        """Test that a promoted student is rebuilt and redistilled instead of trained on real labels."""
+        distillations = []
+        monkeypatch.setattr(ModelDistillation, 'initiate_model_distillation',
+                            lambda self, test_array: distillations.append(len(test_array)) or {'promoted': 'Linear'})
+        TrainPipeline(TrainPipelineConfig(distill=True)).run(force=True)
+        assert load_state()['distilled']
+
+        model_name = TrainPipeline().run_incremental(workspace)
+
+        assert model_name == 'Linear'
+        assert len(distillations) == 2
+        assert load_state()['incremental_runs'] == 0
+        assert load_state()['distilled']
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
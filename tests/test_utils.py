@@ -0,0 +1,284 @@
+"""
+Test suite for utils.py module.
+
+This module tests the block-wise transform, cross-validation, cost
+measurement and model selection helpers.
+"""
+import os
+import tracemalloc
+import pytest
+import numpy as np
+from sklearn.model_selection import KFold
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+from src.utils import (
+    get_cv_folds, shared_training_data, get_model_costs, get_pareto_front, select_best_model,
+    iter_row_blocks, transform_in_blocks, evaluate_models, OutOfFoldRecorder,
+)
+
+MODEL_METRICS = {
+    "Random Forest": {"r2": 0.881, "single_row_latency_ms": 12.0, "size_bytes": 9_000_000},
+    "Linear Regression": {"r2": 0.880, "single_row_latency_ms": 0.1, "size_bytes": 1_000},
+    "Decision Tree": {"r2": 0.750, "single_row_latency_ms": 0.2, "size_bytes": 50_000},
+    "CatBoosting Regressor": {"r2": 0.870, "single_row_latency_ms": 1.0, "size_bytes": 200_000},
+}
+
+
+class TestTransformInBlocks:
+    """Test cases for iter_row_blocks and transform_in_blocks."""
+
+    def test_blocks_cover_every_row_once(self):
+        """Test that row blocks have the requested size and cover the frame."""
+        df = pd.DataFrame({"a": range(10)})
+        sizes = [len(block) for block in iter_row_blocks(df, 4)]
+        assert sizes == [4, 4, 2]
+
+    @pytest.mark.parametrize("n_jobs", [None, 2])
+    def test_matches_single_transform(self, n_jobs):
+        """Test that block-wise transform equals transforming everything at once."""
+        df = pd.DataFrame(np.random.RandomState(0).rand(25, 3), columns=["a", "b", "c"])
+        scaler = StandardScaler().fit(df)
+        np.testing.assert_allclose(transform_in_blocks(scaler, df, block_size=7, n_jobs=n_jobs), scaler.transform(df))
+
+    def test_reads_csv_in_chunks(self, temp_dir):
+        """Test that a CSV path is streamed through the transformer."""
+        df = pd.DataFrame(np.random.RandomState(1).rand(12, 2), columns=["a", "b"])
+        csv_path = os.path.join(temp_dir, "features.csv")
+        df.to_csv(csv_path, index=False)
+        scaler = StandardScaler().fit(df)
+        np.testing.assert_allclose(transform_in_blocks(scaler, csv_path, block_size=5), scaler.transform(df))
+
+    def test_dense_output_is_written_in_place(self):
+        """Test that dense blocks are copied into one output instead of stacked from a list."""
+        df = pd.DataFrame(np.random.RandomState(2).rand(100_000, 4), columns=["a", "b", "c", "d"])
+        scaler = StandardScaler().fit(df)
+        tracemalloc.start()
+        try:
+            output = transform_in_blocks(scaler, df, block_size=1000)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        np.testing.assert_allclose(output, scaler.transform(df))
+        assert peak < 1.5 * output.nbytes
+
+    def test_sparse_blocks_are_stacked(self):
+        """Test that sparse block outputs are stacked into one CSR matrix."""
+        df = pd.DataFrame({"a": list("xyzxyzxyzx")})
+        encoder = OneHotEncoder().fit(df)
+        output = transform_in_blocks(encoder, df, block_size=3)
+        assert output.format == "csr"
+        np.testing.assert_array_equal(output.toarray(), encoder.transform(df).toarray())
+
+    def test_empty_input_gives_no_rows(self, temp_dir):
+        """Test that an empty frame or a header-only CSV gives an array with no rows."""
+        df = pd.DataFrame({"a": [1.0, 2.0], "b": [3.0, 4.0]})
+        scaler = StandardScaler().fit(df)
+        csv_path = os.path.join(temp_dir, "empty.csv")
+        df.head(0).to_csv(csv_path, index=False)
+
+        assert transform_in_blocks(scaler, df.head(0)).shape == (0, 2)
+        assert transform_in_blocks(scaler, csv_path).shape == (0, 2)
+
+
+class TestCvFolds:
+    """Test cases for get_cv_folds."""
+
+    def test_folds_match_gridsearch_default(self):
+        """Test that precomputed folds equal the folds GridSearchCV(cv=3) uses."""
+        X = np.zeros((10, 2))
+        expected = list(KFold(n_splits=3).split(X))
+        folds = get_cv_folds(10)
+
+        assert len(folds) == 3
+        for (train_idx, test_idx), (exp_train, exp_test) in zip(folds, expected):
+            np.testing.assert_array_equal(train_idx, exp_train)
+            np.testing.assert_array_equal(test_idx, exp_test)
+
+
+class TestSharedTrainingData:
+    """Test cases for shared_training_data."""
+
+    def test_yields_read_only_memmaps(self):
+        """Test that the yielded arrays are read-only memmaps with the same values."""
+        X = np.arange(12, dtype=float).reshape(4, 3)
+        y = np.arange(4, dtype=float)
+
+        with shared_training_data(X, y) as (X_shared, y_shared):
+            assert isinstance(X_shared, np.memmap)
+            assert not X_shared.flags.writeable
+            np.testing.assert_array_equal(X_shared, X)
+            np.testing.assert_array_equal(y_shared, y)
+            backing_file = X_shared.filename
+
+        assert not os.path.exists(backing_file)
+
+
+class TestOutOfFoldPredictions:
+    """Test cases for evaluate_models(return_oof=True)."""
+
+    @pytest.mark.parametrize("n_jobs", [1, 2])
+    def test_matches_cross_val_predict_of_best_candidate(self, n_jobs):
+        """Test that the recorded predictions are the best candidate's out-of-fold predictions, serially and in parallel."""
+        from sklearn.linear_model import Ridge
+        from sklearn.model_selection import cross_val_predict
+
+        rng = np.random.RandomState(0)
+        X = rng.rand(120, 3)
+        y = X @ [1.0, 2.0, 3.0] + rng.normal(0, 0.5, 120)
+        models = {"Ridge": Ridge()}
+
+        report, oof_predictions = evaluate_models(
+            X[:90], y[:90], X[90:], y[90:], models, {"Ridge": {"alpha": [0.01, 10.0]}},
+            n_jobs=n_jobs, return_oof=True
+        )
+
+        expected = cross_val_predict(Ridge(alpha=models["Ridge"].alpha), X[:90], y[:90], cv=get_cv_folds(90))
+        np.testing.assert_allclose(oof_predictions["Ridge"], expected)
+        assert set(report) == {"Ridge"}
+
+    def test_folds_with_identical_targets(self):
+        """Test that folds are told apart by their row positions, not by their target values."""
+        from sklearn.tree import DecisionTreeRegressor
+        from sklearn.model_selection import cross_val_predict
+
+        rng = np.random.RandomState(0)
+        X = rng.rand(90, 2)
+        y = np.tile(np.arange(30, dtype=float), 3)
+        models = {"Tree": DecisionTreeRegressor(random_state=0)}
+
+        _, oof_predictions = evaluate_models(
+            X, y, X[:10], y[:10], models, {"Tree": {"max_depth": [2]}}, n_jobs=2, return_oof=True
+        )
+
+        expected = cross_val_predict(DecisionTreeRegressor(max_depth=2, random_state=0), X, y, cv=get_cv_folds(90))
+        np.testing.assert_allclose(oof_predictions["Tree"], expected)
+
+    def test_estimator_without_metadata_routing(self):
+        """Test that an estimator refusing metadata routing still gets its out-of-fold predictions."""
+        from sklearn.ensemble import AdaBoostRegressor
+        from sklearn.model_selection import cross_val_predict
+
+        rng = np.random.RandomState(0)
+        X = rng.rand(90, 2)
+        y = X.sum(axis=1)
+        models = {"AdaBoost": AdaBoostRegressor(random_state=0)}
+
+        _, oof_predictions = evaluate_models(
+            X, y, X[:10], y[:10], models, {"AdaBoost": {"n_estimators": [4, 8]}}, n_jobs=2, return_oof=True
+        )
+
+        expected = cross_val_predict(AdaBoostRegressor(n_estimators=models["AdaBoost"].n_estimators, random_state=0),
+                                     X, y, cv=get_cv_folds(90))
+        np.testing.assert_allclose(oof_predictions["AdaBoost"], expected)
+
+    def test_scikit_learn_without_search_routing(self, monkeypatch):
+        """Test that releases before 1.4, whose GridSearchCV cannot route sample_index, refit the folds instead."""
+        import sklearn
+        from sklearn.linear_model import Ridge
+        from sklearn.model_selection import cross_val_predict
+
+        monkeypatch.setattr(sklearn, "__version__", "1.3.2")
+        rng = np.random.RandomState(0)
+        X = rng.rand(90, 2)
+        y = X.sum(axis=1) + rng.normal(0, 0.1, 90)
+        models = {"Ridge": Ridge()}
+        assert not OutOfFoldRecorder.supports(models["Ridge"])
+
+        _, oof_predictions = evaluate_models(
+            X, y, X[:10], y[:10], models, {"Ridge": {"alpha": [0.01, 10.0]}}, return_oof=True
+        )
+
+        expected = cross_val_predict(Ridge(alpha=models["Ridge"].alpha), X, y, cv=get_cv_folds(90))
+        np.testing.assert_allclose(oof_predictions["Ridge"], expected)
+
+
+class TestThreadPlans:
+    """Test cases for evaluate_models(thread_plans=...)."""
+
+    def test_final_fit_gets_refit_threads(self):
+        """Test that the best parameters are fitted once, with the plan's refit threads, then the library threads return."""
+        from sklearn.ensemble import RandomForestRegressor
+        from src.resources import ThreadPlan, apply_thread_plan
+
+        rng = np.random.RandomState(0)
+        X = rng.rand(60, 2)
+        y = X.sum(axis=1)
+        plan = ThreadPlan(search_n_jobs=1, library_threads=1, refit_threads=2)
+        model = apply_thread_plan(RandomForestRegressor(n_estimators=4, random_state=0), plan)
+        fit_threads = []
+        fit = model.fit
+        model.fit = lambda X, y: fit_threads.append(model.n_jobs) or fit(X, y)
+
+        evaluate_models(X, y, X[:10], y[:10], {"RF": model}, {"RF": {"max_depth": [2, 3]}}, thread_plans={"RF": plan})
+
+        assert fit_threads == [2]
+        assert model.n_jobs == 1
+
+
+class TestSearchDetails:
+    """Test cases for evaluate_models(search_details=...)."""
+
+    def test_records_candidates_and_resources(self):
+        """Test that every candidate and the model's timings are recorded."""
+        from sklearn.linear_model import Ridge
+
+        rng = np.random.RandomState(0)
+        X = rng.rand(90, 3)
+        y = X.sum(axis=1)
+        search_details = {}
+
+        report = evaluate_models(X[:60], y[:60], X[60:], y[60:], {"Ridge": Ridge()},
+                                 {"Ridge": {"alpha": [0.01, 0.1, 1.0]}}, n_jobs=1, search_details=search_details)
+
+        details = search_details["Ridge"]
+        assert details["test_r2"] == report["Ridge"]
+        assert details["best_params"] == {"alpha": 0.01}
+        assert [candidate["rank"] for candidate in details["candidates"]] == [1, 2, 3]
+        assert all(candidate["mean_fit_time"] >= 0 for candidate in details["candidates"])
+        assert details["wall_s"] >= details["search_wall_s"] > 0
+        assert details["peak_rss_mb"] > 0
+        assert details["processes"] >= 1
+
+
+class TestModelCosts:
+    """Test cases for get_model_costs."""
+
+    def test_reports_latency_and_size(self):
+        """Test that every model gets positive latency and size measurements."""
+        X = np.random.RandomState(0).rand(20, 3)
+        model = LinearRegression().fit(X, X.sum(axis=1))
+
+        costs = get_model_costs({"Linear Regression": model}, X, n_repeats=3)["Linear Regression"]
+        assert costs["single_row_latency_ms"] > 0
+        assert costs["batch_latency_ms_per_row"] > 0
+        assert costs["size_bytes"] > 0
+
+
+class TestSelectBestModel:
+    """Test cases for get_pareto_front and select_best_model."""
+
+    def test_r2_mode_keeps_original_behaviour(self):
+        """Test that the default mode picks the highest R2."""
+        assert select_best_model(MODEL_METRICS) == "Random Forest"
+
+    def test_budget_mode_respects_latency(self):
+        """Test that budget mode picks the best R2 within the latency budget."""
+        assert select_best_model(MODEL_METRICS, selection_mode="budget", max_latency_ms=5) == "Linear Regression"
+
+    def test_budget_mode_falls_back_when_nothing_fits(self):
+        """Test that budget mode falls back to R2 when no model fits."""
+        assert select_best_model(MODEL_METRICS, selection_mode="budget", max_size_bytes=10) == "Random Forest"
+
+    def test_pareto_front_drops_dominated_models(self):
+        """Test that dominated models are excluded from the Pareto front."""
+        assert "CatBoosting Regressor" not in get_pareto_front(MODEL_METRICS)
+
+    def test_pareto_mode_prefers_cheap_model_within_tolerance(self):
+        """Test that pareto mode trades a tiny R2 loss for a much cheaper model."""
+        assert select_best_model(MODEL_METRICS, selection_mode="pareto") == "Linear Regression"
+        assert select_best_model(MODEL_METRICS, selection_mode="pareto", r2_tolerance=0) == "Random Forest"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])